@@ -0,0 +1,171 @@
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Optional
+
+from app import Applicant, Application, ChangeEvent, EducationLevel
+
+
+class MaterializedView(ABC):
+    """an aggregate over an application's pool that change events keep up to date
+
+    attach() replays the applicants already stored and subscribes in one step; from then on every
+    add, update and delete adjusts the aggregate instead of recomputing it, so reading it costs
+    nothing like a pass over the pool. subclasses count an applicant in _add and take it out in _remove
+    """
+    def __init__(self) -> None:
+        # the application delivers events under its write lock; this one keeps reads from seeing half an update
+        self._lock = threading.Lock()
+        self.__application: Optional[Application] = None
+
+    def attach(self, application: Application) -> None:
+        if self.__application is not None:
+            raise ValueError(f"{type(self).__name__} is already attached to an application")
+        self.__application = application
+        application.subscribe(self, replay=True)
+
+    def detach(self) -> None:
+        if self.__application is not None:
+            self.__application.unsubscribe(self)
+            self.__application = None
+
+    def __call__(self, event: ChangeEvent) -> None:
+        with self._lock:
+            if event.old is not None:
+                self._remove(event.old)
+            if event.new is not None:
+                self._add(event.new)
+
+    @abstractmethod
+    def _add(self, applicant: Applicant) -> None:
+        pass
+
+    @abstractmethod
+    def _remove(self, applicant: Applicant) -> None:
+        pass
+
+
+class EducationLevelCounts(MaterializedView):
+    """applicants by the highest education level they hold; None counts those without any"""
+    def __init__(self) -> None:
+        super().__init__()
+        self.__counts: Counter = Counter()
+
+    @staticmethod
+    def highest_level(applicant: Applicant) -> Optional[EducationLevel]:
+        return max((edu.education_level for edu in applicant.educational_background), key=lambda level: level.rank, default=None)
+
+    def _add(self, applicant: Applicant) -> None:
+        self.__counts[self.highest_level(applicant)] += 1
+
+    def _remove(self, applicant: Applicant) -> None:
+        level = self.highest_level(applicant)
+        self.__counts[level] -= 1
+        if not self.__counts[level]:
+            del self.__counts[level]
+
+    def count(self, level: Optional[EducationLevel]) -> int:
+        return self.__counts[level]
+
+    def counts(self) -> dict[Optional[EducationLevel], int]:
+        with self._lock:
+            return dict(self.__counts)
+
+
+class LanguageCounts(MaterializedView):
+    """applicants by the languages they speak, casefolded so that "english" and "English" are counted together"""
+    def __init__(self) -> None:
+        super().__init__()
+        self.__counts: Counter = Counter()
+
+    @staticmethod
+    def languages(applicant: Applicant) -> set[str]:
+        return {lang.language.strip().casefold() for lang in applicant.languages}
+
+    def _add(self, applicant: Applicant) -> None:
+        self.__counts.update(self.languages(applicant))
+
+    def _remove(self, applicant: Applicant) -> None:
+        for language in self.languages(applicant):
+            self.__counts[language] -= 1
+            if not self.__counts[language]:
+                del self.__counts[language]
+
+    def count(self, language: str) -> int:
+        return self.__counts[language.strip().casefold()]
+
+    def counts(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self.__counts.most_common())
+
+
+class ExperienceStats(MaterializedView):
+    """total and average years of work experience across the pool
+
+    experience is kept in whole days, so adding and removing applicants never accumulates rounding error
+    """
+    DAYS_PER_YEAR = 365.25
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.__applicants = 0
+        self.__days = 0
+
+    @staticmethod
+    def experience_days(applicant: Applicant) -> int:
+        return sum(experience.tenure_days for experience in applicant.work_experience)
+
+    def _add(self, applicant: Applicant) -> None:
+        self.__applicants += 1
+        self.__days += self.experience_days(applicant)
+
+    def _remove(self, applicant: Applicant) -> None:
+        self.__applicants -= 1
+        self.__days -= self.experience_days(applicant)
+
+    @property
+    def applicants(self) -> int:
+        return self.__applicants
+
+    @property
+    def total_years(self) -> float:
+        return self.__days / self.DAYS_PER_YEAR
+
+    @property
+    def average_years(self) -> float:
+        with self._lock:
+            return self.__days / self.DAYS_PER_YEAR / self.__applicants if self.__applicants else 0.0
+
+
+class Aggregates:
+    """the built-in views, attached to one application together
+
+        aggregates = Aggregates(application)
+        aggregates.education_levels.count(EducationLevel.MASTER), aggregates.experience.average_years
+    """
+    def __init__(self, application: Application) -> None:
+        self.__education_levels = EducationLevelCounts()
+        self.__languages = LanguageCounts()
+        self.__experience = ExperienceStats()
+        for view in self.views:
+            view.attach(application)
+
+    @property
+    def education_levels(self) -> EducationLevelCounts:
+        return self.__education_levels
+
+    @property
+    def languages(self) -> LanguageCounts:
+        return self.__languages
+
+    @property
+    def experience(self) -> ExperienceStats:
+        return self.__experience
+
+    @property
+    def views(self) -> tuple[MaterializedView, ...]:
+        return (self.__education_levels, self.__languages, self.__experience)
+
+    def close(self) -> None:
+        for view in self.views:
+            view.detach()
@@ -0,0 +1,199 @@
+import datetime
+from typing import Iterable, Optional, Sequence, Union
+
+try:
+    import numpy as np
+except ImportError as e:
+    raise ImportError("analytics.py needs NumPy (pip install numpy); the rest of the application runs without it") from e
+
+from app import Application, ChangeEvent, EducationLevel
+from interning import POOLS
+
+
+# columns with one value per applicant, and the one with a value per job (tenure_days), whose rows
+# are mapped back to applicants by job_rows. "ids" is always there. "sex" holds the value's code in
+# interning.POOLS["sex"] (-1 for one the pool didn't take), so filtering on it compares integers
+APPLICANT_COLUMNS = ("age", "education_level", "language_count", "job_count", "experience_days", "sex")
+JOB_COLUMNS = ("tenure_days",)
+COLUMNS = APPLICANT_COLUMNS + JOB_COLUMNS
+# columns that need the applicants' work experience walked
+_JOB_DERIVED = frozenset(("job_count", "experience_days", "tenure_days"))
+# datetime.date.toordinal() of numpy's datetime64 epoch, 1970-01-01
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+def _ages(birth_ordinals: np.ndarray, as_of: datetime.date) -> np.ndarray:
+    # whole years, one less for those whose birthday is still to come in as_of's year
+    births = (birth_ordinals - _EPOCH_ORDINAL).astype("datetime64[D]")
+    months = births.astype("datetime64[M]")
+    years = months.astype("datetime64[Y]").astype(np.int32) + 1970
+    month = months.astype(np.int32) % 12 + 1
+    day = (births - months).astype(np.int32) + 1
+    not_yet = (month > as_of.month) | ((month == as_of.month) & (day > as_of.day))
+    return (as_of.year - years - not_yet).astype(np.int16)
+
+
+class ColumnarSnapshot:
+    """a column-per-field copy of an application's pool for vectorized cohort analysis
+
+        snapshot = ColumnarSnapshot(application, columns=("age", "education_level"))
+        masters = snapshot.filter(snapshot["education_level"] >= EducationLevel.MASTER.rank)
+        masters.percentiles("age", (25, 50, 75))
+        women = snapshot.filter(snapshot["sex"] == POOLS["sex"].code("Female"))   # with "sex" projected
+
+    only the projected `columns` are extracted, which is most of the cost of building a snapshot.
+    education_level holds the rank of the highest degree (-1 for none) and ages are counted on
+    `as_of` (today by default). the snapshot subscribes to the application's change events to know
+    when it went stale; refresh() rebuilds it then, and close() unsubscribes
+    """
+    def __init__(self, application: Application, columns: Optional[Iterable[str]] = None, as_of: Optional[datetime.date] = None) -> None:
+        projected = tuple(COLUMNS if columns is None else dict.fromkeys(columns))
+        unknown = [name for name in projected if name not in COLUMNS]
+        if unknown:
+            raise ValueError(f"unknown column(s) {', '.join(map(repr, unknown))}; expected some of {', '.join(COLUMNS)}")
+        self.__application: Optional[Application] = application
+        self.__projected = projected
+        self.__as_of = as_of
+        self.__stale = True
+        self.__columns: dict[str, np.ndarray] = {}
+        application.subscribe(self.__changed)
+        self.refresh()
+
+    @classmethod
+    def __derived(cls, columns: dict[str, np.ndarray], projected: tuple[str, ...], as_of: Optional[datetime.date]) -> "ColumnarSnapshot":
+        # a snapshot of already extracted columns, such as a filter's result; it has no application to refresh from
+        snapshot = cls.__new__(cls)
+        snapshot.__application = None
+        snapshot.__projected = projected
+        snapshot.__as_of = as_of
+        snapshot.__stale = False
+        snapshot.__columns = columns
+        return snapshot
+
+    def __changed(self, event: ChangeEvent) -> None:
+        self.__stale = True
+
+    @property
+    def stale(self) -> bool:
+        return self.__stale
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        return self.__projected
+
+    def refresh(self, force: bool = False) -> bool:
+        """rebuilds the columns if the pool changed since they were extracted; returns whether it did"""
+        if self.__application is None:
+            raise ValueError("a filtered snapshot can't be refreshed; refresh the snapshot it came from and filter again")
+        if not (self.__stale or force):
+            return False
+        # cleared before reading, so a change made during the extraction leaves the snapshot stale
+        self.__stale = False
+        self.__columns = self.__extract(self.__application)
+        return True
+
+    def close(self) -> None:
+        if self.__application is not None:
+            self.__application.unsubscribe(self.__changed)
+            self.__application = None
+
+    def __extract(self, application: Application) -> dict[str, np.ndarray]:
+        projected = set(self.__projected)
+        with_jobs = bool(projected & _JOB_DERIVED)
+        ids: list[int] = []
+        births: list[int] = []
+        sexes: list[int] = []
+        sex_code = POOLS["sex"].code
+        levels: list[int] = []
+        language_counts: list[int] = []
+        job_counts: list[int] = []
+        tenures: list[int] = []
+        # one pass over the pool, touching only what the projected columns need
+        for applicant_id, applicant in application.scan():
+            ids.append(applicant_id)
+            if "age" in projected:
+                births.append(applicant.personal_info.date_of_birth.toordinal())
+            if "sex" in projected:
+                code = sex_code(applicant.personal_info.sex)
+                sexes.append(-1 if code is None else code)
+            if "education_level" in projected:
+                levels.append(max((edu.education_level.rank for edu in applicant.educational_background), default=-1))
+            if "language_count" in projected:
+                language_counts.append(len(applicant.languages))
+            if with_jobs:
+                jobs = applicant.work_experience
+                job_counts.append(len(jobs))
+                tenures.extend(experience.tenure_days for experience in jobs)
+        columns = {"ids": np.array(ids, dtype=np.int64)}
+        if "age" in projected:
+            columns["age"] = _ages(np.array(births, dtype=np.int64), self.__as_of or datetime.date.today())
+        if "education_level" in projected:
+            columns["education_level"] = np.array(levels, dtype=np.int8)
+        if "language_count" in projected:
+            columns["language_count"] = np.array(language_counts, dtype=np.int16)
+        if "sex" in projected:
+            columns["sex"] = np.array(sexes, dtype=np.int32)
+        if with_jobs:
+            counts = np.array(job_counts, dtype=np.int32)
+            tenure = np.array(tenures, dtype=np.int32)
+            job_rows = np.repeat(np.arange(len(counts), dtype=np.int32), counts)
+            if "job_count" in projected:
+                columns["job_count"] = counts
+            if "experience_days" in projected:
+                columns["experience_days"] = np.bincount(job_rows, weights=tenure, minlength=len(counts)).astype(np.int64)
+            if "tenure_days" in projected:
+                columns["tenure_days"] = tenure
+            columns["job_rows"] = job_rows
+        return columns
+
+    def __len__(self) -> int:
+        return len(self.__columns["ids"])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name not in self.__columns:
+            raise KeyError(f"column {name!r} was not projected into this snapshot")
+        return self.__columns[name]
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self.__columns["ids"]
+
+    def filter(self, mask: np.ndarray) -> "ColumnarSnapshot":
+        """the applicants where the boolean mask (one value per applicant) is True, with their jobs"""
+        mask = np.asarray(mask, dtype=bool)
+        if mask.shape != (len(self),):
+            raise ValueError(f"the mask needs one value per applicant ({len(self)}), not shape {mask.shape}")
+        columns = {name: values[mask] for name, values in self.__columns.items() if name not in JOB_COLUMNS and name != "job_rows"}
+        if "job_rows" in self.__columns:
+            job_rows = self.__columns["job_rows"]
+            kept = mask[job_rows]
+            # applicant rows shift down by the number of rows dropped before them
+            new_rows = np.cumsum(mask, dtype=np.int32) - 1
+            columns["job_rows"] = new_rows[job_rows[kept]]
+            for name in JOB_COLUMNS:
+                if name in self.__columns:
+                    columns[name] = self.__columns[name][kept]
+        return ColumnarSnapshot.__derived(columns, self.__projected, self.__as_of)
+
+    def histogram(self, column: str, bins: Union[int, Sequence[float]] = 10) -> tuple[np.ndarray, np.ndarray]:
+        """(counts, bin edges) as numpy.histogram computes them"""
+        return np.histogram(self[column], bins=bins)
+
+    def percentiles(self, column: str, q: Union[float, Sequence[float]] = (25, 50, 75)) -> np.ndarray:
+        values = self[column]
+        if not len(values):
+            return np.full(np.shape(q), np.nan)
+        return np.percentile(values, q)
+
+    def mean(self, column: str) -> float:
+        values = self[column]
+        return float(values.mean()) if len(values) else float("nan")
+
+    def value_counts(self, column: str) -> dict[int, int]:
+        values, counts = np.unique(self[column], return_counts=True)
+        return dict(zip(values.tolist(), counts.tolist()))
+
+    def education_level_counts(self) -> dict[Optional[EducationLevel], int]:
+        """applicants by highest education level, None for those without any"""
+        levels = {level.rank: level for level in EducationLevel}
+        return {levels.get(rank): count for rank, count in self.value_counts("education_level").items()}
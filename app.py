@@ -1,8 +1,21 @@
+import contextlib
+import copyreg
 import datetime
+import itertools
+import logging
+import sys
 from enum import Enum
 from abc import ABC, abstractmethod, abstractproperty # type: ignore
-from typing import Optional 
+from typing import TYPE_CHECKING, Callable, ContextManager, Iterable, Iterator, Optional, TextIO, Union
 
+from indexes import IndexCatalog
+from interning import POOLS
+from locks import RWLock
+
+if TYPE_CHECKING:
+    from query import Predicate, Query
+
+logger = logging.getLogger(__name__)
 
 class EmergencyContactLevel(Enum):
     PRIMARY = 1
@@ -16,9 +29,31 @@ class EducationLevel(Enum):
     MASTER = "Master's Degree"
     PHD = "PhD/ Doctorate Degree"
 
+    @property
+    def rank(self) -> int:
+        # position in the declaration order above, lowest degree first
+        return _EDUCATION_RANKS[self]
+
+
+_EDUCATION_RANKS: dict[EducationLevel, int] = {level: rank for rank, level in enumerate(EducationLevel)}
+# the fields below store the shared copy of their value from interning.POOLS; the properties return it unchanged
+_SEX = POOLS["sex"].intern
+_LANGUAGE = POOLS["language"].intern
+_READ_ABILITY = POOLS["read_ability"].intern
+_WRITE_ABILITY = POOLS["write_ability"].intern
+_SPEAK_ABILITY = POOLS["speak_ability"].intern
+_UNIVERSITY_NAME = POOLS["university_name"].intern
+_UNIVERSITY_LOCATION = POOLS["university_location"].intern
+_UNIVERSITY_COUNTRY = POOLS["university_country"].intern
+_MAIN_FIELD_OF_STUDY = POOLS["main_field_of_study"].intern
+_COMPANY_NAME = POOLS["company_name"].intern
+_LOCATION = POOLS["location"].intern
+
 
 class ApplicationBase(ABC):
     """abstract class to pass on abstract methods to the child class"""
+    __slots__ = ()
+
     @abstractmethod
     def add_personal_info(self, full_name: str, date_of_birth: str, sex: str, home_address: str, phone_number_home: str, phone_number_mobile: str, email_address: str) -> None:
         pass
@@ -38,9 +73,13 @@ class ApplicationBase(ABC):
 
 class InputFormatter(ABC):
     """abstract class to format US phone numbers"""
+    __slots__ = ()
 
     def phoneNumberFormatter(self, num: str) -> int:
         formatted_number: str = ""
+        # an empty cell has no number to format
+        if not num:
+            raise ValueError("ValueError: Invalid Phone Number Input Provided!")
         # checking if the entered value begins with a 001...
         if num[0] == "0":
             formatted_number = num[3:]
@@ -77,12 +116,16 @@ class InputFormatter(ABC):
 
 
 class PersonalInfo(InputFormatter):
+    # slots instead of a per-instance __dict__; large applicant pools hold millions of these records
+    __slots__ = ("__full_name", "__date_of_birth", "__sex", "__home_address", "__phone_number_home", "__phone_number_mobile",
+                 "__email_address", "__emergency_contact_primary", "__emergency_contact_secondary")
+
     def __init__(self, full_name: str, date_of_birth: str, sex: str, home_address: str, phone_number_home: str, phone_number_mobile: str, email_address: str) -> None:
         self.__full_name = full_name
         self.__date_of_birth: datetime.date = self.dateFormatter(date_of_birth)
         self.__phone_number_home = self.phoneNumberFormatter(phone_number_home)
         self.__phone_number_mobile = self.phoneNumberFormatter(phone_number_mobile)
-        self.__sex = sex
+        self.__sex = _SEX(sex)
         self.__home_address = home_address
         self.__email_address = self.emailFormatChecker(email_address)
         self.__emergency_contact_primary = None
@@ -135,7 +178,7 @@ class PersonalInfo(InputFormatter):
             raise ValueError(f"Error parsing 'date_of_birth' date: {e}")  
     @sex.setter
     def sex(self, sex: str) -> None:
-        self.__sex = sex
+        self.__sex = _SEX(sex)
     @home_address.setter 
     def home_address(self, address: str) -> None:
         self.__home_address = address
@@ -159,12 +202,28 @@ class PersonalInfo(InputFormatter):
             raise ValueError(f"Error parsing 'email_address': {e}")
 
 
+    # compact, already-validated state used to ship records between processes
+    def _state(self) -> tuple:
+        return (self.__full_name, self.__date_of_birth.toordinal(), self.__sex, self.__home_address, self.__phone_number_home,
+                self.__phone_number_mobile, self.__email_address, self.__emergency_contact_primary, self.__emergency_contact_secondary)
+
+    @classmethod
+    def _from_state(cls, state: tuple) -> "PersonalInfo":
+        info = cls.__new__(cls)
+        (info.__full_name, date_of_birth, sex, info.__home_address, info.__phone_number_home,
+         info.__phone_number_mobile, info.__email_address, info.__emergency_contact_primary, info.__emergency_contact_secondary) = state
+        info.__date_of_birth = datetime.date.fromordinal(date_of_birth)
+        info.__sex = _SEX(sex)
+        return info
+
 class Language:
+    __slots__ = ("__language", "__read_ability", "__write_ability", "__speak_ability")
+
     def __init__(self, language: str, read_ability: str, write_ability: str, speak_ability: str) -> None:
-        self.__language = language
-        self.__read_ability = read_ability
-        self.__write_ability = write_ability
-        self.__speak_ability = speak_ability
+        self.__language = _LANGUAGE(language)
+        self.__read_ability = _READ_ABILITY(read_ability)
+        self.__write_ability = _WRITE_ABILITY(write_ability)
+        self.__speak_ability = _SPEAK_ABILITY(speak_ability)
 
     @property
     def language(self) -> str:
@@ -181,28 +240,44 @@ class Language:
     
     @language.setter
     def language(self, lang: str) -> None:
-        self.__language = lang
+        self.__language = _LANGUAGE(lang)
     @read_ability.setter
     def read_ability(self, read: str) -> None:
-        self.__read_ability = read
+        self.__read_ability = _READ_ABILITY(read)
     @write_ability.setter
     def write_ability(self, write: str) -> None:
-        self.__write_ability = write
+        self.__write_ability = _WRITE_ABILITY(write)
     @speak_ability.setter
     def speak_ability(self, speak: str) -> None:
-        self.__speak_ability = speak
+        self.__speak_ability = _SPEAK_ABILITY(speak)
+
 
+    def _state(self) -> tuple:
+        return (self.__language, self.__read_ability, self.__write_ability, self.__speak_ability)
+
+    @classmethod
+    def _from_state(cls, state: tuple) -> "Language":
+        lang = cls.__new__(cls)
+        language, read_ability, write_ability, speak_ability = state
+        lang.__language = _LANGUAGE(language)
+        lang.__read_ability = _READ_ABILITY(read_ability)
+        lang.__write_ability = _WRITE_ABILITY(write_ability)
+        lang.__speak_ability = _SPEAK_ABILITY(speak_ability)
+        return lang
 
 class Education(InputFormatter):
+    __slots__ = ("__education_level", "__university_name", "__university_location", "__university_country",
+                 "__attended_from", "__attended_to", "__certificates", "__main_field_of_study")
+
     def __init__(self, level: EducationLevel, university_name: str, university_location: str, university_country: str, attended_from: str, attended_to: str, certificates: str, main_field_of_study: str) -> None:
         self.__education_level = level
-        self.__university_name = university_name
-        self.__university_location = university_location
-        self.__university_country = university_country
+        self.__university_name = _UNIVERSITY_NAME(university_name)
+        self.__university_location = _UNIVERSITY_LOCATION(university_location)
+        self.__university_country = _UNIVERSITY_COUNTRY(university_country)
         self.__attended_from = self.dateFormatter(attended_from)
         self.__attended_to = self.dateFormatter(attended_to)
         self.__certificates = certificates.split(',')
-        self.__main_field_of_study = main_field_of_study
+        self.__main_field_of_study = _MAIN_FIELD_OF_STUDY(main_field_of_study)
 
     @property
     def education_level(self) -> EducationLevel:
@@ -234,13 +309,13 @@ class Education(InputFormatter):
         self.__education_level = level
     @university_name.setter
     def university_name(self, name: str) -> None:
-        self.__university_name = name
+        self.__university_name = _UNIVERSITY_NAME(name)
     @university_location.setter
     def university_location(self, loc: str) -> None:
-        self.__university_location = loc
+        self.__university_location = _UNIVERSITY_LOCATION(loc)
     @university_country.setter
     def university_country(self, country: str) -> None:
-        self.__university_country = country
+        self.__university_country = _UNIVERSITY_COUNTRY(country)
     @attended_from.setter
     def attended_from(self, date: str) -> None:
         try:
@@ -260,13 +335,34 @@ class Education(InputFormatter):
             self.__certificates = new_certificates
     @main_field_of_study.setter
     def main_field_of_study(self, main: str) -> None:
-        self.__main_field_of_study = main
+        self.__main_field_of_study = _MAIN_FIELD_OF_STUDY(main)
 
 
+    def _state(self) -> tuple:
+        return (self.__education_level.name, self.__university_name, self.__university_location, self.__university_country,
+                self.__attended_from.toordinal(), self.__attended_to.toordinal(), tuple(self.__certificates), self.__main_field_of_study)
+
+    @classmethod
+    def _from_state(cls, state: tuple) -> "Education":
+        edu = cls.__new__(cls)
+        (level, university_name, university_location, university_country,
+         attended_from, attended_to, certificates, main_field_of_study) = state
+        edu.__education_level = EducationLevel[level]
+        edu.__university_name = _UNIVERSITY_NAME(university_name)
+        edu.__university_location = _UNIVERSITY_LOCATION(university_location)
+        edu.__university_country = _UNIVERSITY_COUNTRY(university_country)
+        edu.__main_field_of_study = _MAIN_FIELD_OF_STUDY(main_field_of_study)
+        edu.__attended_from = datetime.date.fromordinal(attended_from)
+        edu.__attended_to = datetime.date.fromordinal(attended_to)
+        edu.__certificates = list(certificates)
+        return edu
+
 class WorkExperience(InputFormatter):
+    __slots__ = ("__company_name", "__location", "__emp_from", "__emp_to", "__position", "__reason_for_leaving")
+
     def __init__(self, company: str, location: str, emp_from: str, emp_to: str, position: str, reason: str) -> None:
-        self.__company_name = company
-        self.__location = location
+        self.__company_name = _COMPANY_NAME(company)
+        self.__location = _LOCATION(location)
         self.__emp_from = self.dateFormatter(emp_from)
         self.__emp_to = self.dateFormatter(emp_to)
         self.__position = position
@@ -290,13 +386,17 @@ class WorkExperience(InputFormatter):
     @property
     def reason_for_leaving(self) -> str:
         return self.__reason_for_leaving
+    @property
+    def tenure_days(self) -> int:
+        # days from start to end, 0 for a job entered with its dates the wrong way round
+        return max(0, (self.__emp_to - self.__emp_from).days)
     
     @company_name.setter
     def company_name(self, name: str) -> None:
-        self.__company_name = name
+        self.__company_name = _COMPANY_NAME(name)
     @location.setter
     def location(self, loc: str) -> None:
-        self.__location = loc
+        self.__location = _LOCATION(loc)
     @emp_from.setter
     def emp_from(self, emp_from: str) -> None:
         try:
@@ -306,7 +406,7 @@ class WorkExperience(InputFormatter):
     @emp_to.setter
     def emp_to(self, emp_to: str) -> None:
         try:
-            self.__emp_from = self.dateFormatter(emp_to)
+            self.__emp_to = self.dateFormatter(emp_to)
         except ValueError as e:
             raise ValueError(f"Error parsing 'emp_to' date: {e}")
     @position.setter
@@ -317,7 +417,25 @@ class WorkExperience(InputFormatter):
         self.__reason_for_leaving = reason
 
 
+    def _state(self) -> tuple:
+        return (self.__company_name, self.__location, self.__emp_from.toordinal(), self.__emp_to.toordinal(),
+                self.__position, self.__reason_for_leaving)
+
+    @classmethod
+    def _from_state(cls, state: tuple) -> "WorkExperience":
+        experience = cls.__new__(cls)
+        company_name, location, emp_from, emp_to, position, reason_for_leaving = state
+        experience.__company_name = _COMPANY_NAME(company_name)
+        experience.__location = _LOCATION(location)
+        experience.__position = position
+        experience.__reason_for_leaving = reason_for_leaving
+        experience.__emp_from = datetime.date.fromordinal(emp_from)
+        experience.__emp_to = datetime.date.fromordinal(emp_to)
+        return experience
+
 class Applicant(ApplicationBase):
+    __slots__ = ("__personal_info", "__languages", "__educational_background", "__work_experience", "__major_skills")
+
     def __init__(self):
         self.__personal_info: PersonalInfo
         self.__languages: list[Language] = []
@@ -358,125 +476,566 @@ class Applicant(ApplicationBase):
         if len(self.__work_experience) < 3:
             self.__work_experience.append(WorkExperience(company, location, emp_from, emp_to, position, reason))
 
+    @property
+    def identity(self) -> tuple[str, int]:
+        # the (full name, mobile number) pair that makes two applications the same applicant
+        return (self.personal_info.full_name, self.personal_info.phone_number_mobile)
+
     def __eq__(self, __value: object) -> bool:
         if isinstance(__value, Applicant):
-            return self.personal_info.full_name == __value.personal_info.full_name and self.personal_info.phone_number_mobile == __value.personal_info.phone_number_mobile
+            return self.identity == __value.identity
         return False
     
     def __hash__(self) -> int:
-        return hash((self.personal_info.full_name, self.personal_info.phone_number_mobile))
+        return hash(self.identity)
 
+    def _state(self) -> tuple:
+        return (self.__personal_info._state(),
+                tuple(lang._state() for lang in self.__languages),
+                tuple(edu._state() for edu in self.__educational_background),
+                tuple(experience._state() for experience in self.__work_experience),
+                self.__major_skills)
 
-class Application:
+    @classmethod
+    def _from_state(cls, state: tuple) -> "Applicant":
+        applicant = cls.__new__(cls)
+        personal_info, languages, education, work_experience, applicant.__major_skills = state
+        applicant.__personal_info = PersonalInfo._from_state(personal_info)
+        applicant.__languages = [Language._from_state(lang) for lang in languages]
+        applicant.__educational_background = [Education._from_state(edu) for edu in education]
+        applicant.__work_experience = [WorkExperience._from_state(experience) for experience in work_experience]
+        return applicant
+
+    def __reduce__(self):
+        # pickles as one flat tuple instead of a graph of objects, which keeps process pools cheap;
+        # an applicant still being filled in has unset slots, so it pickles slot by slot instead
+        try:
+            return (Applicant._from_state, (self._state(),))
+        except AttributeError:
+            slots = {name: getattr(self, name) for name in (f"_Applicant{slot}" for slot in Applicant.__slots__) if hasattr(self, name)}
+            return (copyreg.__newobj__, (Applicant,), (None, slots))
+
+
+def _as_date(value: Union[datetime.date, str, None]) -> Optional[datetime.date]:
+    # query bounds may be given as dates or as the same 'YYYY-MM-DD' strings the records are entered with
+    if value is None or isinstance(value, datetime.date):
+        return value
+    return InputFormatter().dateFormatter(value)
+
+
+class ApplicantStore(ABC):
+    """abstract class for the storage backends an Application keeps its applicants in
+
+    every stored applicant gets an integer id; ids grow with insertion order and stay stable until the
+    applicant is removed
+    """
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[tuple[int, Applicant]]:
+        """yields (id, applicant) pairs in insertion order"""
+        pass
+
+    @abstractmethod
+    def get(self, applicant_id: int) -> Applicant:
+        pass
+
+    def get_many(self, applicant_ids: Iterable[int]) -> list[Applicant]:
+        return [self.get(applicant_id) for applicant_id in applicant_ids]
+
+    @abstractmethod
+    def contains_identity(self, identity: tuple[str, int]) -> bool:
+        pass
+
+    @abstractmethod
+    def find_by_name(self, full_name: str) -> list[tuple[int, Applicant]]:
+        """case-insensitive full name lookup, in insertion order"""
+        pass
+
+    @abstractmethod
+    def insert(self, applicant: Applicant) -> int:
+        pass
+
+    @abstractmethod
+    def replace(self, applicant_id: int, applicant: Applicant) -> None:
+        pass
+
+    @abstractmethod
+    def remove(self, applicant_id: int) -> None:
+        pass
+
+    @abstractmethod
+    def put(self, applicant_id: int, applicant: Applicant) -> None:
+        """stores the applicant under a given, unused id, e.g. to bring back a removed one"""
+        pass
+
+    def batch(self) -> ContextManager[None]:
+        """groups the writes made inside the block; backends with transactions commit them together"""
+        return contextlib.nullcontext()
+
+    def atomic(self) -> ContextManager[None]:
+        """a batch that commits nothing before the block ends, even on backends that commit a batch along the way"""
+        return self.batch()
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryStore(ApplicantStore):
     def __init__(self) -> None:
-        self.__applicants: list[Applicant] = []
+        # applicants keyed by a running id so that removals don't shift the other records
+        self.__applicants: dict[int, Applicant] = {}
+        self.__next_id = 0
+        # identity index: Applicant.identity -> number of stored applicants sharing it
+        self.__identities: dict[tuple[str, int], int] = {}
+        # name index: casefolded full name -> ids of the applicants carrying it
+        self.__names: dict[str, list[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.__applicants)
+
+    def __iter__(self) -> Iterator[tuple[int, Applicant]]:
+        # walks the id range handed out so far instead of the dict itself, which keeps the iteration lazy
+        # and lets the store change underneath it; applicants added after it started are not included
+        for applicant_id in range(self.__next_id):
+            applicant = self.__applicants.get(applicant_id)
+            if applicant is not None:
+                yield applicant_id, applicant
+
+    def get(self, applicant_id: int) -> Applicant:
+        return self.__applicants[applicant_id]
+
+    def contains_identity(self, identity: tuple[str, int]) -> bool:
+        return identity in self.__identities
+
+    def find_by_name(self, full_name: str) -> list[tuple[int, Applicant]]:
+        # ids are handed out in insertion order, so sorting keeps results in the order they were added.
+        # the name is checked again, so an applicant renamed in place isn't found under its old name
+        key = full_name.casefold()
+        found = [(applicant_id, self.__applicants[applicant_id]) for applicant_id in sorted(self.__names.get(key, ()))]
+        return [(applicant_id, applicant) for applicant_id, applicant in found if applicant.personal_info.full_name.casefold() == key]
+
+    def __index(self, applicant_id: int, applicant: Applicant) -> None:
+        key = applicant.identity
+        self.__identities[key] = self.__identities.get(key, 0) + 1
+        self.__names.setdefault(applicant.personal_info.full_name.casefold(), []).append(applicant_id)
+
+    def __unindex(self, applicant_id: int, applicant: Applicant) -> None:
+        key = applicant.identity
+        if self.__identities[key] == 1:
+            del self.__identities[key]
+        else:
+            self.__identities[key] -= 1
+        name = applicant.personal_info.full_name.casefold()
+        ids = self.__names[name]
+        ids.remove(applicant_id)
+        if not ids:
+            del self.__names[name]
+
+    def insert(self, applicant: Applicant) -> int:
+        applicant_id = self.__next_id
+        self.__next_id += 1
+        self.__applicants[applicant_id] = applicant
+        self.__index(applicant_id, applicant)
+        return applicant_id
+
+    def replace(self, applicant_id: int, applicant: Applicant) -> None:
+        self.__unindex(applicant_id, self.__applicants[applicant_id])
+        self.__applicants[applicant_id] = applicant
+        self.__index(applicant_id, applicant)
+
+    def remove(self, applicant_id: int) -> None:
+        self.__unindex(applicant_id, self.__applicants.pop(applicant_id))
+
+    def put(self, applicant_id: int, applicant: Applicant) -> None:
+        # recovery also uses it to restore the ids a journal refers to
+        self.__applicants[applicant_id] = applicant
+        self.__next_id = max(self.__next_id, applicant_id + 1)
+        self.__index(applicant_id, applicant)
+
+    def copy(self) -> dict[int, Applicant]:
+        """a point-in-time copy of the stored applicants by id, cheap enough to take while writes wait"""
+        return self.__applicants.copy()
+
+
+class ChangeEvent:
+    """one change to the pool, as delivered to the listeners registered with Application.subscribe
+
+    `kind` is "add", "update" or "delete"; `old` is None for an add and `new` is None for a delete
+    """
+    __slots__ = ("kind", "applicant_id", "old", "new")
+
+    def __init__(self, kind: str, applicant_id: int, old: Optional[Applicant], new: Optional[Applicant]) -> None:
+        self.kind = kind
+        self.applicant_id = applicant_id
+        self.old = old
+        self.new = new
+
+    def __repr__(self) -> str:
+        return f"ChangeEvent({self.kind!r}, {self.applicant_id})"
+
+
+class Application:
+    """the applicant pool, safe to share between threads
+
+    writes take an exclusive lock and queries a shared one; scans over the pool (iteration,
+    the applicants list and reports) don't hold it at all, since the stores
+    iterate by id without being disturbed by concurrent writes. a scan sees every applicant that
+    was stored when it started and not removed before it got there. scan() reads pages under
+    the shared lock instead, for passes that shouldn't see a write in progress.
+
+    stored applicants only change through update_application and update_where, which keep the store
+    and the indexes in step. one changed in place through its setters isn't indexed again, so it is
+    no longer found under its new name, and a persistent store never sees the change
+    """
+    def __init__(self, store: Optional[ApplicantStore] = None) -> None:
+        self.__store: ApplicantStore = store if store is not None else MemoryStore()
+        self.__lock = RWLock()
+        # secondary indexes over the store's ids; built on first use, so opening a large
+        # persistent store doesn't pay for them up front
+        self.__indexes = IndexCatalog()
+        self.__indexed = len(self.__store) == 0
+        # replaced rather than appended to, so that notifying never iterates a list that is being changed
+        self.__listeners: tuple[Callable[[ChangeEvent], None], ...] = ()
+
+    @property
+    def store(self) -> ApplicantStore:
+        return self.__store
 
     @property
     def applicants(self) -> list[Applicant]:
-        return self.__applicants
+        return [applicant for _, applicant in self.__store]
 
-    def __iter__(self):
-        self.index = -1
-        return self
-    
-    def __next__(self):
-        self.index += 1
-        if self.index >= len(self.__applicants):
-            raise StopIteration
-        return self.__applicants[self.index]
-
-    def add_applicant(self, applicant: Applicant) -> None:
-        if applicant not in self.__applicants:
-            self.__applicants.append(applicant)
-            print("*****######******######*******######")
-            print("Application added successfully!")
-            print("*****######******######*******######")
-        else: 
+    def __len__(self) -> int:
+        return len(self.__store)
+
+    def scan(self, page_size: int = 1000) -> Iterator[tuple[int, Applicant]]:
+        """(id, applicant) pairs of the whole pool in id order, read a page at a time under the shared lock
+
+        for exports and analyses: a page is never read in the middle of a write, and writers get
+        their turn between pages, so a long pass doesn't hold them up for its whole length
+        """
+        pairs = iter(self.__store)
+        while True:
+            with self.__lock.reading():
+                page = list(itertools.islice(pairs, page_size))
+            if not page:
+                return
+            yield from page
+
+    def __iter__(self) -> Iterator[Applicant]:
+        # a fresh generator per call, so a page can be rendered without materializing every applicant first
+        for _, applicant in self.__store:
+            yield applicant
+
+    def __contains__(self, applicant: object) -> bool:
+        return isinstance(applicant, Applicant) and self.__store.contains_identity(applicant.identity)
+
+    def __ensure_indexes(self) -> None:
+        if not self.__indexed:
+            with self.__lock.writing():
+                if not self.__indexed:
+                    for applicant_id, applicant in self.__store:
+                        self.__indexes.add(applicant_id, applicant)
+                    self.__indexed = True
+
+    def __index(self, applicant_id: int, applicant: Applicant) -> None:
+        if self.__indexed:
+            self.__indexes.add(applicant_id, applicant)
+
+    def __unindex(self, applicant_id: int, applicant: Applicant) -> None:
+        if self.__indexed:
+            self.__indexes.remove(applicant_id, applicant)
+
+    def subscribe(self, listener: Callable[[ChangeEvent], None], replay: bool = False) -> None:
+        """calls listener(event) after every add, update and delete, including the bulk ones
+
+        listeners run under the write lock, in the order the changes happen, so they have to be quick
+        and must not call back into the application. an exception from a listener is logged and the
+        change and the other listeners go ahead regardless. with replay the listener first gets an "add" for
+        every applicant already stored, atomically with subscribing, so that nothing is missed or
+        counted twice
+        """
+        with self.__lock.writing():
+            if replay:
+                for applicant_id, applicant in self.__store:
+                    listener(ChangeEvent("add", applicant_id, None, applicant))
+            self.__listeners += (listener,)
+
+    def unsubscribe(self, listener: Callable[[ChangeEvent], None]) -> None:
+        with self.__lock.writing():
+            # == rather than "is", since a bound method is a new object every time it is looked up
+            self.__listeners = tuple(registered for registered in self.__listeners if registered != listener)
+
+    def __notify(self, kind: str, applicant_id: int, old: Optional[Applicant], new: Optional[Applicant]) -> None:
+        event = ChangeEvent(kind, applicant_id, old, new)
+        for listener in self.__listeners:
+            # the change has been made by now; a failing listener mustn't undo half of it or keep the others from hearing of it
+            try:
+                listener(event)
+            except Exception:
+                logger.exception("change listener %r failed on %r", listener, event)
+
+    def batch(self) -> ContextManager[None]:
+        return self.__store.batch()
+
+    def close(self) -> None:
+        self.__store.close()
+
+    def add_applicant(self, applicant: Applicant, verbose: bool = True) -> bool:
+        # bulk loaders pass verbose=False and use the returned flag instead of the banners
+        with self.__lock.writing():
+            added = applicant not in self
+            if added:
+                applicant_id = self.__store.insert(applicant)
+                self.__index(applicant_id, applicant)
+                if self.__listeners:
+                    self.__notify("add", applicant_id, None, applicant)
+        if added:
+            if verbose:
+                print("*****######******######*******######")
+                print("Application added successfully!")
+                print("*****######******######*******######")
+            return True
+        if verbose:
             print("*****######******######*******######")
             print("You have already applied for this job!")
             print("*****######******######*******######")
+        return False
 
     def search_application(self, full_name: str) -> list[Applicant]:
-        found_applicants: list[Applicant] = []
-        for applicant in self.__applicants:
-            if applicant.personal_info.full_name.lower() == full_name.lower():
-                found_applicants.append(applicant)
-        return found_applicants
+        with self.__lock.reading():
+            return [applicant for _, applicant in self.__store.find_by_name(full_name)]
+
+    def search_keywords(self, terms: Union[str, Iterable[str]], fields: Optional[Iterable[str]] = None, match_all: bool = True) -> list[Applicant]:
+        """finds applicants by skill, certificate, field of study or language keywords
+
+        `terms` is a list of keywords or one comma-separated string such as "python, machine learning";
+        with match_all every term has to match (AND), otherwise any of them (OR). `fields` narrows the
+        search to some of KeywordIndex.FIELDS
+        """
+        if isinstance(terms, str):
+            terms = [term for term in terms.split(",") if term.strip()]
+        self.__ensure_indexes()
+        with self.__lock.reading():
+            return self.__store.get_many(self.__indexes.keywords.search(terms, fields, match_all))
+
+    def search_prefix(self, prefix: str, k: int = 10) -> list[Applicant]:
+        """up to k applicants whose full name starts with the prefix (case-insensitive), shortest names first"""
+        self.__ensure_indexes()
+        with self.__lock.reading():
+            return self.__store.get_many(self.__indexes.names.prefix(prefix, k))
+
+    def search_fuzzy(self, full_name: str, max_distance: int = 2, k: int = 10) -> list[Applicant]:
+        """up to k applicants whose name is within max_distance typos of full_name, closest first
+
+        every word of the query has to appear in the name, so names with an extra middle name match too
+        """
+        self.__ensure_indexes()
+        with self.__lock.reading():
+            return self.__store.get_many(self.__indexes.names.fuzzy(full_name, max_distance, k))
+
+    def born_between(self, start: Union[datetime.date, str, None], end: Union[datetime.date, str, None]) -> list[Applicant]:
+        """applicants born on or after `start` and on or before `end`; None leaves that side open"""
+        self.__ensure_indexes()
+        with self.__lock.reading():
+            return self.__store.get_many(self.__indexes.ranges.born_between(_as_date(start), _as_date(end)))
+
+    def education_at_least(self, lowest: EducationLevel, highest: Optional[EducationLevel] = None) -> list[Applicant]:
+        """applicants holding a degree of at least `lowest` (and at most `highest`) level"""
+        self.__ensure_indexes()
+        with self.__lock.reading():
+            return self.__store.get_many(self.__indexes.ranges.education_level_between(lowest.rank, highest.rank if highest else None))
+
+    def studied_during(self, start: Union[datetime.date, str, None], end: Union[datetime.date, str, None]) -> list[Applicant]:
+        """applicants with an education whose attendance overlaps the period"""
+        self.__ensure_indexes()
+        with self.__lock.reading():
+            return self.__store.get_many(self.__indexes.ranges.studied_during(_as_date(start), _as_date(end)))
+
+    def employed_during(self, start: Union[datetime.date, str, None], end: Union[datetime.date, str, None]) -> list[Applicant]:
+        """applicants with a job whose employment overlaps the period, e.g. employed_during("2020-01-01", "2020-12-31")"""
+        self.__ensure_indexes()
+        with self.__lock.reading():
+            return self.__store.get_many(self.__indexes.ranges.employed_during(_as_date(start), _as_date(end)))
+
+    def find(self, condition: Union["Query", "Predicate", Callable[[Applicant], bool]], limit: Optional[int] = None) -> list[Applicant]:
+        """applicants matching every predicate of the query, e.g.
+
+            find(Skill("python") & Speaks("german") & EducationAtLeast(EducationLevel.MASTER), limit=20)
+
+        the most selective index drives the lookup and the other predicates filter its candidates
+        """
+        from query import as_query
+        query = as_query(condition)
+        self.__ensure_indexes()
+        # a full scan holds the lock too, so it never sees a bulk change half applied or half undone
+        with self.__lock.reading():
+            return query.run(query.plan(self.__store, self.__indexes), self.__store, self.__indexes, limit)
+
+    def explain(self, condition: Union["Query", "Predicate", Callable[[Applicant], bool]]) -> str:
+        """the plan find() would use for the query"""
+        from query import as_query
+        query = as_query(condition)
+        self.__ensure_indexes()
+        with self.__lock.reading():
+            return query.explain(self.__store, self.__indexes)
+
+    def __select(self, condition: Union["Query", "Predicate", Callable[[Applicant], bool]]) -> list[tuple[int, Applicant]]:
+        # runs under the write lock; a pool whose indexes were never built is scanned once instead of indexed first
+        from query import as_query
+        query = as_query(condition)
+        indexes = self.__indexes if self.__indexed else None
+        return query.select(query.plan(self.__store, indexes), self.__store, indexes)
+
+    def __apply(self, changes: list[tuple[int, Applicant, Optional[Applicant]]]) -> None:
+        """writes (id, old, new) changes as a unit, a new of None removing the applicant; runs under the write lock
+
+        the store is written first, and when a write fails the ones before it are undone, so a bulk
+        change never stays half done. callers hold the store's atomic() block, so neither the writes
+        nor their undoing are committed halfway. the indexes and the listeners only follow once the
+        store holds all of it
+        """
+        done = 0
+        try:
+            for applicant_id, _, new in changes:
+                if new is None:
+                    self.__store.remove(applicant_id)
+                else:
+                    self.__store.replace(applicant_id, new)
+                done += 1
+        except BaseException:
+            for applicant_id, old, new in reversed(changes[:done]):
+                if new is None:
+                    self.__store.put(applicant_id, old)
+                else:
+                    self.__store.replace(applicant_id, old)
+            raise
+        for applicant_id, old, new in changes:
+            self.__unindex(applicant_id, old)
+            if new is not None:
+                self.__index(applicant_id, new)
+        if self.__listeners:
+            for applicant_id, old, new in changes:
+                self.__notify("update" if new is not None else "delete", applicant_id, old, new)
+
+    def delete_where(self, condition: Union["Query", "Predicate", Callable[[Applicant], bool]]) -> int:
+        """removes every applicant matching the condition and returns how many were removed
+
+        the condition is a Query, a Predicate or a function of the applicant, e.g.
+
+            delete_where(BornBetween(None, "1950-12-31") & Where(lambda applicant: not applicant.work_experience))
+
+        the matches are found in one index lookup or scan and removed in a single batch, so purging
+        a large share of the pool takes time linear in its size
+        """
+        with self.__lock.writing(), self.__store.atomic():
+            matches = self.__select(condition)
+            self.__apply([(applicant_id, applicant, None) for applicant_id, applicant in matches])
+        return len(matches)
+
+    def update_where(self, condition: Union["Query", "Predicate", Callable[[Applicant], bool]], update: Callable[[Applicant], Applicant]) -> int:
+        """replaces every applicant matching the condition with update(applicant) and returns how many were replaced
+
+        `update` returns the new record rather than changing the old one in place, since the old
+        one is still needed to take it out of the indexes
+        """
+        with self.__lock.writing(), self.__store.atomic():
+            matches = self.__select(condition)
+            # every replacement is made before anything is written, so an update() that fails leaves the pool as it was
+            self.__apply([(applicant_id, applicant, update(applicant)) for applicant_id, applicant in matches])
+        return len(matches)
 
     def update_application(self, full_name: str, new_applicant: Applicant) -> None:
-        for i in range(len(self.__applicants)):
-            if self.__applicants[i].personal_info.full_name.lower() == full_name.lower():
-                self.__applicants[i] = new_applicant
+        with self.__lock.writing(), self.__store.atomic():
+            matches = self.__store.find_by_name(full_name)
+            self.__apply([(applicant_id, old_applicant, new_applicant) for applicant_id, old_applicant in matches])
+            for _ in matches:
                 print("*****######******######*******######")
                 print("Application updated successfully!")
                 print("*****######******######*******######")
-            else:
-                print("*****######******######*******######")
-                print(f"Applicant with name '{full_name}' doesn't exist!")
-                print("*****######******######*******######")
+        if not matches:
+            print("*****######******######*******######")
+            print(f"Applicant with name '{full_name}' doesn't exist!")
+            print("*****######******######*******######")
 
     def delete_application(self, full_name: str) -> None:
-        for applicant in self.__applicants:
-            if applicant.personal_info.full_name.lower() == full_name.lower():
-                self.__applicants.remove(applicant)
+        with self.__lock.writing(), self.__store.atomic():
+            matches = self.__store.find_by_name(full_name)
+            self.__apply([(applicant_id, old_applicant, None) for applicant_id, old_applicant in matches])
+            for _ in matches:
                 print("*****######******######*******######")
                 print("Application deleted successfully!")
                 print("*****######******######*******######")
-            else: 
-                print("*****######******######*******######")
-                print(f"Applicant with name '{full_name}' doesn't exist!")
-                print("*****######******######*******######")
-                
-    def display_applications(self, applicants: list[Applicant]):
-        output = ""
-        if len(applicants) != 0:
-            i = 1  
-            for applicant in applicants:
-                output = "\n*****######******######*******######"
-                output += f"\n\n*****  Application {i}  *****\n\n"
-                output += "*****######******######*******######\n\n"
-                output += f"Full Name: {applicant.personal_info.full_name}\n"
-                output += f"Date of Birth: {applicant.personal_info.date_of_birth}\n"
-                output += f"Sex: {applicant.personal_info.sex}\n"
-                output += f"Home Address: {applicant.personal_info.home_address}\n"
-                output += f"Phone number (home): {applicant.personal_info.phone_number_home}\n"
-                output += f"Phone number (mobile): {applicant.personal_info.phone_number_mobile}\n"
-                output += f"Email Address: {applicant.personal_info.email_address}\n\n"
-                output += "-----  Languages:  -----\n\n"
-                for lang in applicant.languages:
-                    output += f"Language: {lang.language}\n"
-                    output += f"Read Ability: {lang.read_ability}\n"
-                    output += f"Write Ability: {lang.write_ability}\n"
-                    output += f"Speak Ability: {lang.speak_ability}\n\n"
-                output += "-----  Educational Background:  -----\n\n"
-                for edu in applicant.educational_background:
-                    output += f"University Name: {edu.university_name}\n"
-                    output += f"University Location: {edu.university_location}\n"
-                    output += f"University Country: {edu.university_country}\n"
-                    output += f"Attended from: {edu.attended_from}\n"
-                    output += f"Attended till: {edu.attended_to}\n"
-                    output += f"Certificates list: {', '.join(edu.certificates)}\n"
-                    output += f"Main field of study: {edu.main_field_of_study}\n\n"
-                output += "\n-----  Work Experience:  -----\n\n"
-                for experience in applicant.work_experience:
-                    output += f"Company: {experience.company_name}\n"
-                    output += f"Location: {experience.location}\n"
-                    output += f"Employed from: {experience.emp_from}\n"
-                    output += f"Employed till: {experience.emp_to}\n"
-                    output += f"Position: {experience.position}\n"
-                    output += f"Reason for leaving: {experience.reason_for_leaving}\n\n"
-                output += f"Major Skills: {applicant.major_skills}\n"
-                print(output)
-                i += 1
-        if not output:
+        if not matches:
             print("*****######******######*******######")
-            print("No applications found!")
+            print(f"Applicant with name '{full_name}' doesn't exist!")
             print("*****######******######*******######")
+                
+    def render_applications(self, applicants: Iterable[Applicant], offset: int = 0, limit: Optional[int] = None) -> Iterator[str]:
+        """yields the report one application at a time, skipping the first `offset` and stopping after `limit`"""
+        stop = None if limit is None else offset + limit
+        for i, applicant in enumerate(itertools.islice(applicants, offset, stop), offset + 1):
+            yield render_application(i, applicant)
+
+    def display_applications(self, applicants: Iterable[Applicant], offset: int = 0, limit: Optional[int] = None, sink: Optional[TextIO] = None) -> int:
+        """writes the report to `sink` (stdout by default) as it is rendered and returns the number of applications shown"""
+        sink = sink if sink is not None else sys.stdout
+        shown = 0
+        for chunk in self.render_applications(applicants, offset, limit):
+            sink.write(chunk)
+            shown += 1
+        if not shown:
+            sink.write("*****######******######*******######\n"
+                       "No applications found!\n"
+                       "*****######******######*******######\n")
+        return shown
+
+
+def render_application(number: int, applicant: Applicant) -> str:
+    """the report section of one application, headed with its number in the listing"""
+    output = ["\n*****######******######*******######",
+              f"\n\n*****  Application {number}  *****\n\n",
+              "*****######******######*******######\n\n",
+              f"Full Name: {applicant.personal_info.full_name}\n",
+              f"Date of Birth: {applicant.personal_info.date_of_birth}\n",
+              f"Sex: {applicant.personal_info.sex}\n",
+              f"Home Address: {applicant.personal_info.home_address}\n",
+              f"Phone number (home): {applicant.personal_info.phone_number_home}\n",
+              f"Phone number (mobile): {applicant.personal_info.phone_number_mobile}\n",
+              f"Email Address: {applicant.personal_info.email_address}\n\n",
+              "-----  Languages:  -----\n\n"]
+    for lang in applicant.languages:
+        output.append(f"Language: {lang.language}\n"
+                      f"Read Ability: {lang.read_ability}\n"
+                      f"Write Ability: {lang.write_ability}\n"
+                      f"Speak Ability: {lang.speak_ability}\n\n")
+    output.append("-----  Educational Background:  -----\n\n")
+    for edu in applicant.educational_background:
+        output.append(f"University Name: {edu.university_name}\n"
+                      f"University Location: {edu.university_location}\n"
+                      f"University Country: {edu.university_country}\n"
+                      f"Attended from: {edu.attended_from}\n"
+                      f"Attended till: {edu.attended_to}\n"
+                      f"Certificates list: {', '.join(edu.certificates)}\n"
+                      f"Main field of study: {edu.main_field_of_study}\n\n")
+    output.append("\n-----  Work Experience:  -----\n\n")
+    for experience in applicant.work_experience:
+        output.append(f"Company: {experience.company_name}\n"
+                      f"Location: {experience.location}\n"
+                      f"Employed from: {experience.emp_from}\n"
+                      f"Employed till: {experience.emp_to}\n"
+                      f"Position: {experience.position}\n"
+                      f"Reason for leaving: {experience.reason_for_leaving}\n\n")
+    output.append(f"Major Skills: {applicant.major_skills}\n\n")
+    return "".join(output)
 
 
-def main():
+def main(application: Optional[Application] = None):
 
-    application = Application()
+    application = application if application is not None else Application()
     error_counter = 0
 
     def select_education_level() -> EducationLevel:
@@ -630,7 +1189,7 @@ def main():
             application.delete_application(full_name)
 
         elif choice == "5":
-            application.display_applications(application.applicants)
+            application.display_applications(application)
 
         elif choice == "6":
             print("Bye!")
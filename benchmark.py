@@ -0,0 +1,675 @@
+import argparse
+import contextlib
+import datetime
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Optional
+
+from aggregates import Aggregates, EducationLevelCounts
+from app import Applicant, Application, Education, EducationLevel, Language, PersonalInfo, WorkExperience
+from dedup import DuplicateFinder
+from exporter import export_applicants
+from importer import gc_paused, import_applicants
+from interning import _unpooled
+from journal import JournaledStore
+from metrics import instrumented
+from query import BornBetween, Where
+from ranking import JobDescription, Ranker
+from records import build_applicant
+from sharding import ShardedApplication
+from snapshot import SnapshotStore, write_snapshot
+from synthetic import SyntheticApplicants
+
+
+def make_record(i: int) -> dict[str, Any]:
+    # every applicant gets a unique name and mobile number derived from its index
+    return {
+        "full_name": f"Applicant {i}",
+        "date_of_birth": f"{1960 + i % 40}-{1 + i % 12:02d}-{1 + i % 28:02d}",
+        "sex": "Female" if i % 2 else "Male",
+        "home_address": f"{i} Main Street",
+        "phone_number_home": f"{2000000000 + i:010d}",
+        "phone_number_mobile": f"{3000000000 + i:010d}",
+        "email_address": f"applicant{i}@example.com",
+        "languages": [{"language": "English", "read_ability": "excellent", "write_ability": "good", "speak_ability": "excellent"}],
+        "education": [{"education_level": "BACHELOR", "university_name": "State University", "university_location": "Springfield",
+                       "university_country": "USA", "attended_from": "2010-09-01", "attended_to": "2014-06-01",
+                       "certificates": "AWS,Scrum", "main_field_of_study": "Computer Science"}],
+        "work_experience": [{"company_name": "Acme", "location": "Springfield", "emp_from": "2014-07-01",
+                             "emp_to": "2019-12-31", "position": "Developer", "reason_for_leaving": "Relocation"}],
+        "major_skills": "python, sql",
+    }
+
+
+def make_applicant(i: int) -> Applicant:
+    return build_applicant(make_record(i))
+
+
+def bench_aggregates(sizes: list[int], sample: int) -> None:
+    """education level counts from a full pass against the materialized view, and what the views add to an insert"""
+    print(f"{'pool size':>12} {'full pass ms':>13} {'view read us':>13} {'add us':>8} {'add+views us':>13}")
+    for size in sizes:
+        application = Application()
+        for i in range(size):
+            application.add_applicant(make_applicant(i), verbose=False)
+        start = time.perf_counter()
+        counts: dict = {}
+        for applicant in application:
+            level = EducationLevelCounts.highest_level(applicant)
+            counts[level] = counts.get(level, 0) + 1
+        full_pass = time.perf_counter() - start
+        batch = [make_applicant(size + n) for n in range(sample)]
+        start = time.perf_counter()
+        for applicant in batch:
+            application.add_applicant(applicant, verbose=False)
+        plain = time.perf_counter() - start
+        aggregates = Aggregates(application)
+        start = time.perf_counter()
+        for _ in range(sample):
+            aggregates.education_levels.counts()
+        read = time.perf_counter() - start
+        batch = [make_applicant(size + sample + n) for n in range(sample)]
+        start = time.perf_counter()
+        for applicant in batch:
+            application.add_applicant(applicant, verbose=False)
+        with_views = time.perf_counter() - start
+        print(f"{size:>12,} {full_pass * 1e3:>13,.1f} {read / sample * 1e6:>13,.2f} {plain / sample * 1e6:>8,.1f} {with_views / sample * 1e6:>13,.1f}")
+
+
+def bench_add_applicant(sizes: list[int], sample: int) -> None:
+    """grows one pool through every size and times `sample` inserts at each one, with the cyclic collector paused"""
+    application = Application()
+    print(f"{'pool size':>12} {'ns/insert':>12}")
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        rows = []
+        i = 0
+        for size in sizes:
+            while len(application) < size - sample:
+                application.add_applicant(make_applicant(i))
+                i += 1
+            batch = [make_applicant(i + n) for n in range(sample)]
+            i += sample
+            # a collection falling in the timed inserts would scan the whole pool and dwarf them
+            gc.collect()
+            with gc_paused():
+                start = time.perf_counter()
+                for applicant in batch:
+                    application.add_applicant(applicant)
+                elapsed = time.perf_counter() - start
+            rows.append((size, elapsed / sample * 1e9))
+    for size, ns in rows:
+        print(f"{size:>12,} {ns:>12,.0f}")
+
+
+def bench_search_application(sizes: list[int], sample: int) -> None:
+    """times name lookups against pools of each size"""
+    print(f"{'pool size':>12} {'ns/search':>12}")
+    for size in sizes:
+        application = Application()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for i in range(size):
+                application.add_applicant(make_applicant(i))
+        names = [f"APPLICANT {i * size // sample}" for i in range(sample)]
+        start = time.perf_counter()
+        for name in names:
+            application.search_application(name)
+        elapsed = time.perf_counter() - start
+        print(f"{size:>12,} {elapsed / sample * 1e9:>12,.0f}")
+
+
+def bench_parallel_import(sizes: list[int], sample: int) -> None:
+    """imports a JSONL file of each size with 1, 2, 4, ... workers up to the core count"""
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({1, cores} | {2 ** n for n in range(cores.bit_length()) if 2 ** n <= cores})
+    print(f"{'records':>12} {'workers':>8} {'records/s':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = os.path.join(tmp, f"{size}.jsonl")
+            with open(path, "w", encoding="utf-8") as stream:
+                for i in range(size):
+                    stream.write(json.dumps(make_record(i)) + "\n")
+            for workers in worker_counts:
+                start = time.perf_counter()
+                import_applicants(Application(), path, workers=workers, chunk_size=sample)
+                elapsed = time.perf_counter() - start
+                print(f"{size:>12,} {workers:>8} {size / elapsed:>12,.0f}")
+
+
+def bench_export(sizes: list[int], sample: int) -> None:
+    """streams the pool out as JSONL, CSV and gzipped JSONL in chunks of `sample`, with the peak memory it took"""
+    generator = SyntheticApplicants(SUITE_SEED)
+    print(f"{'pool size':>12} {'target':>12} {'records/s':>10} {'MB':>8} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            application = Application()
+            for applicant in generator.applicants(size):
+                application.add_applicant(applicant, verbose=False)
+            for name in ("export.jsonl", "export.csv", "export.jsonl.gz"):
+                path = os.path.join(tmp, name)
+                start = time.perf_counter()
+                export_applicants(application, path, chunk_size=sample)
+                elapsed = time.perf_counter() - start
+                # a second run for the memory, since tracing allocations slows the export down several times
+                tracemalloc.start()
+                export_applicants(application, path, chunk_size=sample)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print(f"{size:>12,} {name[len('export'):]:>12} {size / elapsed:>10,.0f} {os.path.getsize(path) / 1e6:>8,.1f} {peak / 1e6:>8,.1f}")
+
+
+def bench_display(sizes: list[int], sample: int) -> None:
+    """time to the first page of `sample` applications and to the full report, written to /dev/null"""
+    print(f"{'pool size':>12} {'first page ms':>14} {'full report s':>14}")
+    for size in sizes:
+        application = Application()
+        for i in range(size):
+            application.add_applicant(make_applicant(i), verbose=False)
+        with open(os.devnull, "w") as devnull:
+            start = time.perf_counter()
+            application.display_applications(application, limit=sample, sink=devnull)
+            first_page = time.perf_counter() - start
+            start = time.perf_counter()
+            application.display_applications(application, sink=devnull)
+            full = time.perf_counter() - start
+        print(f"{size:>12,} {first_page * 1e3:>14,.1f} {full:>14,.2f}")
+
+
+def bench_analytics(sizes: list[int], sample: int) -> None:
+    """median age of master's graduates and older: a property loop against a columnar snapshot (needs NumPy)"""
+    from analytics import ColumnarSnapshot
+    rank = EducationLevel.MASTER.rank
+    generator = SyntheticApplicants(SUITE_SEED)
+    print(f"{'pool size':>12} {'loop ms':>9} {'build ms':>9} {'query ms':>9} {'refresh ms':>11}")
+    for size in sizes:
+        application = Application()
+        for applicant in generator.applicants(size):
+            application.add_applicant(applicant, verbose=False)
+        today = datetime.date.today()
+        start = time.perf_counter()
+        ages = sorted(today.year - applicant.personal_info.date_of_birth.year for applicant in application
+                      if any(edu.education_level.rank >= rank for edu in applicant.educational_background))
+        statistics.median(ages) if ages else None
+        loop = time.perf_counter() - start
+        start = time.perf_counter()
+        snapshot = ColumnarSnapshot(application, columns=("age", "education_level"))
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(sample):
+            snapshot.filter(snapshot["education_level"] >= rank).percentiles("age", 50)
+        query = (time.perf_counter() - start) / sample
+        application.add_applicant(generator.applicant(size), verbose=False)
+        start = time.perf_counter()
+        snapshot.refresh()
+        refresh = time.perf_counter() - start
+        snapshot.close()
+        print(f"{size:>12,} {loop * 1e3:>9,.1f} {build * 1e3:>9,.1f} {query * 1e3:>9,.2f} {refresh * 1e3:>11,.1f}")
+
+
+def bench_concurrency(sizes: list[int], sample: int) -> None:
+    """stress test: writer threads add and delete while reader threads search and scan the same pool
+
+    every thread runs `sample` operations; afterwards the indexes have to agree with a full scan, and
+    any exception raised in a thread fails the run
+    """
+    readers, writers = 4, 2
+    print(f"{'pool size':>12} {'threads':>8} {'ops/s':>12} {'pool after':>12}")
+    for size in sizes:
+        application = Application()
+        for i in range(size):
+            application.add_applicant(make_applicant(i), verbose=False)
+        errors: list[BaseException] = []
+        barrier = threading.Barrier(readers + writers)
+
+        def write(worker: int) -> None:
+            barrier.wait()
+            # each writer adds fresh applicants and deletes the ones it added, so the pool ends at its initial size
+            for n in range(sample):
+                i = size + worker * sample + n
+                application.add_applicant(make_applicant(i), verbose=False)
+                if n % 2:
+                    application.delete_application(f"Applicant {i - 1}")
+                    application.delete_application(f"Applicant {i}")
+
+        def read(worker: int) -> None:
+            barrier.wait()
+            for n in range(sample):
+                kind = n % 4
+                if kind == 0:
+                    application.search_application(f"applicant {(worker + n) % size}")
+                elif kind == 1:
+                    application.search_keywords("python, sql")
+                elif kind == 2:
+                    application.search_prefix(f"applicant {n % 10}")
+                else:
+                    for _ in zip(range(sample), application):
+                        pass
+
+        def guarded(target: Callable[[int], None], worker: int) -> None:
+            try:
+                target(worker)
+            except BaseException as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=guarded, args=(write, n)) for n in range(writers)]
+        threads += [threading.Thread(target=guarded, args=(read, n)) for n in range(readers)]
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+        if errors:
+            raise errors[0]
+        scanned = sum(1 for _ in application)
+        indexed = len(application.search_keywords("python"))
+        if not len(application) == scanned == indexed == size:
+            raise AssertionError(f"pool of {size} ended with len {len(application)}, {scanned} scanned, {indexed} indexed")
+        print(f"{size:>12,} {len(threads):>8} {len(threads) * sample / elapsed:>12,.0f} {len(application):>12,}")
+
+
+def bench_purge(sizes: list[int], sample: int) -> None:
+    """deletes a tenth of each pool in one delete_where, through a full scan and through the birth date index"""
+    print(f"{'pool size':>12} {'deleted':>10} {'scan s':>8} {'index s':>8}")
+    for size in sizes:
+        timings = []
+        for condition in (Where(lambda applicant: applicant.personal_info.date_of_birth.year < 1964), BornBetween(None, "1963-12-31")):
+            application = Application()
+            for i in range(size):
+                application.add_applicant(make_applicant(i), verbose=False)
+            # builds the indexes and folds their write buffers, which would otherwise be charged to the purge
+            application.explain(BornBetween(None, "1963-12-31"))
+            start = time.perf_counter()
+            deleted = application.delete_where(condition)
+            timings.append(time.perf_counter() - start)
+        print(f"{size:>12,} {deleted:>10,} {timings[0]:>8.2f} {timings[1]:>8.2f}")
+
+
+def bench_metrics(sizes: list[int], sample: int) -> None:
+    """search latency with instrumentation disabled, enabled, and enabled with profiling and memory tracing"""
+    print(f"{'pool size':>12} {'disabled us':>12} {'enabled us':>12} {'profiled us':>12}")
+    for size in sizes:
+        application = Application()
+        for i in range(size):
+            application.add_applicant(make_applicant(i), verbose=False)
+        names = [make_applicant(i).personal_info.full_name for i in range(0, size, max(1, size // sample))]
+
+        def search() -> float:
+            start = time.perf_counter()
+            for name in names:
+                application.search_application(name)
+            return (time.perf_counter() - start) / len(names) * 1e6
+        disabled = search()
+        with instrumented():
+            enabled = search()
+        with instrumented(profile=True, trace_memory=True):
+            profiled = search()
+        print(f"{size:>12,} {disabled:>12.2f} {enabled:>12.2f} {profiled:>12.2f}")
+
+
+def bench_dedup(sizes: list[int], sample: int) -> None:
+    """duplicate detection over synthetic pools with `sample` re-applications planted in each
+
+    half of the re-applicants reorder and recapitalize their name but keep their phones, the other
+    half only share an email address, spelled with different case and a +tag
+    """
+    generator = SyntheticApplicants(SUITE_SEED)
+    print(f"{'pool size':>12} {'seconds':>8} {'pairs':>10} {'clusters':>9} {'recall':>7}")
+    for size in sizes:
+        rng = random.Random(SUITE_SEED + size)
+        pool = list(enumerate(generator.applicants(size)))
+        planted = rng.sample(range(size), min(sample, size))
+        for n, original in enumerate(planted):
+            record = generator.record(original)
+            if n % 2:
+                record["full_name"] = " ".join(reversed(record["full_name"].split())).upper()
+                record["email_address"] = f"reapplied{n}@example.org"
+            else:
+                local, domain = record["email_address"].split("@")
+                record["email_address"] = f"{local.upper()}+apply@{domain}"
+                record["phone_number_home"] = str(6_000_000_000 + n)
+                record["phone_number_mobile"] = str(7_000_000_000 + n)
+                record["date_of_birth"] = "1950-01-01"
+                record["full_name"] = f"Someone Else{n}"
+            pool.append((size + n, build_applicant(record)))
+        start = time.perf_counter()
+        report = DuplicateFinder().find(pool)
+        elapsed = time.perf_counter() - start
+        clustered = {applicant_id for cluster in report.clusters for applicant_id in cluster.ids}
+        recall = sum(original in clustered for original in planted) / max(1, len(planted))
+        print(f"{size:>12,} {elapsed:>8.2f} {report.candidate_pairs:>10,} {len(report.clusters):>9,} {recall:>7.1%}")
+
+
+def directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def bench_ranking(sizes: list[int], sample: int) -> None:
+    """top 10 for a job description: scoring and sorting every applicant against the heap over cached features"""
+    generator = SyntheticApplicants(SUITE_SEED, unique_names=True)
+    job = JobDescription("backend developer with python, sql and docker; kubernetes is a plus", languages=["english"])
+    print(f"{'pool size':>12} {'sort ms':>9} {'cache ms':>9} {'top-10 ms':>10} {'update us':>10}")
+    for size in sizes:
+        application = Application()
+        for applicant in generator.applicants(size):
+            application.add_applicant(applicant, verbose=False)
+        start = time.perf_counter()
+        ranker = Ranker(application)
+        cache = time.perf_counter() - start
+        start = time.perf_counter()
+        sorted(((ranker.score(applicant, job), applicant) for applicant in application), key=lambda pair: pair[0], reverse=True)[:10]
+        full_sort = time.perf_counter() - start
+        start = time.perf_counter()
+        ranker.top(job, 10)
+        top = time.perf_counter() - start
+        replacements = [generator.applicant(size + n) for n in range(min(sample, size))]
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            for n, replacement in enumerate(replacements):
+                application.update_application(generator.full_name(n), replacement)
+            update = (time.perf_counter() - start) / max(1, len(replacements))
+        ranker.close()
+        print(f"{size:>12,} {full_sort * 1e3:>9,.1f} {cache * 1e3:>9,.1f} {top * 1e3:>10,.1f} {update * 1e6:>10,.1f}")
+
+
+def bench_recovery(sizes: list[int], sample: int) -> None:
+    """restart time of a journaled pool: replaying the whole journal against loading a snapshot plus a `sample`-entry tail"""
+    print(f"{'pool size':>12} {'layout':>16} {'on disk MB':>11} {'recovery s':>11}")
+    for size in sizes:
+        for compacted in (False, True):
+            with tempfile.TemporaryDirectory() as tmp:
+                application = Application(JournaledStore(tmp, compact_after=size + sample + 1))
+                with application.batch():
+                    for i in range(size):
+                        application.add_applicant(make_applicant(i), verbose=False)
+                if compacted:
+                    application.store.compact()
+                    application.store.wait_for_compaction()
+                with application.batch():
+                    for i in range(size, size + sample):
+                        application.add_applicant(make_applicant(i), verbose=False)
+                application.close()
+                gc.collect()
+                start = time.perf_counter()
+                recovered = JournaledStore(tmp)
+                elapsed = time.perf_counter() - start
+                assert len(recovered) == size + sample
+                recovered.close()
+                layout = "snapshot + tail" if compacted else "journal only"
+                print(f"{size:>12,} {layout:>16} {directory_size(tmp) / 1e6:>11,.1f} {elapsed:>11,.2f}")
+
+
+def bench_sharding(sizes: list[int], sample: int) -> None:
+    """scans on one Application against the same pool sharded across one process per core (at least two)"""
+    shards = max(2, os.cpu_count() or 1)
+    generator = SyntheticApplicants(SUITE_SEED)
+    print(f"{'pool size':>12} {'pool':>10} {'load s':>8} {'keywords ms':>12} {'fuzzy ms':>9} {'report s':>9}")
+    for size in sizes:
+        for label, application in (("single", Application()), (f"{shards} shards", ShardedApplication(shards))):
+            try:
+                start = time.perf_counter()
+                with application.batch():
+                    for applicant in generator.applicants(size):
+                        application.add_applicant(applicant, verbose=False)
+                load = time.perf_counter() - start
+                application.search_keywords("python")
+                start = time.perf_counter()
+                application.search_keywords("python, sql")
+                keywords = time.perf_counter() - start
+                start = time.perf_counter()
+                application.search_fuzzy(generator.full_name(size // 2), 2, 10)
+                fuzzy = time.perf_counter() - start
+                with open(os.devnull, "w") as devnull:
+                    start = time.perf_counter()
+                    application.display_applications(application, sink=devnull)
+                    report = time.perf_counter() - start
+            finally:
+                application.close()
+            print(f"{size:>12,} {label:>10} {load:>8.2f} {keywords * 1e3:>12,.1f} {fuzzy * 1e3:>9,.1f} {report:>9.2f}")
+
+
+def bench_snapshot(sizes: list[int], sample: int) -> None:
+    """opening a memory-mapped snapshot: time to open, to the first name search and first page, and to decode everything"""
+    print(f"{'pool size':>12} {'file MB':>8} {'open ms':>8} {'search ms':>10} {'page ms':>8} {'full scan s':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = os.path.join(tmp, f"{size}.snapshot")
+            write_snapshot(path, ((i, make_applicant(i)) for i in range(size)))
+            gc.collect()
+            start = time.perf_counter()
+            application = Application(SnapshotStore(path))
+            opened = time.perf_counter() - start
+            start = time.perf_counter()
+            application.search_application(f"applicant {size // 2}")
+            searched = time.perf_counter() - start
+            with open(os.devnull, "w") as devnull:
+                start = time.perf_counter()
+                application.display_applications(application, limit=sample, sink=devnull)
+                page = time.perf_counter() - start
+            start = time.perf_counter()
+            for _ in application:
+                pass
+            scanned = time.perf_counter() - start
+            application.close()
+            print(f"{size:>12,} {os.path.getsize(path) / 1e6:>8,.1f} {opened * 1e3:>8,.2f} {searched * 1e3:>10,.2f} {page * 1e3:>8,.1f} {scanned:>12,.2f}")
+
+
+SUITE_SEED = 0
+# the suite's metrics and whether a larger value is better, for comparing runs
+SUITE_METRICS = {"ops_per_s": True, "p50_us": False, "p99_us": False, "pool_mb": False}
+
+
+def latency_summary(latencies: list[float]) -> dict[str, float]:
+    """throughput and latency percentiles (in microseconds) of one operation's timings, given in seconds"""
+    if len(latencies) < 2:
+        latencies = latencies * 2 or [0.0, 0.0]
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    total = sum(latencies)
+    return {
+        "ops": len(latencies),
+        "ops_per_s": len(latencies) / total if total else 0.0,
+        "p50_us": cuts[49] * 1e6,
+        "p90_us": cuts[89] * 1e6,
+        "p99_us": cuts[98] * 1e6,
+        "max_us": max(latencies) * 1e6,
+    }
+
+
+def timed(operation: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    operation()
+    return time.perf_counter() - start
+
+
+def bench_suite(sizes: list[int], sample: int) -> dict[str, Any]:
+    """add, search, update, delete and display against synthetic pools of each size
+
+    every add that grows the pool is timed, with the cyclic collector paused so that its full
+    collections don't pass for slow adds; the other operations are timed `sample` times on
+    randomly chosen applicants. the pool is built a second time under tracemalloc for its peak
+    memory, so that tracing doesn't slow the timed run
+    """
+    generator = SyntheticApplicants(SUITE_SEED, unique_names=True)
+    results: dict[str, Any] = {}
+    print(f"{'pool size':>12} {'operation':>10} {'ops/s':>12} {'p50 us':>10} {'p90 us':>10} {'p99 us':>10}")
+    for size in sizes:
+        rng = random.Random(SUITE_SEED + size)
+        application = Application()
+        latencies: dict[str, list[float]] = {"add": []}
+        gc.collect()
+        with gc_paused():
+            for i in range(size):
+                applicant = generator.applicant(i)
+                latencies["add"].append(timed(lambda: application.add_applicant(applicant, verbose=False)))
+        targets = rng.sample(range(size), min(sample, size))
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            latencies["search"] = [timed(lambda: application.search_application(generator.full_name(i))) for i in targets]
+            # each target is replaced by a fresh applicant under its own name, then deleted
+            replacements = {i: build_applicant({**generator.record(size + i), "full_name": generator.full_name(i)}) for i in targets}
+            latencies["update"] = [timed(lambda: application.update_application(generator.full_name(i), replacements[i])) for i in targets]
+            latencies["delete"] = [timed(lambda: application.delete_application(generator.full_name(i))) for i in targets]
+            pages = max(1, min(sample, 100))
+            latencies["display"] = [timed(lambda: application.display_applications(application, limit=50, sink=devnull)) for _ in range(pages)]
+        del application
+        gc.collect()
+        tracemalloc.start()
+        traced = Application()
+        for i in range(size):
+            traced.add_applicant(generator.applicant(i), verbose=False)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del traced
+        gc.collect()
+        results[str(size)] = {operation: latency_summary(timings) for operation, timings in latencies.items()}
+        results[str(size)]["memory"] = {"pool_mb": peak / 1e6}
+        for operation, summary in results[str(size)].items():
+            if operation != "memory":
+                print(f"{size:>12,} {operation:>10} {summary['ops_per_s']:>12,.0f} {summary['p50_us']:>10,.1f} "
+                      f"{summary['p90_us']:>10,.1f} {summary['p99_us']:>10,.1f}")
+        print(f"{size:>12,} {'memory':>10} {peak / 1e6:>11,.1f}M peak while building the pool")
+    return results
+
+
+def compare_runs(baseline: dict[str, Any], current: dict[str, Any], threshold: float) -> list[str]:
+    """lines describing every metric that got worse than the baseline by more than `threshold` (a fraction)"""
+    regressions = []
+    for name, sizes in current.get("results", {}).items():
+        for size, operations in sizes.items():
+            for operation, metrics in operations.items():
+                before = baseline.get("results", {}).get(name, {}).get(size, {}).get(operation, {})
+                for metric, higher_is_better in SUITE_METRICS.items():
+                    if metric not in metrics or not before.get(metric):
+                        continue
+                    change = metrics[metric] / before[metric] - 1
+                    if (-change if higher_is_better else change) > threshold:
+                        regressions.append(f"{name} {int(size):,} {operation} {metric}: {before[metric]:,.1f} -> {metrics[metric]:,.1f} ({change:+.0%})")
+    return regressions
+
+
+RECORD_TYPES = (PersonalInfo, Language, Education, WorkExperience)
+_DICT_LAYOUTS: dict[type, type] = {}
+
+
+def dict_layout(record: Any) -> Any:
+    """copies a slotted record into an equivalent object that keeps its fields in a per-instance __dict__"""
+    cls = type(record)
+    if cls not in _DICT_LAYOUTS:
+        _DICT_LAYOUTS[cls] = type(f"Dict{cls.__name__}", (), {})
+    copy = _DICT_LAYOUTS[cls]()
+    for name in cls.__slots__:
+        attribute = f"_{cls.__name__}{name}"
+        value = getattr(record, attribute)
+        if isinstance(value, list) and value and isinstance(value[0], RECORD_TYPES):
+            value = [dict_layout(item) for item in value]
+        elif isinstance(value, RECORD_TYPES):
+            value = dict_layout(value)
+        setattr(copy, attribute, value)
+    return copy
+
+
+def bytes_per_applicant(build: Callable[[int], Any], count: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        pool = [build(i) for i in range(count)]
+        gc.collect()
+        used = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del pool
+    return used / count
+
+
+def bench_interning(sizes: list[int], sample: int) -> None:
+    """bytes per applicant decoded from JSON with the repeated field values pooled, and without"""
+    generator = SyntheticApplicants(SUITE_SEED)
+    print(f"{'applicants':>12} {'unpooled B':>12} {'pooled B':>12} {'saved':>7}")
+    for size in sizes:
+        lines = [json.dumps(record) for record in generator.records(size)]
+        with _unpooled():
+            before = bytes_per_applicant(lambda i: build_applicant(json.loads(lines[i])), size)
+        after = bytes_per_applicant(lambda i: build_applicant(json.loads(lines[i])), size)
+        print(f"{size:>12,} {before:>12,.0f} {after:>12,.0f} {1 - after / before:>7.0%}")
+
+
+def bench_memory(sizes: list[int], sample: int) -> None:
+    """bytes per applicant for the slotted records against the same data in __dict__-based records"""
+    print(f"{'applicants':>12} {'__dict__ B':>12} {'__slots__ B':>12} {'saved':>7}")
+    for size in sizes:
+        before = bytes_per_applicant(lambda i: dict_layout(make_applicant(i)), size)
+        after = bytes_per_applicant(make_applicant, size)
+        print(f"{size:>12,} {before:>12,.0f} {after:>12,.0f} {1 - after / before:>7.0%}")
+
+
+BENCHMARKS = {
+    "add": bench_add_applicant,
+    "aggregates": bench_aggregates,
+    "analytics": bench_analytics,
+    "search": bench_search_application,
+    "import": bench_parallel_import,
+    "interning": bench_interning,
+    "memory": bench_memory,
+    "metrics": bench_metrics,
+    "dedup": bench_dedup,
+    "display": bench_display,
+    "export": bench_export,
+    "concurrency": bench_concurrency,
+    "purge": bench_purge,
+    "ranking": bench_ranking,
+    "recovery": bench_recovery,
+    "sharding": bench_sharding,
+    "snapshot": bench_snapshot,
+    "suite": bench_suite,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the job application manager")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--sample", type=int, default=1_000, help="operations timed at each pool size")
+    parser.add_argument("--json", metavar="PATH", help="write the results of the benchmarks that report them (suite) as JSON")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON from an earlier run; exits with status 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change counted as a regression (default: 0.10)")
+    parser.add_argument("benchmarks", nargs="*", metavar="benchmark",
+                        help=f"benchmarks to run (default: all of {', '.join(sorted(BENCHMARKS))})")
+    args = parser.parse_args()
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark '{name}'")
+    report: dict[str, Any] = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "seed": SUITE_SEED,
+        "sample": args.sample,
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": {},
+    }
+    for name in args.benchmarks or sorted(BENCHMARKS):
+        print(f"\n== {name} ==")
+        results: Optional[dict[str, Any]] = BENCHMARKS[name](args.sizes, args.sample)
+        if results is not None:
+            report["results"][name] = results
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as stream:
+            json.dump(report, stream, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as stream:
+            regressions = compare_runs(json.load(stream), report, args.threshold)
+        print(f"\n== compared with {args.compare} ==")
+        print("\n".join(regressions) if regressions else f"no regressions beyond {args.threshold:.0%}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
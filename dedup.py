@@ -0,0 +1,254 @@
+import argparse
+import itertools
+import re
+import unicodedata
+from typing import Iterable, Iterator
+
+from app import Applicant, Application
+from importer import import_applicants
+from indexes import edit_distance
+from storage import SQLiteStore
+
+
+# how much each kind of evidence adds to a pair's score; a pair at or above the finder's threshold
+# (0.5 by default) is a likely duplicate. a shared email is enough on its own, an identical name needs
+# one more signal, since common names repeat. a shared phone only counts alongside a similar name or the
+# same email, since households share home phones: twins with one phone and birth date aren't one person
+WEIGHTS = {"email": 0.5, "phone": 0.35, "name": 0.4, "date_of_birth": 0.15}
+# names less similar than this contribute nothing; above it the name weight is scaled by the similarity
+MIN_NAME_SIMILARITY = 0.8
+NAME_TOKEN = re.compile(r"[^\W\d_]+")
+# mail providers that ignore dots in the local part, and the domains that are aliases of another
+DOTLESS_DOMAINS = frozenset(("gmail.com", "googlemail.com"))
+DOMAIN_ALIASES = {"googlemail.com": "gmail.com"}
+
+
+def normalize_name(name: str) -> str:
+    """casefolded name tokens without accents or punctuation, sorted so that word order doesn't matter"""
+    decomposed = unicodedata.normalize("NFKD", name.casefold())
+    letters = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(sorted(NAME_TOKEN.findall(letters)))
+
+
+def normalize_email(email: str) -> str:
+    """casefolded address without a +tag, and without dots for providers that ignore them"""
+    local, _, domain = email.strip().casefold().rpartition("@")
+    local = local.split("+", 1)[0]
+    if domain in DOTLESS_DOMAINS:
+        local = local.replace(".", "")
+    return f"{local}@{DOMAIN_ALIASES.get(domain, domain)}"
+
+
+def name_similarity(a: str, b: str) -> float:
+    """1.0 for identical normalized names, falling with the edits needed to turn one into the other"""
+    longest = max(len(a), len(b))
+    if not longest:
+        return 0.0
+    limit = int(longest * (1 - MIN_NAME_SIMILARITY))
+    distance = edit_distance(a, b, limit)
+    return 0.0 if distance > limit else 1 - distance / longest
+
+
+class UnionFind:
+    def __init__(self, size: int) -> None:
+        self.__parent = list(range(size))
+        self.__size = [1] * size
+
+    def find(self, item: int) -> int:
+        parent = self.__parent
+        while parent[item] != item:
+            # path halving keeps the trees flat without recursion
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a: int, b: int) -> None:
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        if self.__size[a] < self.__size[b]:
+            a, b = b, a
+        self.__parent[b] = a
+        self.__size[a] += self.__size[b]
+
+
+class DuplicatePair:
+    __slots__ = ("first", "second", "score", "reasons")
+
+    def __init__(self, first: int, second: int, score: float, reasons: tuple[str, ...]) -> None:
+        self.first = first
+        self.second = second
+        self.score = score
+        self.reasons = reasons
+
+    def __repr__(self) -> str:
+        return f"DuplicatePair({self.first}, {self.second}, score={self.score:.2f}, reasons={self.reasons})"
+
+
+class DuplicateCluster:
+    """applicant ids that are likely the same person, linked by the pairs that scored above the threshold"""
+    def __init__(self, ids: list[int], pairs: list[DuplicatePair]) -> None:
+        self.ids = ids
+        self.pairs = pairs
+
+    @property
+    def score(self) -> float:
+        return max(pair.score for pair in self.pairs)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __repr__(self) -> str:
+        return f"DuplicateCluster(ids={self.ids}, score={self.score:.2f})"
+
+
+class DedupReport:
+    def __init__(self) -> None:
+        self.clusters: list[DuplicateCluster] = []
+        self.applicants = 0
+        self.candidate_pairs = 0
+        self.skipped_blocks = 0
+
+    def __repr__(self) -> str:
+        return (f"DedupReport(clusters={len(self.clusters)}, applicants={self.applicants}, "
+                f"candidate_pairs={self.candidate_pairs}, skipped_blocks={self.skipped_blocks})")
+
+
+class DuplicateFinder:
+    """finds applicants that are probably the same person despite differing in their identity
+
+    comparing every pair of a large pool is out of the question, so applicants are only compared
+    within blocks that share a key: the normalized email, either phone number, the normalized name,
+    or the birth date together with the name's initials (which catches typos in the name). blocks
+    larger than `max_block` are skipped, as a key that many applicants share says little about any
+    two of them. candidate pairs are scored with WEIGHTS, and the pairs at or above `threshold` are
+    joined into clusters with union-find
+    """
+    def __init__(self, threshold: float = 0.5, max_block: int = 50) -> None:
+        self.__threshold = threshold
+        self.__max_block = max_block
+
+    def find(self, applicants: Iterable[tuple[int, Applicant]]) -> DedupReport:
+        """the duplicate clusters among (id, applicant) pairs, such as an ApplicantStore's"""
+        report = DedupReport()
+        ids: list[int] = []
+        names: list[str] = []
+        emails: list[str] = []
+        phones: list[tuple[int, int]] = []
+        births: list[int] = []
+        for applicant_id, applicant in applicants:
+            info = applicant.personal_info
+            ids.append(applicant_id)
+            names.append(normalize_name(info.full_name))
+            emails.append(normalize_email(info.email_address))
+            phones.append((info.phone_number_mobile, info.phone_number_home))
+            births.append(info.date_of_birth.toordinal())
+        report.applicants = len(ids)
+        candidates = self.__candidates(report, names, emails, phones, births)
+        report.candidate_pairs = len(candidates)
+        size = len(ids)
+        links = UnionFind(size)
+        # each match is kept with the position of its first applicant, to find its cluster by
+        matches: list[tuple[int, DuplicatePair]] = []
+        for pair in sorted(candidates):
+            a, b = divmod(pair, size)
+            score, reasons = self.__score(names[a], names[b], emails[a] == emails[b], set(phones[a]) & set(phones[b]), births[a] == births[b])
+            if score >= self.__threshold:
+                matches.append((a, DuplicatePair(ids[a], ids[b], score, reasons)))
+                links.union(a, b)
+        members: dict[int, list[DuplicatePair]] = {}
+        for position, pair in matches:
+            members.setdefault(links.find(position), []).append(pair)
+        for pairs in members.values():
+            cluster_ids = sorted({applicant_id for pair in pairs for applicant_id in (pair.first, pair.second)})
+            report.clusters.append(DuplicateCluster(cluster_ids, pairs))
+        report.clusters.sort(key=lambda cluster: (-cluster.score, cluster.ids))
+        return report
+
+    def __candidates(self, report: DedupReport, names: list[str], emails: list[str], phones: list[tuple[int, int]], births: list[int]) -> set[int]:
+        # each pair of positions a < b is encoded as a * size + b, which keeps a million-entry set compact
+        size = len(names)
+        keyings = (
+            zip(emails, itertools.count()),
+            ((phone, position) for position, pair in enumerate(phones) for phone in set(pair)),
+            zip(names, itertools.count()),
+            ((f"{births[position]}:{''.join(sorted(token[0] for token in name.split()))}", position) for position, name in enumerate(names)),
+        )
+        candidates: set[int] = set()
+        for keys in keyings:
+            for block in self.__blocks(keys):
+                if len(block) > self.__max_block:
+                    report.skipped_blocks += 1
+                    continue
+                candidates.update(a * size + b for a, b in itertools.combinations(block, 2))
+        return candidates
+
+    @staticmethod
+    def __blocks(keys: Iterator[tuple[object, int]]) -> Iterable[list[int]]:
+        # almost every key belongs to a single applicant, so a list is only made for the keys seen twice
+        first: dict[object, int] = {}
+        shared: dict[object, list[int]] = {}
+        for key, position in keys:
+            seen = first.setdefault(key, position)
+            if seen != position:
+                block = shared.get(key)
+                if block is None:
+                    shared[key] = [seen, position]
+                else:
+                    block.append(position)
+        return shared.values()
+
+    @staticmethod
+    def __score(name_a: str, name_b: str, same_email: bool, shared_phones: set[int], same_birth: bool) -> tuple[float, tuple[str, ...]]:
+        score = 0.0
+        reasons = []
+        if same_email:
+            score += WEIGHTS["email"]
+            reasons.append("email")
+        similarity = name_similarity(name_a, name_b)
+        if shared_phones and (similarity or same_email):
+            score += WEIGHTS["phone"]
+            reasons.append("phone")
+        if similarity:
+            score += WEIGHTS["name"] * similarity
+            reasons.append("name" if similarity == 1 else f"name ~{similarity:.2f}")
+        if same_birth:
+            score += WEIGHTS["date_of_birth"]
+            reasons.append("date of birth")
+        return min(score, 1.0), tuple(reasons)
+
+
+def find_duplicates(application: Application, threshold: float = 0.5, max_block: int = 50) -> DedupReport:
+    return DuplicateFinder(threshold, max_block).find(application.scan())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report clusters of applications that probably come from the same person")
+    parser.add_argument("path", nargs="?", help="CSV or JSONL file to check (default: the database given with --db)")
+    parser.add_argument("--format", choices=("csv", "jsonl"))
+    parser.add_argument("--db", help="SQLite database to check")
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--max-block", type=int, default=50, help="skip blocking keys shared by more applicants than this")
+    args = parser.parse_args()
+    if not args.path and not args.db:
+        parser.error("give a file to check, a database, or both")
+    application = Application(SQLiteStore(args.db)) if args.db else Application()
+    try:
+        if args.path:
+            import_applicants(application, args.path, fmt=args.format)
+        report = find_duplicates(application, args.threshold, args.max_block)
+        for cluster in report.clusters:
+            print(f"\n*****  {len(cluster)} applications, score {cluster.score:.2f}  *****")
+            for applicant_id, applicant in zip(cluster.ids, application.store.get_many(cluster.ids)):
+                info = applicant.personal_info
+                print(f"{applicant_id:>10}  {info.full_name}  {info.email_address}  {info.phone_number_mobile}  {info.date_of_birth}")
+            for pair in cluster.pairs:
+                print(f"{'':>10}  {pair.first} ~ {pair.second}: {pair.score:.2f} ({', '.join(pair.reasons)})")
+    finally:
+        application.close()
+    print(f"\n{len(report.clusters)} clusters among {report.applicants} applications "
+          f"({report.candidate_pairs} pairs compared, {report.skipped_blocks} oversized blocks skipped)")
+
+
+if __name__ == "__main__":
+    main()
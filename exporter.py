@@ -0,0 +1,283 @@
+import argparse
+import contextlib
+import csv
+import gzip
+import io
+import itertools
+import json
+import os
+import sys
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, Optional, TextIO, Union
+
+from app import Applicant, Application
+from importer import CSV_JSON_COLUMNS
+from journal import JournaledStore
+from query import BornBetween, EducationAtLeast, Name, Predicate, Query, Skill, Speaks, as_query
+from records import applicant_record, education_level
+from storage import SQLiteStore
+
+
+# the top-level keys of a record (see records.py), which are what `fields` projects
+RECORD_FIELDS = ("full_name", "date_of_birth", "sex", "home_address", "phone_number_home", "phone_number_mobile", "email_address",
+                 "emergency_contact_primary", "emergency_contact_secondary", "languages", "education", "work_experience", "major_skills")
+FORMATS = ("jsonl", "csv", "tables")
+# file suffix of each compression; an output path ending in one of them is compressed that way
+COMPRESSIONS = {"gzip": ".gz", "zstd": ".zst"}
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+# "tables" writes one CSV per section, every row keyed by the applicant_id of the applicants table
+CONTACT_COLUMNS = ("name", "relationship", "phone_number")
+TABLES = {
+    "languages": ("language", "read_ability", "write_ability", "speak_ability"),
+    "education": ("education_level", "university_name", "university_location", "university_country", "attended_from", "attended_to",
+                  "certificates", "main_field_of_study"),
+    "work_experience": ("company_name", "location", "emp_from", "emp_to", "position", "reason_for_leaving"),
+}
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("zstd compression needs the zstandard package (pip install zstandard); gzip works without it") from None
+    return zstandard
+
+
+def detect_compression(path: str) -> Optional[str]:
+    for compression, suffix in COMPRESSIONS.items():
+        if path.lower().endswith(suffix):
+            return compression
+    return None
+
+
+def detect_format(path: str) -> str:
+    """the format named by the path's suffix under any compression suffix, jsonl when there is none"""
+    compression = detect_compression(path)
+    if compression is not None:
+        path = path[:-len(COMPRESSIONS[compression])]
+    return "csv" if os.path.splitext(path)[1].lower() == ".csv" else "jsonl"
+
+
+@contextlib.contextmanager
+def open_output(target: Union[str, BinaryIO], compression: Optional[str] = None) -> Iterator[TextIO]:
+    """a UTF-8 text stream onto a path, "-" for standard output, or an open binary file or pipe
+
+    compressed output goes through a streaming compressor, so nothing but its window is held in memory.
+    a stream passed in, standard output included, is flushed but left open
+    """
+    if compression is not None and compression not in COMPRESSIONS:
+        raise ValueError(f"unknown compression '{compression}', expected one of {', '.join(COMPRESSIONS)}")
+    # looked up before the target is opened, so a missing zstandard doesn't leave an empty file behind
+    zstandard = _zstandard() if compression == "zstd" else None
+    with contextlib.ExitStack() as stack:
+        if target == "-":
+            raw = sys.stdout.buffer
+        elif isinstance(target, str):
+            raw = stack.enter_context(open(target, "wb"))
+        else:
+            raw = target
+        if compression == "gzip":
+            # mtime=0 keeps the same export byte for byte identical from one night to the next
+            raw = stack.enter_context(gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=GZIP_LEVEL, mtime=0))
+        elif compression == "zstd":
+            raw = stack.enter_context(zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw, closefd=False))
+        text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        try:
+            yield text
+        finally:
+            text.flush()
+            # detached rather than closed, so that the compressor and the file close in their own order
+            text.detach()
+        raw.flush()
+
+
+class ExportReport:
+    def __init__(self) -> None:
+        self.scanned = 0
+        self.exported = 0
+        self.chunks = 0
+        self.paths: list[str] = []
+
+    def __repr__(self) -> str:
+        return f"ExportReport(scanned={self.scanned}, exported={self.exported}, chunks={self.chunks})"
+
+
+class Exporter:
+    """streams an application's applicants out in chunks of `chunk_size`
+
+        Exporter(application, fields=("full_name", "email_address", "education"), condition=Skill("python")).write_jsonl(stream)
+
+    `fields` projects the records onto some of RECORD_FIELDS and `condition` (a Query, a Predicate
+    or a function of the applicant) filters them. the pool is read in one pass of Application.scan(),
+    a page at a time under the shared lock, and only one chunk of records is held at a time: each chunk is
+    serialized into one string and written with a single call, which is what keeps a compressor or
+    a pipe busy with large writes instead of one per line
+    """
+    def __init__(self, application: Application, fields: Optional[Iterable[str]] = None,
+                 condition: Union[Query, Predicate, Callable[[Applicant], bool], None] = None, chunk_size: int = 1_000) -> None:
+        projected = RECORD_FIELDS if fields is None else tuple(dict.fromkeys(fields))
+        unknown = [field for field in projected if field not in RECORD_FIELDS]
+        if unknown:
+            raise ValueError(f"unknown field(s) {', '.join(map(repr, unknown))}; expected some of {', '.join(RECORD_FIELDS)}")
+        if chunk_size <= 0:
+            raise ValueError("chunk_size has to be positive")
+        self.__application = application
+        self.__fields = projected
+        self.__filters = as_query(condition).predicates if condition is not None else []
+        self.__chunk_size = chunk_size
+        self.__report = ExportReport()
+
+    @property
+    def fields(self) -> tuple[str, ...]:
+        return self.__fields
+
+    @property
+    def report(self) -> ExportReport:
+        return self.__report
+
+    def chunks(self) -> Iterator[list[tuple[int, dict[str, Any]]]]:
+        """lists of up to chunk_size (id, projected record) pairs, in id order"""
+        filters = self.__filters
+        fields = self.__fields
+        report = self.__report
+
+        def matching() -> Iterator[tuple[int, dict[str, Any]]]:
+            for applicant_id, applicant in self.__application.scan():
+                report.scanned += 1
+                if all(predicate.matches(applicant) for predicate in filters):
+                    record = applicant_record(applicant)
+                    yield applicant_id, {field: record[field] for field in fields if field in record}
+        records = matching()
+        while True:
+            chunk = list(itertools.islice(records, self.__chunk_size))
+            if not chunk:
+                return
+            report.exported += len(chunk)
+            report.chunks += 1
+            yield chunk
+
+    def write_jsonl(self, stream: TextIO) -> ExportReport:
+        """one record per line, in the layout the importer reads back"""
+        for chunk in self.chunks():
+            stream.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for _, record in chunk))
+        return self.__report
+
+    def write_csv(self, stream: TextIO) -> ExportReport:
+        """one row per applicant, nested sections as JSON columns, in the layout the importer reads back"""
+        columns = [field for field in self.__fields if field not in CSV_JSON_COLUMNS] + [field for field in self.__fields if field in CSV_JSON_COLUMNS]
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns)
+        writer.writeheader()
+        for chunk in self.chunks():
+            writer.writerows({field: json.dumps(value, ensure_ascii=False) if field in CSV_JSON_COLUMNS else value for field, value in record.items()}
+                             for _, record in chunk)
+            stream.write(buffer.getvalue())
+            buffer.seek(0)
+            buffer.truncate()
+        stream.write(buffer.getvalue())
+        return self.__report
+
+    def write_tables(self, directory: str, compression: Optional[str] = None) -> ExportReport:
+        """applicants.csv plus a CSV for each projected nested section, joined on applicant_id
+
+        the emergency contacts become name, relationship and phone_number columns of the applicants table
+        """
+        os.makedirs(directory, exist_ok=True)
+        suffix = COMPRESSIONS[compression] if compression is not None else ""
+        contacts = [field for field in self.__fields if field.startswith("emergency_contact_")]
+        scalars = [field for field in self.__fields if field not in CSV_JSON_COLUMNS]
+        applicant_columns = ["applicant_id", *scalars, *(f"{field}_{column}" for field in contacts for column in CONTACT_COLUMNS)]
+        sections = [section for section in TABLES if section in self.__fields]
+        paths = {name: os.path.join(directory, f"{name}.csv{suffix}") for name in ("applicants", *sections)}
+        with contextlib.ExitStack() as stack:
+            streams = {name: stack.enter_context(open_output(path, compression)) for name, path in paths.items()}
+            buffers = {name: io.StringIO() for name in paths}
+            writers = {name: csv.writer(buffer) for name, buffer in buffers.items()}
+            writers["applicants"].writerow(applicant_columns)
+            for section in sections:
+                writers[section].writerow(("applicant_id", *TABLES[section]))
+            for chunk in self.chunks():
+                for applicant_id, record in chunk:
+                    row = [applicant_id, *(record[field] for field in scalars)]
+                    for field in contacts:
+                        contact = record.get(field) or {}
+                        row.extend(contact.get(column, "") for column in CONTACT_COLUMNS)
+                    writers["applicants"].writerow(row)
+                    for section in sections:
+                        columns = TABLES[section]
+                        writers[section].writerows([applicant_id, *(entry[column] for column in columns)] for entry in record[section])
+                for name, buffer in buffers.items():
+                    streams[name].write(buffer.getvalue())
+                    buffer.seek(0)
+                    buffer.truncate()
+            for name, buffer in buffers.items():
+                streams[name].write(buffer.getvalue())
+        self.__report.paths.extend(paths.values())
+        return self.__report
+
+
+def export_applicants(application: Application, target: Union[str, BinaryIO], fmt: Optional[str] = None, compression: Optional[str] = None,
+                      fields: Optional[Iterable[str]] = None, condition: Union[Query, Predicate, Callable[[Applicant], bool], None] = None,
+                      chunk_size: int = 1_000) -> ExportReport:
+    """exports to a path, "-" for standard output, or a binary stream; "tables" takes a directory
+
+    the format and compression default to what the path's suffixes say, e.g. applicants.csv.gz
+    """
+    if isinstance(target, str) and target != "-":
+        fmt = fmt or ("tables" if os.path.isdir(target) else detect_format(target))
+        if compression is None and fmt != "tables":
+            compression = detect_compression(target)
+    fmt = fmt or "jsonl"
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}'")
+    exporter = Exporter(application, fields, condition, chunk_size)
+    if fmt == "tables":
+        if not isinstance(target, str) or target == "-":
+            raise ValueError("the tables format writes several files and needs a directory")
+        return exporter.write_tables(target, compression)
+    with open_output(target, compression) as stream:
+        report = exporter.write_csv(stream) if fmt == "csv" else exporter.write_jsonl(stream)
+    if isinstance(target, str) and target != "-":
+        report.paths.append(target)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export applications as JSONL, CSV or CSV tables, optionally compressed")
+    parser.add_argument("target", help="output file, directory (--format tables), or - for standard output")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the target's suffix, jsonl for standard output")
+    parser.add_argument("--compress", choices=tuple(COMPRESSIONS), help="default: from the target's suffix (.gz, .zst)")
+    storage = parser.add_mutually_exclusive_group(required=True)
+    storage.add_argument("--db", help="SQLite database to export")
+    storage.add_argument("--journal", help="journal directory to export")
+    parser.add_argument("--fields", nargs="+", choices=RECORD_FIELDS, metavar="FIELD", help=f"fields to export: {', '.join(RECORD_FIELDS)}")
+    parser.add_argument("--chunk-size", type=int, default=1_000, help="applicants serialized and written at a time")
+    parser.add_argument("--name", help="only applicants with this full name")
+    parser.add_argument("--skill", action="append", default=[], help="only applicants with this skill (repeatable)")
+    parser.add_argument("--speaks", action="append", default=[], help="only applicants speaking this language (repeatable)")
+    parser.add_argument("--education-at-least", type=education_level, metavar="LEVEL", help="e.g. BACHELOR")
+    parser.add_argument("--born-between", nargs=2, metavar=("START", "END"), help="YYYY-MM-DD bounds, - for open")
+    args = parser.parse_args()
+    predicates: list[Predicate] = [Skill(skill) for skill in args.skill] + [Speaks(language) for language in args.speaks]
+    if args.name:
+        predicates.append(Name(args.name))
+    if args.education_at_least:
+        predicates.append(EducationAtLeast(args.education_at_least))
+    if args.born_between:
+        predicates.append(BornBetween(*(None if bound == "-" else bound for bound in args.born_between)))
+    application = Application(SQLiteStore(args.db)) if args.db else Application(JournaledStore(args.journal))
+    try:
+        report = export_applicants(application, args.target, args.format, args.compress, args.fields,
+                                   Query(*predicates) if predicates else None, args.chunk_size)
+    except BrokenPipeError:
+        # the reader of standard output went away (`| head`); pointed at devnull so the exit doesn't fail on it again
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+    finally:
+        application.close()
+    # standard output may be the export itself
+    print(f"Exported {report.exported:,} of {report.scanned:,} applications in {report.chunks:,} chunks", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+import argparse
+import contextlib
+import csv
+import gc
+import json
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Iterable, Iterator, Optional, TextIO
+
+from app import Applicant, Application
+from records import build_applicant
+from storage import SQLiteStore
+
+
+# CSV files carry one application per row; the nested columns hold JSON (an object for the
+# emergency contacts, arrays of objects for the rest) in the same shape as a JSONL record
+CSV_JSON_COLUMNS = ("emergency_contact_primary", "emergency_contact_secondary", "languages", "education", "work_experience")
+
+
+class ImportReport:
+    def __init__(self) -> None:
+        self.added = 0
+        self.duplicates = 0
+        self.rejected = 0
+
+    @property
+    def total(self) -> int:
+        return self.added + self.duplicates + self.rejected
+
+    def __repr__(self) -> str:
+        return f"ImportReport(added={self.added}, duplicates={self.duplicates}, rejected={self.rejected})"
+
+
+# gc_paused() blocks in progress; collections come back on when the last one ends
+_gc_lock = threading.Lock()
+_gc_pauses = 0
+_gc_was_enabled = False
+
+
+@contextlib.contextmanager
+def gc_paused() -> Iterator[None]:
+    """turns off the cyclic collector around a bulk decode
+
+    applicants hold no reference cycles, but the many objects a decode allocates keep triggering
+    full collections that scan everything loaded so far. the switch is process-wide, so pauses
+    that overlap, in this thread or another, keep it off until the last one ends
+    """
+    global _gc_pauses, _gc_was_enabled
+    with _gc_lock:
+        if not _gc_pauses:
+            _gc_was_enabled = gc.isenabled()
+            gc.disable()
+        _gc_pauses += 1
+    try:
+        yield
+    finally:
+        with _gc_lock:
+            _gc_pauses -= 1
+            if not _gc_pauses and _gc_was_enabled:
+                gc.enable()
+
+
+def read_lines(stream: TextIO) -> Iterator[tuple[int, str]]:
+    for line_no, line in enumerate(stream, 1):
+        if line.strip():
+            yield line_no, line
+
+
+def decode_line(line: str) -> Any:
+    # undecodable lines come back as their raw text so that they can be rejected like any other bad record
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError:
+        return line.rstrip("\n")
+
+
+def read_jsonl(stream: TextIO) -> Iterator[tuple[int, Any]]:
+    """yields (line number, record) for every non-blank line"""
+    for line_no, line in read_lines(stream):
+        yield line_no, decode_line(line)
+
+
+def read_csv(stream: TextIO) -> Iterator[tuple[int, Any]]:
+    """yields (line number, record) for every row, decoding the JSON columns in place"""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        record: dict[str, Any] = dict(row)
+        try:
+            for column in CSV_JSON_COLUMNS:
+                if record.get(column):
+                    record[column] = json.loads(record[column])
+                else:
+                    record.pop(column, None)
+        except json.JSONDecodeError:
+            yield reader.line_num, row
+            continue
+        yield reader.line_num, record
+
+
+def detect_format(path: str) -> str:
+    return "csv" if os.path.splitext(path)[1].lower() == ".csv" else "jsonl"
+
+
+def read_records(stream: TextIO, fmt: str) -> Iterator[tuple[int, Any]]:
+    if fmt == "csv":
+        return read_csv(stream)
+    if fmt == "jsonl":
+        return read_jsonl(stream)
+    raise ValueError(f"Unsupported import format '{fmt}'")
+
+
+def validate_record(record: Any) -> Applicant:
+    """builds the applicant for one record, folding every kind of malformed input into a ValueError"""
+    if not isinstance(record, dict):
+        raise ValueError("record is not a JSON object")
+    try:
+        return build_applicant(record)
+    except (TypeError, AttributeError, IndexError) as e:
+        raise ValueError(f"malformed record: {e}")
+
+
+def build_applicants(records: Iterable[tuple[int, Any]], rejects: Optional[TextIO], report: ImportReport) -> Iterator[Applicant]:
+    """turns records into applicants, writing the ones that fail validation to the reject stream"""
+    for line_no, record in records:
+        try:
+            yield validate_record(record)
+        except ValueError as e:
+            report.rejected += 1
+            if rejects is not None:
+                rejects.write(json.dumps({"line": line_no, "reason": str(e), "record": record}) + "\n")
+
+
+def validate_chunk(chunk: list[tuple[int, Any]], decode: bool = False) -> list[tuple[int, Any, Optional[Applicant], str]]:
+    """worker side of the parallel import: validates a chunk and returns (line, record, applicant, reason) in input order
+
+    with decode=True the chunk holds raw JSONL lines, so that JSON parsing happens in the worker as well
+    """
+    results: list[tuple[int, Any, Optional[Applicant], str]] = []
+    with gc_paused():
+        for line_no, record in chunk:
+            if decode:
+                record = decode_line(record)
+            try:
+                results.append((line_no, None, validate_record(record), ""))
+            except ValueError as e:
+                results.append((line_no, record, None, str(e)))
+    return results
+
+
+def chunked(records: Iterable[tuple[int, Any]], size: int) -> Iterator[list[tuple[int, Any]]]:
+    iterator = iter(records)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def import_parallel(application: Application, records: Iterable[tuple[int, Any]], rejects: Optional[TextIO] = None,
+                    workers: Optional[int] = None, chunk_size: int = 1000, decode: bool = False) -> ImportReport:
+    """validates chunks of records in a process pool and merges them into the application in input order
+
+    at most two chunks per worker are in flight, so memory stays bounded however long the input is
+    """
+    report = ImportReport()
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: deque[Future] = deque()
+        chunks = chunked(records, chunk_size)
+        for chunk in islice(chunks, workers * 2):
+            pending.append(executor.submit(validate_chunk, chunk, decode))
+        while pending:
+            results = pending.popleft().result()
+            for chunk in islice(chunks, 1):
+                pending.append(executor.submit(validate_chunk, chunk, decode))
+            for line_no, record, applicant, reason in results:
+                if applicant is None:
+                    report.rejected += 1
+                    if rejects is not None:
+                        rejects.write(json.dumps({"line": line_no, "reason": reason, "record": record}) + "\n")
+                elif application.add_applicant(applicant, verbose=False):
+                    report.added += 1
+                else:
+                    report.duplicates += 1
+    return report
+
+
+def import_stream(application: Application, stream: TextIO, fmt: str = "jsonl", rejects: Optional[TextIO] = None,
+                  chunk_size: int = 1000) -> ImportReport:
+    report = ImportReport()
+    # records are decoded a chunk at a time with the collector paused; merging them runs with it on
+    for chunk in chunked(read_records(stream, fmt), chunk_size):
+        with gc_paused():
+            applicants = list(build_applicants(chunk, rejects, report))
+        for applicant in applicants:
+            if application.add_applicant(applicant, verbose=False):
+                report.added += 1
+            else:
+                report.duplicates += 1
+    return report
+
+
+def import_applicants(application: Application, path: str, reject_path: Optional[str] = None, fmt: Optional[str] = None,
+                      workers: int = 1, chunk_size: int = 1000) -> ImportReport:
+    """streams a CSV or JSONL file into the application
+
+    with workers > 1 records are validated in a process pool of that size; the merge still
+    happens in file order, so the result is the same as a sequential import
+    """
+    fmt = fmt or detect_format(path)
+    with open(path, newline="", encoding="utf-8") as stream, \
+            (open(reject_path, "w", encoding="utf-8") if reject_path else contextlib.nullcontext()) as rejects, \
+            application.batch():
+        if workers > 1 and fmt == "jsonl":
+            return import_parallel(application, read_lines(stream), rejects, workers, chunk_size, decode=True)
+        if workers > 1:
+            return import_parallel(application, read_records(stream, fmt), rejects, workers, chunk_size)
+        return import_stream(application, stream, fmt, rejects, chunk_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import applications from CSV or JSONL")
+    parser.add_argument("path")
+    parser.add_argument("--rejects", help="file that receives the rejected records as JSONL")
+    parser.add_argument("--format", choices=("csv", "jsonl"))
+    parser.add_argument("--workers", type=int, default=1, help="validate in a pool of this many processes")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="records decoded together, and per work unit in parallel mode")
+    parser.add_argument("--db", help="SQLite database to import into (default: validate only)")
+    args = parser.parse_args()
+    application = Application(SQLiteStore(args.db)) if args.db else Application()
+    try:
+        report = import_applicants(application, args.path, args.rejects, args.format, args.workers, args.chunk_size)
+    finally:
+        application.close()
+    print(f"Added: {report.added}, duplicates: {report.duplicates}, rejected: {report.rejected}")
+
+
+if __name__ == "__main__":
+    main()
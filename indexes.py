@@ -0,0 +1,612 @@
+import bisect
+import datetime
+import heapq
+import itertools
+import re
+import threading
+from collections import Counter
+from operator import itemgetter
+from abc import ABC, abstractmethod
+from typing import Any, Iterable, Iterator, Optional
+
+
+# words, plus the +, # and inner dots that skills such as "c++", "c#" and "node.js" are spelled with
+TOKEN_PATTERN = re.compile(r"[\w+#]+(?:\.[\w+#]+)*")
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.casefold())
+
+
+class ApplicantIndex(ABC):
+    """abstract class for the secondary indexes an Application maintains over its applicant ids"""
+    @abstractmethod
+    def add(self, applicant_id: int, applicant: Any) -> None:
+        pass
+
+    @abstractmethod
+    def remove(self, applicant_id: int, applicant: Any) -> None:
+        pass
+
+
+class InvertedIndex:
+    """token -> ids of the documents containing it"""
+    def __init__(self) -> None:
+        self.__postings: dict[str, set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.__postings)
+
+    def add(self, doc_id: int, tokens: Iterable[str]) -> None:
+        for token in tokens:
+            self.__postings.setdefault(token, set()).add(doc_id)
+
+    def remove(self, doc_id: int, tokens: Iterable[str]) -> None:
+        for token in tokens:
+            postings = self.__postings.get(token)
+            if postings is not None:
+                postings.discard(doc_id)
+                if not postings:
+                    del self.__postings[token]
+
+    def postings(self, token: str) -> set[int]:
+        return self.__postings.get(token, set())
+
+
+def intersect(postings: list[set[int]]) -> set[int]:
+    """intersects posting lists starting from the shortest, so the work is bounded by the rarest term"""
+    if not postings:
+        return set()
+    postings = sorted(postings, key=len)
+    result = set(postings[0])
+    for other in postings[1:]:
+        if not result:
+            break
+        result &= other
+    return result
+
+
+def union(postings: list[set[int]]) -> set[int]:
+    # a single posting list is returned as is, so callers must treat the result as read-only
+    if len(postings) == 1:
+        return postings[0]
+    result: set[int] = set()
+    for other in postings:
+        result |= other
+    return result
+
+
+class KeywordIndex(ApplicantIndex):
+    """one inverted index per searchable text field of an applicant"""
+    FIELDS = ("skills", "certificates", "field_of_study", "language")
+
+    def __init__(self) -> None:
+        self.__fields: dict[str, InvertedIndex] = {field: InvertedIndex() for field in self.FIELDS}
+
+    @staticmethod
+    def tokens(applicant: Any) -> dict[str, set[str]]:
+        return {
+            "skills": set(tokenize(applicant.major_skills)),
+            "certificates": {token for edu in applicant.educational_background for cert in edu.certificates for token in tokenize(cert)},
+            "field_of_study": {token for edu in applicant.educational_background for token in tokenize(edu.main_field_of_study)},
+            "language": {token for lang in applicant.languages for token in tokenize(lang.language)},
+        }
+
+    def add(self, applicant_id: int, applicant: Any) -> None:
+        for field, tokens in self.tokens(applicant).items():
+            self.__fields[field].add(applicant_id, tokens)
+
+    def remove(self, applicant_id: int, applicant: Any) -> None:
+        for field, tokens in self.tokens(applicant).items():
+            self.__fields[field].remove(applicant_id, tokens)
+
+    def term_postings(self, term: str, fields: Optional[Iterable[str]] = None) -> set[int]:
+        """ids whose selected fields contain the token; a term tokenizing into several words needs all of them"""
+        fields = self.__check_fields(fields)
+        words = tokenize(term)
+        return intersect([union([self.__fields[field].postings(word) for field in fields]) for word in words])
+
+    def search(self, terms: Iterable[str], fields: Optional[Iterable[str]] = None, match_all: bool = True) -> list[int]:
+        postings = [self.term_postings(term, fields) for term in terms]
+        return sorted(intersect(postings) if match_all else union(postings))
+
+    def __check_fields(self, fields: Optional[Iterable[str]]) -> tuple[str, ...]:
+        if fields is None:
+            return self.FIELDS
+        fields = tuple(fields)
+        for field in fields:
+            if field not in self.__fields:
+                raise ValueError(f"Unknown keyword field '{field}', expected one of {', '.join(self.FIELDS)}")
+        return fields
+
+
+def edit_distance(a: str, b: str, limit: Optional[int] = None) -> int:
+    """Levenshtein distance that also counts swapping two adjacent letters as one edit
+
+    with a limit, any distance above it comes back as limit + 1 as soon as that is certain
+    """
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    before: list[int] = []
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    if limit is not None and previous[-1] > limit:
+        return limit + 1
+    return previous[-1]
+
+
+def token_budget(token: str) -> int:
+    # edits tolerated in a single name token, growing with its length: none for initials,
+    # one for ordinary names and two for long ones
+    if len(token) <= 2:
+        return 0
+    return 1 if len(token) <= 7 else 2
+
+
+def bigrams(token: str) -> set[str]:
+    padded = f"^{token}$"
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+class SortedKeys:
+    """a sorted array of distinct strings answering prefix queries with bisect, the flat form of a trie
+
+    inserts and removals are buffered and folded into the array on the next read, so bulk loads
+    don't shift the array once per key
+    """
+    def __init__(self) -> None:
+        self.__keys: list[str] = []
+        self.__added: set[str] = set()
+        self.__removed: set[str] = set()
+        # readers share the application's read lock, so the fold on read is serialized separately
+        self.__flush_lock = threading.Lock()
+
+    def add(self, key: str) -> None:
+        if key in self.__removed:
+            self.__removed.discard(key)
+        else:
+            self.__added.add(key)
+
+    def remove(self, key: str) -> None:
+        if key in self.__added:
+            self.__added.discard(key)
+        else:
+            self.__removed.add(key)
+
+    def __flush(self) -> None:
+        if not (self.__added or self.__removed):
+            return
+        with self.__flush_lock:
+            if self.__removed:
+                if len(self.__removed) < 64:
+                    for key in self.__removed:
+                        del self.__keys[bisect.bisect_left(self.__keys, key)]
+                else:
+                    self.__keys = [key for key in self.__keys if key not in self.__removed]
+                self.__removed.clear()
+            if self.__added:
+                if len(self.__added) < 64:
+                    for key in self.__added:
+                        bisect.insort(self.__keys, key)
+                else:
+                    # two sorted runs, which list.sort merges in linear time
+                    self.__keys += sorted(self.__added)
+                    self.__keys.sort()
+                self.__added.clear()
+
+    def with_prefix(self, prefix: str) -> list[str]:
+        self.__flush()
+        start = bisect.bisect_left(self.__keys, prefix)
+        end = bisect.bisect_left(self.__keys, prefix + "\U0010ffff", start)
+        return self.__keys[start:end]
+
+
+class NameIndex(ApplicantIndex):
+    """prefix and typo-tolerant search over casefolded full names
+
+    fuzzy matching works per name token: a bigram index over the distinct tokens finds the spellings
+    within each query token's edit budget, and only names holding a match for every query token are
+    ranked, so a misspelled letter or a name with an extra middle name is still found
+    """
+    def __init__(self) -> None:
+        self.__names: dict[str, set[int]] = {}
+        self.__sorted_names = SortedKeys()
+        # name token -> full names containing it
+        self.__tokens: dict[str, set[str]] = {}
+        # bigram -> distinct tokens containing it
+        self.__bigrams: dict[str, set[str]] = {}
+
+    def add(self, applicant_id: int, applicant: Any) -> None:
+        name = applicant.personal_info.full_name.casefold()
+        ids = self.__names.get(name)
+        if ids is not None:
+            ids.add(applicant_id)
+            return
+        self.__names[name] = {applicant_id}
+        self.__sorted_names.add(name)
+        for token in set(tokenize(name)):
+            names = self.__tokens.get(token)
+            if names is None:
+                names = self.__tokens[token] = set()
+                for gram in bigrams(token):
+                    self.__bigrams.setdefault(gram, set()).add(token)
+            names.add(name)
+
+    def remove(self, applicant_id: int, applicant: Any) -> None:
+        name = applicant.personal_info.full_name.casefold()
+        ids = self.__names[name]
+        ids.discard(applicant_id)
+        if ids:
+            return
+        del self.__names[name]
+        self.__sorted_names.remove(name)
+        for token in set(tokenize(name)):
+            names = self.__tokens[token]
+            names.discard(name)
+            if not names:
+                del self.__tokens[token]
+                for gram in bigrams(token):
+                    tokens = self.__bigrams[gram]
+                    tokens.discard(token)
+                    if not tokens:
+                        del self.__bigrams[gram]
+
+    def __ids(self, names: Iterable[str], k: int) -> list[int]:
+        result: list[int] = []
+        for name in names:
+            result.extend(sorted(self.__names[name]))
+            if len(result) >= k:
+                break
+        return result[:k]
+
+    def exact(self, full_name: str) -> set[int]:
+        return self.__names.get(full_name.casefold(), set())
+
+    def count_prefix(self, prefix: str) -> int:
+        return sum(len(self.__names[name]) for name in self.__sorted_names.with_prefix(prefix.casefold()))
+
+    def with_prefix(self, prefix: str) -> list[int]:
+        return sorted(applicant_id for name in self.__sorted_names.with_prefix(prefix.casefold()) for applicant_id in self.__names[name])
+
+    def prefix(self, prefix: str, k: int = 10) -> list[int]:
+        """ids of the names starting with the prefix, closest (shortest) completions first"""
+        matches = self.__sorted_names.with_prefix(prefix.casefold())
+        return self.__ids(heapq.nsmallest(k, matches, key=len), k)
+
+    def __similar_tokens(self, token: str, budget: int) -> dict[str, int]:
+        """vocabulary tokens within `budget` edits of the token, with their distance"""
+        if budget == 0:
+            return {token: 0} if token in self.__tokens else {}
+        grams = bigrams(token)
+        # an edit breaks at most three of the padded bigrams (a swap of two letters does), so a
+        # match within the budget still shares this many of them with the token
+        needed = max(1, len(grams) - 3 * budget)
+        counts = Counter(itertools.chain.from_iterable(self.__bigrams.get(gram, ()) for gram in grams))
+        matches: dict[str, int] = {}
+        for candidate, count in counts.items():
+            if count >= needed and abs(len(candidate) - len(token)) <= budget:
+                distance = edit_distance(token, candidate, budget)
+                if distance <= budget:
+                    matches[candidate] = distance
+        return matches
+
+    def fuzzy(self, query: str, max_distance: int = 2, k: int = 10) -> list[int]:
+        """ids of the names matching every query token within its edit budget, best matches first
+
+        each query token tolerates token_budget() edits; names are ranked by the summed per-token
+        distance, then by the edit distance between the whole names, and anything beyond
+        max_distance summed edits is dropped
+        """
+        query = query.casefold()
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        similar = [self.__similar_tokens(token, min(max_distance, token_budget(token))) for token in tokens]
+        candidates = intersect([union([self.__tokens[match] for match in matches]) if matches else set() for matches in similar])
+        ranked: list[tuple[int, int, str]] = []
+        for name in candidates:
+            name_tokens = tokenize(name)
+            score = 0
+            for matches in similar:
+                score += min(matches.get(name_token, max_distance + 1) for name_token in name_tokens)
+            if score <= max_distance:
+                ranked.append((score, edit_distance(query, name), name))
+        return self.__ids((name for _, _, name in heapq.nsmallest(k, ranked)), k)
+
+
+class SortedIndex:
+    """entries kept sorted by their first element, for O(log n + k) range scans
+
+    entries are tuples (key, ..., id); like SortedKeys, writes are buffered and folded into the
+    array on the next read
+    """
+    def __init__(self) -> None:
+        self.__entries: list[tuple] = []
+        self.__added: set[tuple] = set()
+        self.__removed: set[tuple] = set()
+        self.__flush_lock = threading.Lock()
+
+    def add(self, entry: tuple) -> None:
+        if entry in self.__removed:
+            self.__removed.discard(entry)
+        else:
+            self.__added.add(entry)
+
+    def remove(self, entry: tuple) -> None:
+        if entry in self.__added:
+            self.__added.discard(entry)
+        else:
+            self.__removed.add(entry)
+
+    def __flush(self) -> None:
+        if not (self.__added or self.__removed):
+            return
+        with self.__flush_lock:
+            if self.__removed:
+                if len(self.__removed) < 64:
+                    for entry in self.__removed:
+                        del self.__entries[bisect.bisect_left(self.__entries, entry)]
+                else:
+                    self.__entries = [entry for entry in self.__entries if entry not in self.__removed]
+                self.__removed.clear()
+            if self.__added:
+                if len(self.__added) < 64:
+                    for entry in self.__added:
+                        bisect.insort(self.__entries, entry)
+                else:
+                    self.__entries += sorted(self.__added)
+                    self.__entries.sort()
+                self.__added.clear()
+
+    def __bounds(self, low: Any, high: Any) -> tuple[int, int]:
+        self.__flush()
+        start = 0 if low is None else bisect.bisect_left(self.__entries, low, key=itemgetter(0))
+        end = len(self.__entries) if high is None else bisect.bisect_right(self.__entries, high, lo=start, key=itemgetter(0))
+        return start, end
+
+    def count(self, low: Any = None, high: Any = None) -> int:
+        """number of entries with low <= key <= high; None leaves that side open"""
+        start, end = self.__bounds(low, high)
+        return end - start
+
+    def between(self, low: Any = None, high: Any = None) -> list[tuple]:
+        start, end = self.__bounds(low, high)
+        return self.__entries[start:end]
+
+
+class IntervalIndex:
+    """spans (start, end, ..., id) answering "which overlap [low, high]" in O(log n + k)
+
+    the spans are kept sorted by start in blocks of about BLOCK entries, each block knowing the
+    latest end among its spans, and a max tree over those ends finds the blocks holding a span that
+    is still open at `low` without visiting the others. like SortedIndex, writes are buffered and
+    folded in on the next read
+    """
+    BLOCK = 64
+
+    def __init__(self) -> None:
+        self.__blocks: list[list[tuple]] = []
+        self.__firsts: list[tuple] = []
+        self.__max_ends: list[Any] = []
+        # max tree over __max_ends: leaves from __size on, node i holding the max of 2i and 2i + 1
+        self.__size = 1
+        self.__tree: list[Any] = [None, None]
+        self.__added: set[tuple] = set()
+        self.__removed: set[tuple] = set()
+        self.__flush_lock = threading.Lock()
+
+    def add(self, entry: tuple) -> None:
+        if entry in self.__removed:
+            self.__removed.discard(entry)
+        else:
+            self.__added.add(entry)
+
+    def remove(self, entry: tuple) -> None:
+        if entry in self.__added:
+            self.__added.discard(entry)
+        else:
+            self.__removed.add(entry)
+
+    def __flush(self) -> None:
+        if not (self.__added or self.__removed):
+            return
+        with self.__flush_lock:
+            if not (self.__added or self.__removed):
+                return
+            if len(self.__added) + len(self.__removed) < 64:
+                self.__apply(self.__removed, self.__added)
+            else:
+                entries = [entry for block in self.__blocks for entry in block if entry not in self.__removed]
+                entries += sorted(self.__added)
+                entries.sort()
+                self.__blocks = [entries[i:i + self.BLOCK] for i in range(0, len(entries), self.BLOCK)]
+                self.__rebuild()
+            # cleared last: a reader only skips the fold once the blocks and the tree are complete
+            self.__removed.clear()
+            self.__added.clear()
+
+    def __apply(self, removed: set[tuple], added: set[tuple]) -> None:
+        blocks, firsts = self.__blocks, self.__firsts
+        changed: set[int] = set()
+        reshaped = False
+        for entry in removed:
+            b = bisect.bisect_right(firsts, entry) - 1
+            block = blocks[b]
+            del block[bisect.bisect_left(block, entry)]
+            changed.add(b)
+        for entry in sorted(added):
+            b = max(0, bisect.bisect_right(firsts, entry) - 1)
+            if not blocks:
+                blocks.append([])
+                firsts.append(entry)
+                reshaped = True
+            bisect.insort(blocks[b], entry)
+            firsts[b] = blocks[b][0]
+            changed.add(b)
+        if any(not blocks[b] or len(blocks[b]) > 2 * self.BLOCK for b in changed):
+            # drop the blocks that emptied and halve the ones that outgrew twice the block size
+            self.__blocks = [half for block in blocks if block
+                             for half in ((block[:len(block) // 2], block[len(block) // 2:]) if len(block) > 2 * self.BLOCK else (block,))]
+            reshaped = True
+        if reshaped:
+            self.__rebuild()
+            return
+        for b in changed:
+            block = blocks[b]
+            firsts[b] = block[0]
+            self.__max_ends[b] = max(entry[1] for entry in block)
+            node = self.__size + b
+            self.__tree[node] = self.__max_ends[b]
+            node //= 2
+            while node:
+                left, right = self.__tree[2 * node], self.__tree[2 * node + 1]
+                self.__tree[node] = left if right is None or (left is not None and left >= right) else right
+                node //= 2
+
+    def __rebuild(self) -> None:
+        self.__firsts = [block[0] for block in self.__blocks]
+        self.__max_ends = [max(entry[1] for entry in block) for block in self.__blocks]
+        size = 1
+        while size < len(self.__max_ends):
+            size *= 2
+        tree: list[Any] = [None] * size + self.__max_ends + [None] * (size - len(self.__max_ends))
+        for node in range(size - 1, 0, -1):
+            left, right = tree[2 * node], tree[2 * node + 1]
+            tree[node] = left if right is None or (left is not None and left >= right) else right
+        self.__size, self.__tree = size, tree
+
+    def __candidates(self, low: Any, high: Any) -> Iterator[int]:
+        """in order, the blocks that can hold a span with start <= high and end >= low"""
+        self.__flush()
+        stop = len(self.__blocks) if high is None else bisect.bisect_right(self.__firsts, high, key=itemgetter(0))
+        tree, size = self.__tree, self.__size
+        # depth-first over the tree, left before right, pruning subtrees past `stop` or closed before `low`
+        stack = [(1, 0, size)]
+        while stack:
+            node, first, last = stack.pop()
+            if first >= stop or tree[node] is None or (low is not None and tree[node] < low):
+                continue
+            if node >= size:
+                yield first
+            else:
+                middle = (first + last) // 2
+                stack.append((2 * node + 1, middle, last))
+                stack.append((2 * node, first, middle))
+
+    def overlapping(self, low: Any = None, high: Any = None) -> list[tuple]:
+        """entries whose span [start, end] overlaps [low, high]; None leaves that side open"""
+        return [entry for b in self.__candidates(low, high) for entry in self.__blocks[b]
+                if (high is None or entry[0] <= high) and (low is None or entry[1] >= low)]
+
+    def count(self, low: Any = None, high: Any = None) -> int:
+        """entries in the blocks that can hold an overlapping span, an upper bound found without scanning them"""
+        return sum(len(self.__blocks[b]) for b in self.__candidates(low, high))
+
+
+class RangeIndex(ApplicantIndex):
+    """sorted indexes over the dates and education levels of the applicants, and interval indexes
+    over the education and employment spans
+    """
+    def __init__(self) -> None:
+        self.__date_of_birth = SortedIndex()
+        self.__education_level = SortedIndex()
+        self.__education = IntervalIndex()
+        self.__employment = IntervalIndex()
+
+    @staticmethod
+    def __entries(applicant_id: int, applicant: Any) -> tuple[tuple, set[tuple], set[tuple], set[tuple]]:
+        return ((applicant.personal_info.date_of_birth, applicant_id),
+                {(edu.education_level.rank, applicant_id) for edu in applicant.educational_background},
+                {(edu.attended_from, edu.attended_to, applicant_id) for edu in applicant.educational_background},
+                {(job.emp_from, job.emp_to, applicant_id) for job in applicant.work_experience})
+
+    def add(self, applicant_id: int, applicant: Any) -> None:
+        date_of_birth, levels, education, employment = self.__entries(applicant_id, applicant)
+        self.__date_of_birth.add(date_of_birth)
+        for entry in levels:
+            self.__education_level.add(entry)
+        for entry in education:
+            self.__education.add(entry)
+        for entry in employment:
+            self.__employment.add(entry)
+
+    def remove(self, applicant_id: int, applicant: Any) -> None:
+        date_of_birth, levels, education, employment = self.__entries(applicant_id, applicant)
+        self.__date_of_birth.remove(date_of_birth)
+        for entry in levels:
+            self.__education_level.remove(entry)
+        for entry in education:
+            self.__education.remove(entry)
+        for entry in employment:
+            self.__employment.remove(entry)
+
+    @staticmethod
+    def __ids(entries: Iterable[tuple]) -> list[int]:
+        return sorted({entry[-1] for entry in entries})
+
+    def born_between(self, start: Optional[datetime.date], end: Optional[datetime.date]) -> list[int]:
+        return self.__ids(self.__date_of_birth.between(start, end))
+
+    def count_born_between(self, start: Optional[datetime.date], end: Optional[datetime.date]) -> int:
+        return self.__date_of_birth.count(start, end)
+
+    def education_level_between(self, lowest: Optional[int], highest: Optional[int]) -> list[int]:
+        return self.__ids(self.__education_level.between(lowest, highest))
+
+    def count_education_level_between(self, lowest: Optional[int], highest: Optional[int]) -> int:
+        # counts degrees, so an upper bound on the applicants holding them
+        return self.__education_level.count(lowest, highest)
+
+    def studied_during(self, start: Optional[datetime.date], end: Optional[datetime.date]) -> list[int]:
+        return self.__ids(self.__education.overlapping(start, end))
+
+    def employed_during(self, start: Optional[datetime.date], end: Optional[datetime.date]) -> list[int]:
+        return self.__ids(self.__employment.overlapping(start, end))
+
+    def count_studied_during(self, start: Optional[datetime.date], end: Optional[datetime.date]) -> int:
+        # spans, so an upper bound on the applicants
+        return self.__education.count(start, end)
+
+    def count_employed_during(self, start: Optional[datetime.date], end: Optional[datetime.date]) -> int:
+        return self.__employment.count(start, end)
+
+
+class IndexCatalog(ApplicantIndex):
+    """the secondary indexes an Application maintains, updated together"""
+    def __init__(self) -> None:
+        self.__keywords = KeywordIndex()
+        self.__names = NameIndex()
+        self.__ranges = RangeIndex()
+
+    @property
+    def keywords(self) -> KeywordIndex:
+        return self.__keywords
+    @property
+    def names(self) -> NameIndex:
+        return self.__names
+    @property
+    def ranges(self) -> RangeIndex:
+        return self.__ranges
+
+    def add(self, applicant_id: int, applicant: Any) -> None:
+        self.__keywords.add(applicant_id, applicant)
+        self.__names.add(applicant_id, applicant)
+        self.__ranges.add(applicant_id, applicant)
+
+    def remove(self, applicant_id: int, applicant: Any) -> None:
+        self.__keywords.remove(applicant_id, applicant)
+        self.__names.remove(applicant_id, applicant)
+        self.__ranges.remove(applicant_id, applicant)
@@ -0,0 +1,175 @@
+import argparse
+import contextlib
+import sys
+import threading
+from typing import Any, Iterator, Optional
+
+
+# the record fields whose values repeat across a pool: a handful of sexes, languages and abilities,
+# and a long but bounded tail of universities, cities, countries and companies. free text such as
+# positions and reasons for leaving rarely repeats, so it isn't pooled
+POOLED_FIELDS = ("sex", "language", "read_ability", "write_ability", "speak_ability",
+                 "university_name", "university_location", "university_country", "main_field_of_study",
+                 "company_name", "location")
+# distinct values a pool takes before it stops growing; later new values are stored unshared
+DEFAULT_MAX_SIZE = 1 << 16
+
+
+class StringPool:
+    """one shared copy of each distinct value of a field, numbered in the order first seen
+
+    intern() hands back the pool's copy of a value, so a million records naming the same university
+    hold one string between them, and comparing two pooled values mostly stops at their identity.
+    code() numbers the values for filters that compare integers instead of strings, e.g. on a
+    ColumnarSnapshot column; codes are only meaningful within one process and until clear().
+    once a pool holds max_size values, new ones are returned as they are and counted as overflowed,
+    which bounds the pool when a field turns out not to repeat
+    """
+    def __init__(self, field: str, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        self.__field = field
+        self.__max_size = max_size
+        self.__enabled = True
+        # lookups run without the lock; it only serializes adding a value, so two threads can't number it twice
+        self.__lock = threading.Lock()
+        self.__canonical: dict[str, str] = {}
+        self.__codes: dict[str, int] = {}
+        self.__values: list[str] = []
+        self.__overflowed = 0
+
+    @property
+    def field(self) -> str:
+        return self.__field
+
+    @property
+    def enabled(self) -> bool:
+        return self.__enabled
+
+    @enabled.setter
+    def enabled(self, enabled: bool) -> None:
+        self.__enabled = enabled
+
+    @property
+    def overflowed(self) -> int:
+        return self.__overflowed
+
+    def __len__(self) -> int:
+        return len(self.__values)
+
+    def __contains__(self, value: object) -> bool:
+        return value in self.__codes
+
+    def intern(self, value: Any) -> Any:
+        try:
+            canonical = self.__canonical.get(value)
+        except TypeError:
+            return value
+        if canonical is not None:
+            return canonical
+        return self.__add(value)
+
+    def __add(self, value: Any) -> Any:
+        # anything but a string (a setter given a number, say) is stored as before, unpooled
+        if not isinstance(value, str) or not self.__enabled:
+            return value
+        with self.__lock:
+            canonical = self.__canonical.get(value)
+            if canonical is not None:
+                return canonical
+            if len(self.__values) >= self.__max_size:
+                self.__overflowed += 1
+                return value
+            self.__codes[value] = len(self.__values)
+            self.__values.append(value)
+            self.__canonical[value] = value
+            return value
+
+    def code(self, value: str) -> Optional[int]:
+        """the value's code, or None when no record has held it, so that an equality filter can match nothing"""
+        return self.__codes.get(value)
+
+    def value(self, code: int) -> str:
+        return self.__values[code]
+
+    def values(self) -> list[str]:
+        """the pooled values in code order"""
+        return list(self.__values)
+
+    def clear(self) -> None:
+        """forgets the values, renumbering from 0; records keep the strings they hold"""
+        with self.__lock:
+            self.__canonical = {}
+            self.__codes = {}
+            self.__values = []
+            self.__overflowed = 0
+
+    def _save(self) -> tuple:
+        # clear() swaps in new containers, so the saved ones stay as they are until _restore()
+        return self.__canonical, self.__codes, self.__values, self.__overflowed, self.__enabled
+
+    def _restore(self, state: tuple) -> None:
+        with self.__lock:
+            self.__canonical, self.__codes, self.__values, self.__overflowed, self.__enabled = state
+
+    def stats(self) -> dict[str, int]:
+        values = self.__values
+        return {"cardinality": len(values), "bytes": sum(sys.getsizeof(value) for value in values), "overflowed": self.__overflowed}
+
+
+POOLS = {field: StringPool(field) for field in POOLED_FIELDS}
+
+
+def pool_stats() -> dict[str, dict[str, int]]:
+    """field -> cardinality (distinct values pooled), bytes held by the pool and values that overflowed it"""
+    return {field: pool.stats() for field, pool in POOLS.items()}
+
+
+@contextlib.contextmanager
+def _unpooled() -> Iterator[None]:
+    """records built inside the block keep their own strings, the layout before pooling; for benchmarks
+
+    the pools are set aside and put back on exit, so codes handed out before the block stay valid
+    """
+    saved = {field: pool._save() for field, pool in POOLS.items()}
+    for pool in POOLS.values():
+        pool.clear()
+        pool.enabled = False
+    try:
+        yield
+    finally:
+        for field, pool in POOLS.items():
+            pool._restore(saved[field])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report the cardinality of the pooled fields of a set of applications")
+    parser.add_argument("path", nargs="?", help="CSV or JSONL file of applications (default: the database given with --db)")
+    parser.add_argument("--format", choices=("csv", "jsonl"))
+    parser.add_argument("--db", help="SQLite database to load")
+    args = parser.parse_args()
+    if not args.path and not args.db:
+        parser.error("give a file to load, a database, or both")
+    # imported here because app.py itself pools through this module; run as a script, this module is
+    # __main__ and its POOLS aren't the ones app.py fills, so the stats are read from the imported one
+    from app import Application
+    from importer import import_applicants
+    from interning import pool_stats as imported_pool_stats
+    from storage import SQLiteStore
+    application = Application(SQLiteStore(args.db)) if args.db else Application()
+    try:
+        if args.path:
+            import_applicants(application, args.path, fmt=args.format)
+        # a database hands out its strings as applicants are read, so read them all to pool them
+        for _ in application:
+            pass
+        print("*****######******######*******######")
+        print(f"Pooled fields of {len(application):,} applications")
+        print("*****######******######*******######")
+        print(f"{'field':>20} {'cardinality':>12} {'pool bytes':>11} {'overflowed':>11}")
+        for field, stats in imported_pool_stats().items():
+            print(f"{field:>20} {stats['cardinality']:>12,} {stats['bytes']:>11,} {stats['overflowed']:>11,}")
+    finally:
+        application.close()
+
+
+if __name__ == "__main__":
+    main()
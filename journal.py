@@ -0,0 +1,332 @@
+import argparse
+import contextlib
+import os
+import pickle
+import re
+import struct
+import threading
+import zlib
+from typing import Any, BinaryIO, Iterable, Iterator, Optional
+
+from app import Applicant, ApplicantStore, Application, MemoryStore, main as run_manager
+from importer import gc_paused
+
+
+# a journal directory holds one snapshot and the journal segments written after it:
+#
+#   snapshot              b"JAMSNAP1", a frame with (last segment covered, applicant count), then frames of [(id, state), ...]
+#   journal.000042        frames of ("i" | "r", id, state) for inserts and replacements and ("d", id, None) for removals
+#
+# every frame is a little-endian (payload length, crc32 of the payload) header followed by a pickled payload,
+# so a frame torn by a crash is recognized and dropped instead of being replayed
+FRAME_HEADER = struct.Struct("<II")
+SNAPSHOT_MAGIC = b"JAMSNAP1"
+SNAPSHOT_NAME = "snapshot"
+SEGMENT_PATTERN = re.compile(r"journal\.(\d{6})$")
+# applicants per snapshot frame
+SNAPSHOT_CHUNK = 10_000
+
+
+def encode_frame(payload: Any) -> bytes:
+    data = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+    return FRAME_HEADER.pack(len(data), zlib.crc32(data)) + data
+
+
+def read_frames(stream: BinaryIO) -> Iterator[tuple[int, Any]]:
+    """yields (end offset, payload) for every intact frame, stopping at the first torn or corrupt one"""
+    offset = 0
+    while True:
+        header = stream.read(FRAME_HEADER.size)
+        if len(header) < FRAME_HEADER.size:
+            return
+        length, checksum = FRAME_HEADER.unpack(header)
+        data = stream.read(length)
+        if len(data) < length or zlib.crc32(data) != checksum:
+            return
+        offset += FRAME_HEADER.size + length
+        yield offset, pickle.loads(data)
+
+
+def segment_name(number: int) -> str:
+    return f"journal.{number:06d}"
+
+
+def fsync_directory(path: str) -> None:
+    # makes renames and new files in the directory durable; not every platform can open a directory
+    with contextlib.suppress(OSError):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class JournaledStore(ApplicantStore):
+    """keeps applicants in memory and every change in an append-only journal on disk
+
+    opening the store rebuilds it from the latest snapshot plus the journal segments written after
+    it. journal entries are fsynced in groups: a background thread flushes whatever was appended
+    every `commit_interval` seconds, so at most that much work is lost in a crash, and batch(),
+    sync() and close() wait for everything appended so far to reach the disk
+
+    once a segment holds `compact_after` entries a new one is started and a background thread
+    writes a fresh snapshot of the store as of that point, then deletes the segments it covers,
+    which keeps replay time bounded by the snapshot size plus at most a couple of segments
+    """
+    def __init__(self, path: str, commit_interval: float = 0.01, compact_after: int = 100_000) -> None:
+        self.__path = path
+        self.__commit_interval = commit_interval
+        self.__compact_after = compact_after
+        self.__store = MemoryStore()
+        # guards the pending buffer and the segment bookkeeping; file writes happen under __io_lock
+        self.__lock = threading.Lock()
+        self.__io_lock = threading.Lock()
+        self.__flushed = threading.Condition(self.__lock)
+        self.__pending: list[bytes] = []
+        self.__appended = 0
+        self.__durable = 0
+        self.__segment_entries = 0
+        self.__batch_depth = 0
+        self.__closed = False
+        self.__compaction: Optional[threading.Thread] = None
+        os.makedirs(path, exist_ok=True)
+        self.__segment = self.__recover() + 1
+        self.__stream = open(self.__segment_path(self.__segment), "ab")
+        fsync_directory(path)
+        self.__flusher = threading.Thread(target=self.__flush_loop, name="journal-flusher", daemon=True)
+        self.__flusher.start()
+
+    def __segment_path(self, number: int) -> str:
+        return os.path.join(self.__path, segment_name(number))
+
+    def __segments(self) -> list[int]:
+        return sorted(int(match.group(1)) for name in os.listdir(self.__path) if (match := SEGMENT_PATTERN.match(name)))
+
+    def __recover(self) -> int:
+        """loads the snapshot and replays the segments after it; returns the last segment number seen"""
+        covered = 0
+        with gc_paused():
+            snapshot_path = os.path.join(self.__path, SNAPSHOT_NAME)
+            if os.path.exists(snapshot_path):
+                with open(snapshot_path, "rb") as stream:
+                    if stream.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                        raise ValueError(f"{snapshot_path} is not an applicant snapshot")
+                    frames = read_frames(stream)
+                    _, (covered, count) = next(frames)
+                    for _, chunk in frames:
+                        for applicant_id, state in chunk:
+                            self.__store.put(applicant_id, Applicant._from_state(state))
+                if len(self.__store) != count:
+                    raise ValueError(f"{snapshot_path} holds {len(self.__store)} of its {count} applicants")
+            segments = [number for number in self.__segments() if number > covered]
+            for number in segments:
+                self.__replay(number, last=number == segments[-1])
+        return max(segments[-1] if segments else 0, covered)
+
+    def __replay(self, number: int, last: bool) -> None:
+        path = self.__segment_path(number)
+        end = 0
+        with open(path, "rb") as stream:
+            for end, (op, applicant_id, state) in read_frames(stream):
+                if op == "d":
+                    self.__store.remove(applicant_id)
+                elif op == "r":
+                    self.__store.replace(applicant_id, Applicant._from_state(state))
+                else:
+                    self.__store.put(applicant_id, Applicant._from_state(state))
+            size = stream.seek(0, os.SEEK_END)
+        if end < size:
+            if not last:
+                raise ValueError(f"{path} is corrupt at offset {end}")
+            # the tail of the newest segment was torn by a crash; those entries were never acknowledged as durable
+            with open(path, "r+b") as stream:
+                stream.truncate(end)
+
+    def __check_open(self) -> None:
+        if self.__closed:
+            raise ValueError("journal is closed")
+
+    def __append(self, op: str, applicant_id: int, state: Optional[tuple]) -> None:
+        # called with __lock held, right after the change was applied to the in-memory store, so that
+        # a compaction's copy of the store always matches the segment boundary
+        self.__pending.append(encode_frame((op, applicant_id, state)))
+        self.__appended += 1
+        self.__segment_entries += 1
+
+    def __compact_if_due(self) -> None:
+        if self.__segment_entries >= self.__compact_after and self.__compaction is None:
+            self.compact()
+
+    def __flush_loop(self) -> None:
+        with self.__lock:
+            while not self.__closed:
+                self.__flushed.wait(self.__commit_interval)
+                if self.__pending:
+                    self.__flush_locked()
+
+    def __flush_locked(self) -> None:
+        # called with __lock held; the writing and fsync happen after releasing it, so appends
+        # keep going while the disk catches up, and __io_lock keeps the flushes in order
+        pending, self.__pending = self.__pending, []
+        target = self.__appended
+        stream = self.__stream
+        self.__io_lock.acquire()
+        self.__lock.release()
+        try:
+            stream.write(b"".join(pending))
+            stream.flush()
+            os.fsync(stream.fileno())
+        finally:
+            self.__io_lock.release()
+            self.__lock.acquire()
+        self.__durable = max(self.__durable, target)
+        self.__flushed.notify_all()
+
+    def sync(self) -> None:
+        """blocks until every entry appended so far is on disk"""
+        with self.__lock:
+            target = self.__appended
+            while self.__durable < target:
+                if self.__pending:
+                    self.__flush_locked()
+                else:
+                    self.__flushed.wait()
+
+    def compact(self) -> None:
+        """starts a new segment and snapshots the store as of that point in a background thread"""
+        with self.__lock:
+            if self.__compaction is not None or self.__closed:
+                return
+            if self.__pending:
+                self.__flush_locked()
+                # the flush lets go of the lock while it syncs, so another compaction or close() may have started meanwhile
+                if self.__compaction is not None or self.__closed:
+                    return
+            self.__io_lock.acquire()
+            try:
+                self.__stream.close()
+                covered = self.__segment
+                self.__segment += 1
+                self.__segment_entries = 0
+                self.__stream = open(self.__segment_path(self.__segment), "ab")
+            finally:
+                self.__io_lock.release()
+            # writes apply to the store and the journal together under __lock, so the copy is the state after segment `covered`
+            applicants = self.__store.copy()
+            self.__compaction = threading.Thread(target=self.__write_snapshot, args=(applicants, covered), name="journal-compaction", daemon=True)
+            self.__compaction.start()
+
+    def __write_snapshot(self, applicants: dict[int, Applicant], covered: int) -> None:
+        try:
+            path = os.path.join(self.__path, SNAPSHOT_NAME)
+            temporary = path + ".tmp"
+            with open(temporary, "wb") as stream:
+                stream.write(SNAPSHOT_MAGIC)
+                stream.write(encode_frame((covered, len(applicants))))
+                ids = sorted(applicants)
+                for start in range(0, len(ids), SNAPSHOT_CHUNK):
+                    stream.write(encode_frame([(applicant_id, applicants[applicant_id]._state()) for applicant_id in ids[start:start + SNAPSHOT_CHUNK]]))
+                stream.flush()
+                os.fsync(stream.fileno())
+            os.replace(temporary, path)
+            fsync_directory(self.__path)
+            for number in self.__segments():
+                if number <= covered:
+                    os.remove(self.__segment_path(number))
+        finally:
+            with self.__lock:
+                self.__compaction = None
+
+    def wait_for_compaction(self) -> None:
+        compaction = self.__compaction
+        if compaction is not None:
+            compaction.join()
+
+    def __len__(self) -> int:
+        return len(self.__store)
+
+    def __iter__(self) -> Iterator[tuple[int, Applicant]]:
+        return iter(self.__store)
+
+    def get(self, applicant_id: int) -> Applicant:
+        return self.__store.get(applicant_id)
+
+    def get_many(self, applicant_ids: Iterable[int]) -> list[Applicant]:
+        return self.__store.get_many(applicant_ids)
+
+    def contains_identity(self, identity: tuple[str, int]) -> bool:
+        return self.__store.contains_identity(identity)
+
+    def find_by_name(self, full_name: str) -> list[tuple[int, Applicant]]:
+        return self.__store.find_by_name(full_name)
+
+    def insert(self, applicant: Applicant) -> int:
+        state = applicant._state()
+        with self.__lock:
+            self.__check_open()
+            applicant_id = self.__store.insert(applicant)
+            self.__append("i", applicant_id, state)
+        self.__compact_if_due()
+        return applicant_id
+
+    def replace(self, applicant_id: int, applicant: Applicant) -> None:
+        state = applicant._state()
+        with self.__lock:
+            self.__check_open()
+            self.__store.replace(applicant_id, applicant)
+            self.__append("r", applicant_id, state)
+        self.__compact_if_due()
+
+    def remove(self, applicant_id: int) -> None:
+        with self.__lock:
+            self.__check_open()
+            self.__store.remove(applicant_id)
+            self.__append("d", applicant_id, None)
+        self.__compact_if_due()
+
+    def put(self, applicant_id: int, applicant: Applicant) -> None:
+        state = applicant._state()
+        with self.__lock:
+            self.__check_open()
+            self.__store.put(applicant_id, applicant)
+            # replays as an insert, which restores the id
+            self.__append("i", applicant_id, state)
+        self.__compact_if_due()
+
+    @contextlib.contextmanager
+    def batch(self) -> Iterator[None]:
+        # the block ends with one fsync for all of its writes, so a bulk load is durable once it returns
+        self.__batch_depth += 1
+        try:
+            yield
+        finally:
+            self.__batch_depth -= 1
+            if not self.__batch_depth:
+                self.sync()
+
+    def close(self) -> None:
+        if self.__closed:
+            return
+        self.sync()
+        self.wait_for_compaction()
+        with self.__lock:
+            self.__closed = True
+            self.__flushed.notify_all()
+        self.__flusher.join()
+        with self.__io_lock:
+            self.__stream.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the application manager on a journal directory that survives crashes")
+    parser.add_argument("directory", nargs="?", default="applications.journal")
+    args = parser.parse_args()
+    application = Application(JournaledStore(args.directory))
+    try:
+        run_manager(application)
+    finally:
+        application.close()
+
+
+if __name__ == "__main__":
+    main()
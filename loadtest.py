@@ -0,0 +1,141 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Any, Optional
+from urllib.parse import quote
+
+from app import Application
+from benchmark import latency_summary
+from records import applicant_record
+from service import ApplicationService
+from synthetic import SyntheticApplicants
+
+
+# relative weights of the requests each client sends, adjustable with --mix
+DEFAULT_MIX = {"add": 3, "search": 5, "list": 1, "update": 1, "delete": 0}
+
+
+class Client:
+    """one keep-alive connection sending requests one after another"""
+    def __init__(self, host: str, port: int) -> None:
+        self.__host = host
+        self.__port = port
+        self.__reader: Optional[asyncio.StreamReader] = None
+        self.__writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, target: str, payload: Any = None) -> tuple[int, Any]:
+        if self.__writer is None:
+            self.__reader, self.__writer = await asyncio.open_connection(self.__host, self.__port)
+        body = b"" if payload is None else json.dumps(payload).encode()
+        self.__writer.write(f"{method} {target} HTTP/1.1\r\nHost: {self.__host}\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        await self.__writer.drain()
+        head = (await self.__reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+        status = int(head[0].split(" ", 2)[1])
+        headers = {name.strip().lower(): value.strip() for name, _, value in (line.partition(":") for line in head[1:] if line)}
+        data = await self.__reader.readexactly(int(headers.get("content-length", 0)))
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, json.loads(data) if data else None
+
+    async def close(self) -> None:
+        if self.__writer is not None:
+            self.__writer.close()
+            await self.__writer.wait_closed()
+            self.__writer = None
+
+
+async def run_client(client: Client, requests: int, generator: SyntheticApplicants, next_index: list[int], known: int,
+                     mix: dict[str, int], seed: int, latencies: dict[str, list[float]], statuses: dict[int, int]) -> None:
+    rng = random.Random(seed)
+    kinds, weights = zip(*((kind, weight) for kind, weight in mix.items() if weight))
+    for _ in range(requests):
+        kind = rng.choices(kinds, weights)[0]
+        if kind == "add":
+            index = next_index[0]
+            next_index[0] += 1
+            method, target, payload = "POST", "/applications", applicant_record(generator.applicant(index))
+        elif kind == "search":
+            method, target, payload = "GET", f"/applications?name={quote(generator.full_name(rng.randrange(known)))}", None
+        elif kind == "list":
+            method, target, payload = "GET", f"/applications?offset={rng.randrange(max(1, known - 50))}&limit=50", None
+        elif kind == "update":
+            index = rng.randrange(known)
+            method, target, payload = "PUT", f"/applications?name={quote(generator.full_name(index))}", applicant_record(generator.applicant(index))
+        else:
+            method, target, payload = "DELETE", f"/applications?name={quote(generator.full_name(rng.randrange(known)))}", None
+        start = time.perf_counter()
+        status, _ = await client.request(method, target, payload)
+        latencies[kind].append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+    await client.close()
+
+
+def parse_mix(text: str) -> dict[str, int]:
+    mix = dict.fromkeys(DEFAULT_MIX, 0)
+    for part in text.split(","):
+        kind, _, weight = part.partition(":")
+        if kind.strip() not in mix:
+            raise argparse.ArgumentTypeError(f"unknown request kind '{kind}', expected some of {', '.join(mix)}")
+        mix[kind.strip()] = int(weight or 1)
+    return mix
+
+
+async def load_test(args: argparse.Namespace) -> None:
+    generator = SyntheticApplicants(args.seed, unique_names=True)
+    service = None
+    host, port = args.host, args.port
+    if args.serve:
+        application = Application()
+        with application.batch():
+            for applicant in generator.applicants(args.preload):
+                application.add_applicant(applicant, verbose=False)
+        service = ApplicationService(application, host, 0, args.workers)
+        await service.start()
+        port = service.port
+    try:
+        setup = Client(host, port)
+        _, health = await setup.request("GET", "/health")
+        await setup.close()
+        # with --serve the first `preload` applicants are there; against another server, searches may miss
+        known = max(1, health["applications"])
+        latencies: dict[str, list[float]] = {kind: [] for kind in DEFAULT_MIX}
+        statuses: dict[int, int] = {}
+        next_index = [max(known, args.preload)]
+        per_client = args.requests // args.connections
+        start = time.perf_counter()
+        await asyncio.gather(*(run_client(Client(host, port), per_client, generator, next_index, known, args.mix, args.seed + n, latencies, statuses)
+                               for n in range(args.connections)))
+        elapsed = time.perf_counter() - start
+    finally:
+        if service is not None:
+            await service.close()
+    total = sum(len(timings) for timings in latencies.values())
+    print(f"{total:,} requests over {args.connections} connections in {elapsed:.2f} s: {total / elapsed:,.0f} requests/s")
+    print(f"statuses: {', '.join(f'{status}: {count:,}' for status, count in sorted(statuses.items()))}")
+    print(f"{'request':>10} {'count':>8} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for kind, timings in latencies.items():
+        if timings:
+            summary = latency_summary(timings)
+            print(f"{kind:>10} {len(timings):>8,} {summary['p50_us'] / 1e3:>9.2f} {summary['p90_us'] / 1e3:>9.2f} "
+                  f"{summary['p99_us'] / 1e3:>9.2f} {summary['max_us'] / 1e3:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the HTTP/JSON service on localhost")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--serve", action="store_true", help="start a service in this process instead of using a running one")
+    parser.add_argument("--preload", type=int, default=10_000, help="applicants loaded into the --serve pool")
+    parser.add_argument("--workers", type=int, default=8, help="worker threads of the --serve service")
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=10_000)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="request weights, e.g. add:3,search:5,list:1,update:1,delete:0")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(load_test(args))
+
+
+if __name__ == "__main__":
+    main()
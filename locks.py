@@ -0,0 +1,105 @@
+import threading
+from typing import Optional
+
+
+class RWLock:
+    """many readers or one writer
+
+    writers take precedence: once a writer is waiting, new readers queue behind it so that a steady
+    stream of searches can't starve updates. both sides are reentrant, and the thread holding the
+    write lock may also read; releasing the write lock before those reads downgrades it to a read lock
+    """
+    def __init__(self) -> None:
+        self.__mutex = threading.Lock()
+        self.__condition = threading.Condition(self.__mutex)
+        self.__readers = 0
+        self.__readers_waiting = 0
+        self.__writer: Optional[int] = None
+        self.__writer_depth = 0
+        self.__writers_waiting = 0
+        # per-thread read depth, so a nested read doesn't queue behind a waiting writer and deadlock
+        self.__local = threading.local()
+        # plain objects rather than @contextmanager generators: every search goes through these
+        self.__reading = _Guard(self.acquire_read, self.release_read)
+        self.__writing = _Guard(self.acquire_write, self.release_write)
+
+    def reading(self) -> "_Guard":
+        return self.__reading
+
+    def writing(self) -> "_Guard":
+        return self.__writing
+
+    def acquire_read(self) -> None:
+        local = self.__local
+        depth = getattr(local, "depth", 0)
+        if depth or self.__writer == threading.get_ident():
+            local.depth = depth + 1
+            return
+        with self.__mutex:
+            if self.__writer is not None or self.__writers_waiting:
+                self.__readers_waiting += 1
+                try:
+                    while self.__writer is not None or self.__writers_waiting:
+                        self.__condition.wait()
+                finally:
+                    self.__readers_waiting -= 1
+            self.__readers += 1
+        local.depth = 1
+
+    def release_read(self) -> None:
+        local = self.__local
+        local.depth -= 1
+        if local.depth or self.__writer == threading.get_ident():
+            return
+        with self.__mutex:
+            self.__readers -= 1
+            # waking the condition is the expensive part, so it only happens when a writer waits
+            if not self.__readers and self.__writers_waiting:
+                self.__condition.notify_all()
+
+    def acquire_write(self) -> None:
+        me = threading.get_ident()
+        if self.__writer == me:
+            self.__writer_depth += 1
+            return
+        if getattr(self.__local, "depth", 0):
+            raise RuntimeError("cannot upgrade a read lock to a write lock")
+        with self.__mutex:
+            if self.__writer is None and not self.__readers:
+                self.__writer = me
+                self.__writer_depth = 1
+                return
+            self.__writers_waiting += 1
+            try:
+                while self.__writer is not None or self.__readers:
+                    self.__condition.wait()
+            finally:
+                self.__writers_waiting -= 1
+            self.__writer = me
+            self.__writer_depth = 1
+
+    def release_write(self) -> None:
+        self.__writer_depth -= 1
+        if self.__writer_depth:
+            return
+        with self.__mutex:
+            self.__writer = None
+            # reads taken under the write lock weren't counted; the ones still held now count as a reader
+            if getattr(self.__local, "depth", 0):
+                self.__readers += 1
+            if self.__readers_waiting or self.__writers_waiting:
+                self.__condition.notify_all()
+
+
+class _Guard:
+    __slots__ = ("__enter", "__exit")
+
+    def __init__(self, enter, exit) -> None:
+        self.__enter = enter
+        self.__exit = exit
+
+    def __enter__(self) -> None:
+        self.__enter()
+
+    def __exit__(self, *exc_info) -> None:
+        self.__exit()
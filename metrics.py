@@ -0,0 +1,326 @@
+import argparse
+import bisect
+import cProfile
+import contextlib
+import functools
+import json
+import math
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from types import FrameType
+from typing import Any, Callable, Iterator, Optional
+
+from app import Application, InputFormatter, main as run_manager
+
+
+# the Application methods that get timed; internal helpers are left alone so that every call is counted once
+OPERATIONS = ("add_applicant", "search_application", "search_keywords", "search_prefix", "search_fuzzy", "born_between",
+              "education_at_least", "studied_during", "employed_during", "find", "explain", "delete_where", "update_where",
+              "update_application", "delete_application", "display_applications")
+# the InputFormatter checks whose ValueErrors are counted as validation failures
+VALIDATORS = ("phoneNumberFormatter", "emailFormatChecker", "dateFormatter")
+# upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+PROMETHEUS_PREFIX = "job_applications"
+
+
+class OperationStats:
+    __slots__ = ("calls", "errors", "seconds", "buckets", "allocated")
+
+    def __init__(self, buckets: int) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.buckets = [0] * buckets
+        # net bytes the calls left allocated; only tracked while tracemalloc is on
+        self.allocated = 0
+
+
+class Metrics:
+    """call counts, latency histograms and validation failures, safe to update from many threads"""
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.__bounds = buckets if buckets[-1] == math.inf else buckets + (math.inf,)
+        self.__lock = threading.Lock()
+        self.__operations: dict[str, OperationStats] = {}
+        self.__validation_failures: dict[str, int] = {}
+
+    @property
+    def bounds(self) -> tuple[float, ...]:
+        return self.__bounds
+
+    def observe(self, operation: str, seconds: float, failed: bool = False, allocated: int = 0) -> None:
+        bucket = bisect.bisect_left(self.__bounds, seconds)
+        with self.__lock:
+            stats = self.__operations.get(operation)
+            if stats is None:
+                stats = self.__operations[operation] = OperationStats(len(self.__bounds))
+            stats.calls += 1
+            stats.errors += failed
+            stats.seconds += seconds
+            stats.buckets[bucket] += 1
+            stats.allocated += allocated
+
+    def validation_failed(self, field: str) -> None:
+        with self.__lock:
+            self.__validation_failures[field] = self.__validation_failures.get(field, 0) + 1
+
+    def reset(self) -> None:
+        with self.__lock:
+            self.__operations.clear()
+            self.__validation_failures.clear()
+
+    def as_dict(self) -> dict[str, Any]:
+        """a consistent copy of everything recorded, with the histograms as per-bucket (not cumulative) counts"""
+        with self.__lock:
+            return {
+                "operations": {
+                    name: {"calls": stats.calls, "errors": stats.errors, "seconds": stats.seconds,
+                           "buckets": dict(zip(map(_bound, self.__bounds), stats.buckets)), "allocated_bytes": stats.allocated}
+                    for name, stats in sorted(self.__operations.items())
+                },
+                "validation_failures": dict(sorted(self.__validation_failures.items())),
+            }
+
+    def to_prometheus(self) -> str:
+        """the metrics in the Prometheus text exposition format"""
+        snapshot = self.as_dict()
+        operations = snapshot["operations"]
+        calls = f"{PROMETHEUS_PREFIX}_operation_calls_total"
+        errors = f"{PROMETHEUS_PREFIX}_operation_errors_total"
+        seconds = f"{PROMETHEUS_PREFIX}_operation_seconds"
+        allocated = f"{PROMETHEUS_PREFIX}_operation_allocated_bytes_total"
+        failures = f"{PROMETHEUS_PREFIX}_validation_failures_total"
+        lines = [f"# HELP {calls} Application operations called.", f"# TYPE {calls} counter"]
+        lines += [f'{calls}{{operation="{name}"}} {stats["calls"]}' for name, stats in operations.items()]
+        lines += [f"# HELP {errors} Application operations that raised.", f"# TYPE {errors} counter"]
+        lines += [f'{errors}{{operation="{name}"}} {stats["errors"]}' for name, stats in operations.items()]
+        lines += [f"# HELP {seconds} Latency of application operations.", f"# TYPE {seconds} histogram"]
+        for name, stats in operations.items():
+            cumulative = 0
+            for bound, count in stats["buckets"].items():
+                cumulative += count
+                lines.append(f'{seconds}_bucket{{operation="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{seconds}_sum{{operation="{name}"}} {stats["seconds"]!r}')
+            lines.append(f'{seconds}_count{{operation="{name}"}} {stats["calls"]}')
+        lines += [f"# HELP {allocated} Net bytes left allocated by application operations while tracing memory.",
+                  f"# TYPE {allocated} counter"]
+        lines += [f'{allocated}{{operation="{name}"}} {stats["allocated_bytes"]}' for name, stats in operations.items()]
+        lines += [f"# HELP {failures} Input rejected by validation, by field.", f"# TYPE {failures} counter"]
+        lines += [f'{failures}{{field="{field}"}} {count}' for field, count in snapshot["validation_failures"].items()]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        # written aside and renamed, so that a node exporter's textfile collector never reads half a file
+        _write_atomically(path, self.to_prometheus())
+
+    def write_json(self, path: str) -> None:
+        _write_atomically(path, json.dumps(self.as_dict(), indent=2) + "\n")
+
+
+def _bound(bound: float) -> str:
+    return "+Inf" if bound == math.inf else repr(bound)
+
+
+def _write_atomically(path: str, text: str) -> None:
+    temporary = path + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as stream:
+        stream.write(text)
+    os.replace(temporary, path)
+
+
+def _failed_field(frame: FrameType, formatter: InputFormatter, value: str) -> str:
+    """names the field a rejected value was meant for, from the frame that called the validator
+
+    setters are named after their property; constructors and set_emergency_contact get the
+    parameter the value was passed as
+    """
+    code = frame.f_code
+    owner = type(formatter).__name__
+    if isinstance(getattr(type(formatter), code.co_name, None), property):
+        return f"{owner}.{code.co_name}"
+    local_values = frame.f_locals
+    for name in code.co_varnames[1:code.co_argcount]:
+        if local_values.get(name) is value:
+            return f"{owner}.{name}" if code.co_name == "__init__" else f"{owner}.{code.co_name}.{name}"
+    return f"{owner}.{code.co_name}"
+
+
+class Instrumentation:
+    """records metrics for Application operations and InputFormatter validation while enabled
+
+    enabling replaces the methods in OPERATIONS and VALIDATORS on the classes with wrappers, and
+    disabling puts the originals back, so code that runs without instrumentation pays nothing for
+    it. the classes are patched rather than single instances, which covers every Application and
+    store in the process, but only one Instrumentation can be enabled at a time. validation in
+    importer worker processes isn't seen by the parent's metrics
+
+    with `profile` the operations also run under cProfile (one call at a time: calls made while
+    another thread is being profiled are only timed), and with `trace_memory` tracemalloc runs for
+    as long as the instrumentation is enabled, so memory_top() can show where the pool's memory went
+    """
+    __active: Optional["Instrumentation"] = None
+    __active_lock = threading.Lock()
+
+    def __init__(self, metrics: Optional[Metrics] = None, profile: bool = False, trace_memory: bool = False) -> None:
+        self.__metrics = metrics if metrics is not None else Metrics()
+        self.__profile = profile
+        self.__trace_memory = trace_memory
+        self.__profiler: Optional[cProfile.Profile] = None
+        self.__profiling = threading.Lock()
+        self.__originals: list[tuple[type, str, Callable]] = []
+        self.__started_tracing = False
+
+    @property
+    def metrics(self) -> Metrics:
+        return self.__metrics
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.__originals)
+
+    def enable(self) -> "Instrumentation":
+        with Instrumentation.__active_lock:
+            if Instrumentation.__active is not None:
+                raise RuntimeError("instrumentation is already enabled")
+            Instrumentation.__active = self
+        if self.__profile:
+            self.__profiler = cProfile.Profile()
+        if self.__trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.__started_tracing = True
+        for name in OPERATIONS:
+            self.__patch(Application, name, self.__timed(name, Application.__dict__[name]))
+        for name in VALIDATORS:
+            self.__patch(InputFormatter, name, self.__validated(InputFormatter.__dict__[name]))
+        return self
+
+    def disable(self) -> None:
+        with Instrumentation.__active_lock:
+            if Instrumentation.__active is not self:
+                return
+            Instrumentation.__active = None
+        for owner, name, original in reversed(self.__originals):
+            setattr(owner, name, original)
+        self.__originals.clear()
+        if self.__started_tracing:
+            tracemalloc.stop()
+            self.__started_tracing = False
+
+    def __enter__(self) -> "Instrumentation":
+        return self.enable()
+
+    def __exit__(self, *exc_info) -> None:
+        self.disable()
+
+    def __patch(self, owner: type, name: str, wrapper: Callable) -> None:
+        self.__originals.append((owner, name, owner.__dict__[name]))
+        setattr(owner, name, wrapper)
+
+    def __timed(self, operation: str, method: Callable) -> Callable:
+        observe = self.__metrics.observe
+        clock = time.perf_counter
+        profiler = self.__profiler
+        profiling = self.__profiling
+        trace_memory = self.__trace_memory
+
+        # one wrapper per combination of options, so the common case checks nothing on every call
+        if profiler is None and not trace_memory:
+            @functools.wraps(method)
+            def timed(*args, **kwargs):
+                start = clock()
+                failed = True
+                try:
+                    result = method(*args, **kwargs)
+                    failed = False
+                    return result
+                finally:
+                    observe(operation, clock() - start, failed)
+            return timed
+
+        @functools.wraps(method)
+        def traced(*args, **kwargs):
+            profiled = profiler is not None and profiling.acquire(blocking=False)
+            memory_before = tracemalloc.get_traced_memory()[0] if trace_memory else 0
+            start = clock()
+            failed = True
+            try:
+                if profiled:
+                    result = profiler.runcall(method, *args, **kwargs)
+                else:
+                    result = method(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                elapsed = clock() - start
+                if profiled:
+                    profiling.release()
+                allocated = tracemalloc.get_traced_memory()[0] - memory_before if trace_memory else 0
+                observe(operation, elapsed, failed, allocated)
+        return traced
+
+    def __validated(self, validator: Callable) -> Callable:
+        validation_failed = self.__metrics.validation_failed
+
+        @functools.wraps(validator)
+        def validated(formatter, value):
+            try:
+                return validator(formatter, value)
+            except ValueError:
+                frame = sys._getframe(1)
+                try:
+                    validation_failed(_failed_field(frame, formatter, value))
+                finally:
+                    del frame
+                raise
+        return validated
+
+    def profile_stats(self) -> Optional[pstats.Stats]:
+        """the cProfile statistics collected so far, or None without `profile`"""
+        if self.__profiler is None:
+            return None
+        with self.__profiling:
+            return pstats.Stats(self.__profiler)
+
+    def memory_top(self, limit: int = 10) -> list[tuple[str, int, int]]:
+        """the source lines holding the most traced memory, as (file:line, bytes, blocks)"""
+        if not tracemalloc.is_tracing():
+            return []
+        statistics = tracemalloc.take_snapshot().statistics("lineno")[:limit]
+        return [(f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", stat.size, stat.count) for stat in statistics]
+
+
+@contextlib.contextmanager
+def instrumented(metrics: Optional[Metrics] = None, profile: bool = False, trace_memory: bool = False) -> Iterator[Instrumentation]:
+    instrumentation = Instrumentation(metrics, profile, trace_memory)
+    with instrumentation:
+        yield instrumentation
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the application manager with operation metrics")
+    parser.add_argument("--prometheus", metavar="PATH", help="write the metrics in the Prometheus text format on exit")
+    parser.add_argument("--json", metavar="PATH", help="write the metrics as JSON on exit")
+    parser.add_argument("--profile", metavar="PATH", help="profile the operations with cProfile and dump the stats here")
+    parser.add_argument("--trace-memory", action="store_true", help="trace allocations and print the top allocation sites on exit")
+    args = parser.parse_args()
+    with instrumented(profile=args.profile is not None, trace_memory=args.trace_memory) as instrumentation:
+        try:
+            run_manager()
+        finally:
+            if args.prometheus:
+                instrumentation.metrics.write_prometheus(args.prometheus)
+            if args.json:
+                instrumentation.metrics.write_json(args.json)
+            if args.profile:
+                instrumentation.profile_stats().dump_stats(args.profile)
+            for site, size, blocks in instrumentation.memory_top():
+                print(f"{size / 1024:>10,.1f} KiB in {blocks:>8,} blocks  {site}")
+
+
+if __name__ == "__main__":
+    main()
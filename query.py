@@ -0,0 +1,320 @@
+import datetime
+from abc import ABC, abstractmethod
+from typing import Callable, Iterable, Iterator, Optional, Union
+
+from app import Applicant, ApplicantStore, EducationLevel, _as_date
+from indexes import IndexCatalog, KeywordIndex, tokenize
+
+
+DateBound = Union[datetime.date, str, None]
+
+
+def _bounds(start: Optional[datetime.date], end: Optional[datetime.date]) -> str:
+    return f"{start or '-inf'} .. {end or '+inf'}"
+
+
+class Predicate(ABC):
+    """abstract class for one condition of a Query
+
+    predicates backed by an index report an estimated number of matching ids and can list them;
+    every predicate can test a single applicant, which is how the planner applies the ones it
+    doesn't drive the lookup with
+    """
+    @abstractmethod
+    def matches(self, applicant: Applicant) -> bool:
+        pass
+
+    @abstractmethod
+    def describe(self) -> str:
+        pass
+
+    def estimate(self, indexes: IndexCatalog) -> Optional[int]:
+        """number of candidates the index would return, or None when no index can answer the predicate"""
+        return None
+
+    def candidates(self, indexes: IndexCatalog) -> Iterable[int]:
+        raise NotImplementedError(f"{type(self).__name__} has no index")
+
+    @property
+    def covered_by_index(self) -> bool:
+        """whether every candidate the index returns is a match, so the planner can skip re-checking them"""
+        return True
+
+    def __and__(self, other: Union["Predicate", "Query"]) -> "Query":
+        return Query(self) & other
+
+
+class Name(Predicate):
+    def __init__(self, full_name: str) -> None:
+        self.__full_name = full_name.casefold()
+
+    def matches(self, applicant: Applicant) -> bool:
+        return applicant.personal_info.full_name.casefold() == self.__full_name
+
+    def describe(self) -> str:
+        return f"full name = '{self.__full_name}'"
+
+    def estimate(self, indexes: IndexCatalog) -> Optional[int]:
+        return len(indexes.names.exact(self.__full_name))
+
+    def candidates(self, indexes: IndexCatalog) -> Iterable[int]:
+        return indexes.names.exact(self.__full_name)
+
+
+class NamePrefix(Predicate):
+    def __init__(self, prefix: str) -> None:
+        self.__prefix = prefix.casefold()
+
+    def matches(self, applicant: Applicant) -> bool:
+        return applicant.personal_info.full_name.casefold().startswith(self.__prefix)
+
+    def describe(self) -> str:
+        return f"full name starts with '{self.__prefix}'"
+
+    def estimate(self, indexes: IndexCatalog) -> Optional[int]:
+        return indexes.names.count_prefix(self.__prefix)
+
+    def candidates(self, indexes: IndexCatalog) -> Iterable[int]:
+        return indexes.names.with_prefix(self.__prefix)
+
+
+class Keyword(Predicate):
+    """a skill, certificate, field of study or language keyword, optionally limited to some of KeywordIndex.FIELDS"""
+    def __init__(self, term: str, fields: Optional[Iterable[str]] = None) -> None:
+        self.__term = term
+        self.__words = set(tokenize(term))
+        self.__fields = tuple(fields) if fields is not None else KeywordIndex.FIELDS
+        for field in self.__fields:
+            if field not in KeywordIndex.FIELDS:
+                raise ValueError(f"Unknown keyword field '{field}', expected one of {', '.join(KeywordIndex.FIELDS)}")
+
+    def matches(self, applicant: Applicant) -> bool:
+        tokens = KeywordIndex.tokens(applicant)
+        found: set[str] = set()
+        for field in self.__fields:
+            found |= tokens[field] & self.__words
+        return bool(self.__words) and found == self.__words
+
+    def describe(self) -> str:
+        return f"keyword '{self.__term}' in {', '.join(self.__fields)}"
+
+    def estimate(self, indexes: IndexCatalog) -> Optional[int]:
+        return len(indexes.keywords.term_postings(self.__term, self.__fields))
+
+    def candidates(self, indexes: IndexCatalog) -> Iterable[int]:
+        return indexes.keywords.term_postings(self.__term, self.__fields)
+
+
+class Skill(Keyword):
+    def __init__(self, skill: str) -> None:
+        super().__init__(skill, ("skills",))
+
+
+class Speaks(Keyword):
+    """speaks the language, optionally with a given ability ('excellent', 'good', ...) in every one of reading, writing and speaking"""
+    def __init__(self, language: str, ability: Optional[str] = None) -> None:
+        super().__init__(language, ("language",))
+        self.__language = language.casefold()
+        self.__ability = ability.casefold() if ability else None
+
+    def matches(self, applicant: Applicant) -> bool:
+        for lang in applicant.languages:
+            if lang.language.casefold() != self.__language:
+                continue
+            if self.__ability is None or all(ability.casefold() == self.__ability for ability in (lang.read_ability, lang.write_ability, lang.speak_ability)):
+                return True
+        return False
+
+    def describe(self) -> str:
+        return f"speaks '{self.__language}'" + (f" ({self.__ability})" if self.__ability else "")
+
+    @property
+    def covered_by_index(self) -> bool:
+        # the keyword index knows the language but not the abilities
+        return self.__ability is None
+
+
+class BornBetween(Predicate):
+    def __init__(self, start: DateBound, end: DateBound) -> None:
+        self.__start = _as_date(start)
+        self.__end = _as_date(end)
+
+    def matches(self, applicant: Applicant) -> bool:
+        born = applicant.personal_info.date_of_birth
+        return (self.__start is None or born >= self.__start) and (self.__end is None or born <= self.__end)
+
+    def describe(self) -> str:
+        return f"date of birth in {_bounds(self.__start, self.__end)}"
+
+    def estimate(self, indexes: IndexCatalog) -> Optional[int]:
+        return indexes.ranges.count_born_between(self.__start, self.__end)
+
+    def candidates(self, indexes: IndexCatalog) -> Iterable[int]:
+        return indexes.ranges.born_between(self.__start, self.__end)
+
+
+class EducationAtLeast(Predicate):
+    def __init__(self, lowest: EducationLevel, highest: Optional[EducationLevel] = None) -> None:
+        self.__lowest = lowest
+        self.__highest = highest
+
+    def matches(self, applicant: Applicant) -> bool:
+        return any(edu.education_level.rank >= self.__lowest.rank and (self.__highest is None or edu.education_level.rank <= self.__highest.rank)
+                   for edu in applicant.educational_background)
+
+    def describe(self) -> str:
+        return f"education level {self.__lowest.value} .. {self.__highest.value if self.__highest else 'highest'}"
+
+    def estimate(self, indexes: IndexCatalog) -> Optional[int]:
+        return indexes.ranges.count_education_level_between(self.__lowest.rank, self.__highest.rank if self.__highest else None)
+
+    def candidates(self, indexes: IndexCatalog) -> Iterable[int]:
+        return indexes.ranges.education_level_between(self.__lowest.rank, self.__highest.rank if self.__highest else None)
+
+
+class EmployedDuring(Predicate):
+    def __init__(self, start: DateBound, end: DateBound) -> None:
+        self.__start = _as_date(start)
+        self.__end = _as_date(end)
+
+    def matches(self, applicant: Applicant) -> bool:
+        return any((self.__end is None or job.emp_from <= self.__end) and (self.__start is None or job.emp_to >= self.__start)
+                   for job in applicant.work_experience)
+
+    def describe(self) -> str:
+        return f"employed during {_bounds(self.__start, self.__end)}"
+
+    def estimate(self, indexes: IndexCatalog) -> Optional[int]:
+        return indexes.ranges.count_employed_during(self.__start, self.__end)
+
+    def candidates(self, indexes: IndexCatalog) -> Iterable[int]:
+        return indexes.ranges.employed_during(self.__start, self.__end)
+
+
+class StudiedDuring(Predicate):
+    def __init__(self, start: DateBound, end: DateBound) -> None:
+        self.__start = _as_date(start)
+        self.__end = _as_date(end)
+
+    def matches(self, applicant: Applicant) -> bool:
+        return any((self.__end is None or edu.attended_from <= self.__end) and (self.__start is None or edu.attended_to >= self.__start)
+                   for edu in applicant.educational_background)
+
+    def describe(self) -> str:
+        return f"studied during {_bounds(self.__start, self.__end)}"
+
+    def estimate(self, indexes: IndexCatalog) -> Optional[int]:
+        return indexes.ranges.count_studied_during(self.__start, self.__end)
+
+    def candidates(self, indexes: IndexCatalog) -> Iterable[int]:
+        return indexes.ranges.studied_during(self.__start, self.__end)
+
+
+class Where(Predicate):
+    """any other condition, as a function of the applicant; never index-backed"""
+    def __init__(self, condition: Callable[[Applicant], bool], description: str = "custom condition") -> None:
+        self.__condition = condition
+        self.__description = description
+
+    def matches(self, applicant: Applicant) -> bool:
+        return bool(self.__condition(applicant))
+
+    def describe(self) -> str:
+        return self.__description
+
+
+def as_query(condition: Union["Query", Predicate, Callable[[Applicant], bool]]) -> "Query":
+    """accepts a Query, a single Predicate or a plain function of the applicant"""
+    if isinstance(condition, Query):
+        return condition
+    if isinstance(condition, Predicate):
+        return Query(condition)
+    if callable(condition):
+        return Query(Where(condition))
+    raise TypeError(f"Expected a Query, Predicate or callable, got {type(condition).__name__}")
+
+
+class Plan:
+    def __init__(self, driver: Optional[Predicate], estimate: Optional[int], filters: list[Predicate], considered: list[tuple[Predicate, int]], total: int) -> None:
+        self.driver = driver
+        self.estimate = estimate
+        self.filters = filters
+        self.considered = considered
+        self.total = total
+
+    def __str__(self) -> str:
+        if self.driver is None:
+            lines = [f"full scan of {self.total:,} applicants"]
+        else:
+            lines = [f"index lookup: {self.driver.describe()} (~{self.estimate:,} candidates of {self.total:,})"]
+        for predicate in self.filters:
+            lines.append(f"  filter: {predicate.describe()}")
+        for predicate, estimate in self.considered:
+            if predicate is not self.driver:
+                lines.append(f"  (index on {predicate.describe()} skipped, ~{estimate:,} candidates)")
+        return "\n".join(lines)
+
+
+class Query:
+    """all of its predicates have to hold; combine predicates and queries with &"""
+    def __init__(self, *predicates: Predicate) -> None:
+        self.__predicates: list[Predicate] = list(predicates)
+
+    @property
+    def predicates(self) -> list[Predicate]:
+        return list(self.__predicates)
+
+    def __and__(self, other: Union[Predicate, "Query"]) -> "Query":
+        if isinstance(other, Query):
+            return Query(*self.__predicates, *other.predicates)
+        return Query(*self.__predicates, other)
+
+    def plan(self, store: ApplicantStore, indexes: Optional[IndexCatalog]) -> Plan:
+        """drives the lookup with the index that promises the fewest candidates and filters the rest
+
+        without indexes (None) the plan is a full scan
+        """
+        considered: list[tuple[Predicate, int]] = []
+        for predicate in self.__predicates if indexes is not None else ():
+            estimate = predicate.estimate(indexes)
+            if estimate is not None:
+                considered.append((predicate, estimate))
+        total = len(store)
+        driver, estimate = min(considered, key=lambda pair: pair[1]) if considered else (None, None)
+        # an index that returns most of the pool is no cheaper than one streaming scan
+        if driver is not None and estimate is not None and estimate > total // 2:
+            driver = estimate = None
+        filters = [predicate for predicate in self.__predicates if predicate is not driver or not predicate.covered_by_index]
+        return Plan(driver, estimate, filters, considered, total)
+
+    def __candidates(self, plan: Plan, store: ApplicantStore, indexes: Optional[IndexCatalog]) -> Iterator[tuple[int, Applicant]]:
+        if plan.driver is None or indexes is None:
+            yield from store
+            return
+        ids = sorted(plan.driver.candidates(indexes))
+        # fetched in pages so a broad lookup doesn't load every candidate before the first match
+        for start in range(0, len(ids), 500):
+            page = ids[start:start + 500]
+            yield from zip(page, store.get_many(page))
+
+    def execute(self, store: ApplicantStore, indexes: IndexCatalog, limit: Optional[int] = None) -> list[Applicant]:
+        return self.run(self.plan(store, indexes), store, indexes, limit)
+
+    def run(self, plan: Plan, store: ApplicantStore, indexes: Optional[IndexCatalog], limit: Optional[int] = None) -> list[Applicant]:
+        return [applicant for _, applicant in self.select(plan, store, indexes, limit)]
+
+    def select(self, plan: Plan, store: ApplicantStore, indexes: Optional[IndexCatalog], limit: Optional[int] = None) -> list[tuple[int, Applicant]]:
+        """(id, applicant) pairs matching the query, in id order; the form bulk updates and deletes work on"""
+        found: list[tuple[int, Applicant]] = []
+        if limit is not None and limit <= 0:
+            return found
+        filters = plan.filters
+        for applicant_id, applicant in self.__candidates(plan, store, indexes):
+            if all(predicate.matches(applicant) for predicate in filters):
+                found.append((applicant_id, applicant))
+                if limit is not None and len(found) >= limit:
+                    break
+        return found
+
+    def explain(self, store: ApplicantStore, indexes: IndexCatalog) -> str:
+        return str(self.plan(store, indexes))
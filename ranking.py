@@ -0,0 +1,251 @@
+import argparse
+import heapq
+import threading
+from collections import Counter
+from operator import itemgetter
+from typing import Iterable, Optional
+
+from aggregates import EducationLevelCounts, ExperienceStats
+from app import Applicant, Application, ChangeEvent, EducationLevel
+from importer import import_applicants
+from indexes import tokenize
+from storage import SQLiteStore
+
+
+# the features a candidate is scored on, each scaled to 0..1, and how much each counts by default
+FEATURES = ("education", "experience", "languages", "skills")
+DEFAULT_WEIGHTS = {"education": 1.0, "experience": 1.0, "languages": 0.5, "skills": 2.0}
+# what the interactive form accepts for reading, writing and speaking a language
+ABILITY_SCORES = {"excellent": 1.0, "good": 0.6, "bad": 0.2}
+# experience counts fully at this many years; more doesn't raise the score further
+EXPERIENCE_CAP_YEARS = 10.0
+# without languages asked for, speaking this many languages well scores fully
+LANGUAGE_CAP = 3
+_TOP_RANK = max(level.rank for level in EducationLevel)
+
+
+class Features:
+    """what scoring needs from one applicant, extracted once and reused by every ranking"""
+    __slots__ = ("education", "experience_days", "languages", "language_breadth", "skills")
+
+    def __init__(self, applicant: Applicant) -> None:
+        level = EducationLevelCounts.highest_level(applicant)
+        self.education = (level.rank + 1) / (_TOP_RANK + 1) if level is not None else 0.0
+        self.experience_days = ExperienceStats.experience_days(applicant)
+        # language -> mean of the reading, writing and speaking abilities, the best if it's listed twice
+        self.languages: dict[str, float] = {}
+        for lang in applicant.languages:
+            abilities = (lang.read_ability, lang.write_ability, lang.speak_ability)
+            ability = sum(ABILITY_SCORES.get(a.strip().casefold(), 0.0) for a in abilities) / len(abilities)
+            name = lang.language.strip().casefold()
+            self.languages[name] = max(ability, self.languages.get(name, 0.0))
+        self.language_breadth = min(1.0, sum(self.languages.values()) / LANGUAGE_CAP)
+        self.skills = frozenset(tokenize(applicant.major_skills))
+
+
+class FeatureCache:
+    """Features for every applicant of an application, kept current by its change events
+
+    the pool is replayed once when the cache is created; after that an add or an update extracts
+    the features of that one applicant and a delete drops them, so rankings never walk the store
+    """
+    def __init__(self, application: Application) -> None:
+        self.__lock = threading.Lock()
+        self.__features: dict[int, Features] = {}
+        # how many applicants list each skill token, to tell a job description's skills from its other words
+        self.__skill_counts: Counter = Counter()
+        self.__application: Optional[Application] = application
+        application.subscribe(self.__changed, replay=True)
+
+    def __changed(self, event: ChangeEvent) -> None:
+        features = Features(event.new) if event.new is not None else None
+        with self.__lock:
+            old = self.__features.pop(event.applicant_id, None)
+            if old is not None:
+                self.__skill_counts.subtract(old.skills)
+                for skill in old.skills:
+                    if self.__skill_counts[skill] <= 0:
+                        del self.__skill_counts[skill]
+            if features is not None:
+                self.__features[event.applicant_id] = features
+                self.__skill_counts.update(features.skills)
+
+    def __len__(self) -> int:
+        return len(self.__features)
+
+    def get(self, applicant_id: int) -> Optional[Features]:
+        return self.__features.get(applicant_id)
+
+    def items(self) -> list[tuple[int, Features]]:
+        """a copy of (id, features), so that a ranking can run while the application changes"""
+        with self.__lock:
+            return list(self.__features.items())
+
+    def known_skills(self, terms: Iterable[str]) -> frozenset[str]:
+        """the terms that are in at least one applicant's skills"""
+        with self.__lock:
+            return frozenset(term for term in terms if term in self.__skill_counts)
+
+    def close(self) -> None:
+        if self.__application is not None:
+            self.__application.unsubscribe(self.__changed)
+            self.__application = None
+
+
+class JobDescription:
+    """what a ranking is for: the description's words that are someone's skill, and the languages needed
+
+    with no languages given, candidates score on how many languages they speak and how well
+    """
+    def __init__(self, text: str, languages: Iterable[str] = ()) -> None:
+        self.__text = text
+        self.__terms = frozenset(tokenize(text))
+        self.__languages = tuple(dict.fromkeys(language.strip().casefold() for language in languages))
+
+    @property
+    def text(self) -> str:
+        return self.__text
+
+    @property
+    def terms(self) -> frozenset[str]:
+        return self.__terms
+
+    @property
+    def languages(self) -> tuple[str, ...]:
+        return self.__languages
+
+
+class RankedCandidate:
+    __slots__ = ("applicant_id", "applicant", "score", "breakdown")
+
+    def __init__(self, applicant_id: int, applicant: Applicant, score: float, breakdown: dict[str, float]) -> None:
+        self.applicant_id = applicant_id
+        self.applicant = applicant
+        self.score = score
+        # feature -> weighted contribution to the score
+        self.breakdown = breakdown
+
+    def __repr__(self) -> str:
+        return f"RankedCandidate({self.applicant_id}, {self.applicant.personal_info.full_name!r}, {self.score:.3f})"
+
+
+class Ranker:
+    """scores applicants against a job description and returns the best k
+
+        ranker = Ranker(application, weights={"skills": 3.0})
+        for candidate in ranker.top(JobDescription("python, sql and docker", languages=["english"]), k=10): ...
+
+    a score is the weighted sum of the features, each between 0 and 1: the highest education level,
+    years of experience up to EXPERIENCE_CAP_YEARS, the abilities in the languages asked for, and the
+    share of the description's skills the applicant lists. top() keeps a heap of k candidates rather
+    than sorting the pool, and reads features from a FeatureCache that only re-extracts an applicant
+    when it changes. close() stops the cache following the application
+    """
+    def __init__(self, application: Application, weights: Optional[dict[str, float]] = None,
+                 experience_cap_years: float = EXPERIENCE_CAP_YEARS) -> None:
+        unknown = [name for name in (weights or {}) if name not in FEATURES]
+        if unknown:
+            raise ValueError(f"unknown feature(s) {', '.join(map(repr, unknown))}; expected some of {', '.join(FEATURES)}")
+        self.__weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        if any(weight < 0 for weight in self.__weights.values()):
+            raise ValueError("feature weights can't be negative")
+        if experience_cap_years <= 0:
+            raise ValueError("experience_cap_years has to be positive")
+        self.__experience_cap_days = experience_cap_years * ExperienceStats.DAYS_PER_YEAR
+        self.__application = application
+        self.__cache = FeatureCache(application)
+
+    @property
+    def weights(self) -> dict[str, float]:
+        return dict(self.__weights)
+
+    @property
+    def cache(self) -> FeatureCache:
+        return self.__cache
+
+    def breakdown(self, features: Features, job: JobDescription, skills: Optional[frozenset[str]] = None) -> dict[str, float]:
+        """the weighted contribution of each feature; `skills` are the job's terms known as skills"""
+        if skills is None:
+            skills = self.__cache.known_skills(job.terms)
+        weights = self.__weights
+        if job.languages:
+            languages = sum(features.languages.get(language, 0.0) for language in job.languages) / len(job.languages)
+        else:
+            languages = features.language_breadth
+        return {
+            "education": weights["education"] * features.education,
+            "experience": weights["experience"] * min(1.0, features.experience_days / self.__experience_cap_days),
+            "languages": weights["languages"] * languages,
+            "skills": weights["skills"] * (len(features.skills & skills) / len(skills) if skills else 0.0),
+        }
+
+    def score(self, applicant: Applicant, job: JobDescription) -> float:
+        return sum(self.breakdown(Features(applicant), job).values())
+
+    def top(self, job: JobDescription, k: int = 10) -> list[RankedCandidate]:
+        """the k best scoring applicants, best first; ties go to the earlier application"""
+        if k <= 0:
+            return []
+        skills = self.__cache.known_skills(job.terms)
+        w_education, w_experience = self.__weights["education"], self.__weights["experience"]
+        w_languages, w_skills = self.__weights["languages"], self.__weights["skills"]
+        cap = self.__experience_cap_days
+        wanted = job.languages
+        # the per-applicant work is the inlined sum of breakdown(); only the k winners get a breakdown
+        skill_share = w_skills / len(skills) if skills else 0.0
+
+        def scored():
+            for applicant_id, features in self.__cache.items():
+                if wanted:
+                    languages = sum(features.languages.get(language, 0.0) for language in wanted) / len(wanted)
+                else:
+                    languages = features.language_breadth
+                score = (w_education * features.education
+                         + w_experience * min(1.0, features.experience_days / cap)
+                         + w_languages * languages
+                         + skill_share * len(features.skills & skills))
+                yield score, -applicant_id, features
+        best = heapq.nlargest(k, scored(), key=itemgetter(0, 1))
+        ids = [-negated_id for _, negated_id, _ in best]
+        applicants = self.__application.store.get_many(ids)
+        return [RankedCandidate(applicant_id, applicant, score, self.breakdown(features, job, skills))
+                for applicant_id, applicant, (score, _, features) in zip(ids, applicants, best)]
+
+    def close(self) -> None:
+        self.__cache.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shortlist the applicants that best fit a job description")
+    parser.add_argument("description", help="the job description; its words that are applicants' skills are matched")
+    parser.add_argument("path", nargs="?", help="CSV or JSONL file of applications (default: the database given with --db)")
+    parser.add_argument("--format", choices=("csv", "jsonl"))
+    parser.add_argument("--db", help="SQLite database to rank")
+    parser.add_argument("-k", type=int, default=10, help="candidates to shortlist")
+    parser.add_argument("--languages", nargs="+", default=(), metavar="LANGUAGE", help="languages the job needs")
+    for feature in FEATURES:
+        parser.add_argument(f"--{feature}-weight", type=float, default=DEFAULT_WEIGHTS[feature])
+    args = parser.parse_args()
+    if not args.path and not args.db:
+        parser.error("give a file to rank, a database, or both")
+    application = Application(SQLiteStore(args.db)) if args.db else Application()
+    try:
+        if args.path:
+            import_applicants(application, args.path, fmt=args.format)
+        ranker = Ranker(application, {feature: getattr(args, f"{feature}_weight") for feature in FEATURES})
+        job = JobDescription(args.description, args.languages)
+        print("*****######******######*******######")
+        print(f"Top {args.k} of {len(application)} applications")
+        print("*****######******######*******######")
+        for position, candidate in enumerate(ranker.top(job, args.k), start=1):
+            info = candidate.applicant.personal_info
+            parts = ", ".join(f"{feature} {value:.2f}" for feature, value in candidate.breakdown.items())
+            print(f"{position:>3}. {info.full_name} <{info.email_address}>  score {candidate.score:.2f} ({parts})")
+            print(f"     skills: {candidate.applicant.major_skills}")
+        ranker.close()
+    finally:
+        application.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+from typing import Any
+
+from app import Applicant, EducationLevel, EmergencyContactLevel
+
+
+# an application record is a plain dict whose keys follow the property names of the classes in app.py:
+#
+#   {"full_name": ..., "date_of_birth": "YYYY-MM-DD", "sex": ..., "home_address": ...,
+#    "phone_number_home": ..., "phone_number_mobile": ..., "email_address": ...,
+#    "emergency_contact_primary": {"name": ..., "relationship": ..., "phone_number": ...},
+#    "emergency_contact_secondary": {...},
+#    "languages": [{"language": ..., "read_ability": ..., "write_ability": ..., "speak_ability": ...}],
+#    "education": [{"education_level": "BACHELOR", "university_name": ..., "university_location": ...,
+#                   "university_country": ..., "attended_from": ..., "attended_to": ...,
+#                   "certificates": "a,b", "main_field_of_study": ...}],
+#    "work_experience": [{"company_name": ..., "location": ..., "emp_from": ..., "emp_to": ...,
+#                         "position": ..., "reason_for_leaving": ...}],
+#    "major_skills": "python, sql"}
+#
+# the emergency contacts, languages, education and work experience entries are optional
+
+EMERGENCY_CONTACT_FIELDS = {
+    "emergency_contact_primary": EmergencyContactLevel.PRIMARY,
+    "emergency_contact_secondary": EmergencyContactLevel.SECONDARY,
+}
+
+
+def education_level(value: str) -> EducationLevel:
+    """accepts either the enum name (BACHELOR) or its display value (Bachelor's Degree)"""
+    if value in EducationLevel.__members__:
+        return EducationLevel[value]
+    try:
+        return EducationLevel(value)
+    except ValueError:
+        raise ValueError(f"ValueError: Invalid Education Level '{value}' Provided!")
+
+
+def build_applicant(record: dict[str, Any]) -> Applicant:
+    """builds an Applicant from a record, raising ValueError that names the section which failed validation"""
+    applicant = Applicant()
+    try:
+        applicant.add_personal_info(
+            record["full_name"],
+            record["date_of_birth"],
+            record["sex"],
+            record["home_address"],
+            str(record["phone_number_home"]),
+            str(record["phone_number_mobile"]),
+            record["email_address"]
+        )
+        for field, level in EMERGENCY_CONTACT_FIELDS.items():
+            contact = record.get(field)
+            if contact:
+                applicant.personal_info.set_emergency_contact(
+                    contact["name"], contact["relationship"], str(contact["phone_number"]), level
+                )
+    except KeyError as e:
+        raise ValueError(f"personal info: missing field {e}")
+    except ValueError as e:
+        raise ValueError(f"personal info: {e}")
+    try:
+        for lang in record.get("languages") or ():
+            applicant.add_language(lang["language"], lang["read_ability"], lang["write_ability"], lang["speak_ability"])
+    except KeyError as e:
+        raise ValueError(f"languages: missing field {e}")
+    try:
+        for edu in record.get("education") or ():
+            certificates = edu.get("certificates", "")
+            if not isinstance(certificates, str):
+                certificates = ",".join(certificates)
+            applicant.add_education(
+                education_level(edu["education_level"]),
+                edu["university_name"],
+                edu["university_location"],
+                edu["university_country"],
+                edu["attended_from"],
+                edu["attended_to"],
+                certificates,
+                edu["main_field_of_study"]
+            )
+    except KeyError as e:
+        raise ValueError(f"education: missing field {e}")
+    except ValueError as e:
+        raise ValueError(f"education: {e}")
+    try:
+        for experience in record.get("work_experience") or ():
+            applicant.add_work_experience(
+                experience["company_name"],
+                experience["location"],
+                experience["emp_from"],
+                experience["emp_to"],
+                experience["position"],
+                experience["reason_for_leaving"]
+            )
+    except KeyError as e:
+        raise ValueError(f"work experience: missing field {e}")
+    except ValueError as e:
+        raise ValueError(f"work experience: {e}")
+    applicant.major_skills = record.get("major_skills", "")
+    return applicant
+
+
+def _phone(number: int) -> str:
+    # with the +1 prefix, since phoneNumberFormatter reads a leading 0 as the start of a 001 prefix
+    return f"+1{number:010d}"
+
+
+def applicant_record(applicant: Applicant) -> dict[str, Any]:
+    """the record of an applicant, in the layout above; build_applicant turns it back into an equal applicant"""
+    info = applicant.personal_info
+    record: dict[str, Any] = {
+        "full_name": info.full_name,
+        "date_of_birth": info.date_of_birth.isoformat(),
+        "sex": info.sex,
+        "home_address": info.home_address,
+        "phone_number_home": _phone(info.phone_number_home),
+        "phone_number_mobile": _phone(info.phone_number_mobile),
+        "email_address": info.email_address,
+    }
+    for field, contact in (("emergency_contact_primary", info.emergency_contact_primary), ("emergency_contact_secondary", info.emergency_contact_secondary)):
+        if contact is not None:
+            name, relationship, phone_number = contact
+            record[field] = {"name": name, "relationship": relationship, "phone_number": _phone(phone_number)}
+    record["languages"] = [
+        {"language": lang.language, "read_ability": lang.read_ability, "write_ability": lang.write_ability, "speak_ability": lang.speak_ability}
+        for lang in applicant.languages
+    ]
+    record["education"] = [
+        {"education_level": edu.education_level.name, "university_name": edu.university_name, "university_location": edu.university_location,
+         "university_country": edu.university_country, "attended_from": edu.attended_from.isoformat(), "attended_to": edu.attended_to.isoformat(),
+         "certificates": ",".join(edu.certificates), "main_field_of_study": edu.main_field_of_study}
+        for edu in applicant.educational_background
+    ]
+    record["work_experience"] = [
+        {"company_name": experience.company_name, "location": experience.location, "emp_from": experience.emp_from.isoformat(),
+         "emp_to": experience.emp_to.isoformat(), "position": experience.position, "reason_for_leaving": experience.reason_for_leaving}
+        for experience in applicant.work_experience
+    ]
+    record["major_skills"] = applicant.major_skills
+    return record
@@ -0,0 +1,329 @@
+import argparse
+import asyncio
+import contextlib
+import functools
+import inspect
+import itertools
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from app import Application
+from importer import validate_record
+from journal import JournaledStore
+from query import Name
+from records import applicant_record
+from storage import SQLiteStore
+
+
+# the service speaks a small subset of HTTP/1.1: requests with a Content-Length body (no chunked
+# uploads), keep-alive by default, and JSON in both directions
+#
+#   GET    /health                                   {"status": "ok", "applications": count}
+#   GET    /applications?offset=0&limit=50           a page of the pool
+#   GET    /applications?name=...&offset=&limit=     a page of the applicants with that full name
+#   POST   /applications                             a record, or a list of records added in one batch
+#   PUT    /applications?name=...                    replaces the applicants with that full name by the record
+#   DELETE /applications?name=...                    deletes the applicants with that full name
+#   POST   /batch                                    [{"op": "add" | "search" | "list" | "update" | "delete", ...}, ...]
+#
+# records are in the layout of records.py
+MAX_BODY = 16 * 1024 * 1024
+MAX_HEADER = 64 * 1024
+DEFAULT_PAGE = 50
+MAX_PAGE = 1_000
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 409: "Conflict",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def _page_bounds(offset: Any, limit: Any) -> tuple[int, int]:
+    try:
+        offset, limit = int(offset), int(limit)
+    except (TypeError, ValueError):
+        raise HTTPError(400, "offset and limit must be integers")
+    if offset < 0 or not 0 < limit <= MAX_PAGE:
+        raise HTTPError(400, f"offset must be at least 0 and limit between 1 and {MAX_PAGE}")
+    return offset, limit
+
+
+class ApplicationService:
+    """an asyncio HTTP/JSON front end to an Application
+
+    the event loop only parses requests and writes responses; every call into the application runs
+    on a thread pool, so a slow store (an fsync, a SQLite query on a cold cache) holds up its own
+    request and not the others. Application is safe to share between threads, so the pool's
+    `workers` serve requests side by side. a list of records posted to /applications, or the
+    operations of a /batch request, run in one application.batch() on a single worker thread
+    """
+    def __init__(self, application: Application, host: str = "127.0.0.1", port: int = 8080, workers: int = 8) -> None:
+        self.__application = application
+        self.__host = host
+        self.__port = port
+        self.__executor = ThreadPoolExecutor(workers, thread_name_prefix="service")
+        self.__server: Optional[asyncio.AbstractServer] = None
+        # the tasks serving open connections and their writers; close() closes them, idle keep-alive ones included
+        self.__connections: dict[asyncio.Task, asyncio.StreamWriter] = {}
+        self.__operations: dict[str, Callable[..., tuple[int, Any]]] = {
+            "add": self.__add, "search": self.__search, "list": self.__list, "update": self.__update, "delete": self.__delete,
+        }
+        self.__signatures = {name: inspect.signature(operation) for name, operation in self.__operations.items()}
+
+    @property
+    def port(self) -> int:
+        """the port listened on, which is the one picked by the system when started with port 0"""
+        if self.__server is None:
+            return self.__port
+        return self.__server.sockets[0].getsockname()[1]
+
+    async def start(self) -> None:
+        self.__server = await asyncio.start_server(self.__serve_connection, self.__host, self.__port, limit=MAX_HEADER)
+
+    async def serve_forever(self) -> None:
+        if self.__server is None:
+            await self.start()
+        await self.__server.serve_forever()
+
+    async def close(self) -> None:
+        if self.__server is not None:
+            self.__server.close()
+            # closing the transport ends a connection's read with an IncompleteReadError; cancelling
+            # its task instead would have asyncio log the CancelledError
+            for writer in self.__connections.values():
+                writer.close()
+            await asyncio.gather(*self.__connections, return_exceptions=True)
+            await self.__server.wait_closed()
+        self.__executor.shutdown(wait=True)
+
+    async def __run(self, operation: Callable, *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self.__executor, functools.partial(operation, *args))
+
+    async def __serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self.__connections[task] = writer
+        try:
+            while True:
+                try:
+                    request = await self.__read_request(reader)
+                except HTTPError as e:
+                    self.__write_response(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                try:
+                    status, payload = await self.__dispatch(method, target, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except Exception as e:
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+                keep_alive = headers.get("connection", "").lower() != "close"
+                self.__write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.__connections.pop(task, None)
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+
+    @staticmethod
+    async def __read_request(reader: asyncio.StreamReader) -> Optional[tuple[str, str, dict[str, str], bytes]]:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            if e.partial.strip():
+                raise HTTPError(400, "incomplete request")
+            return None
+        except asyncio.LimitOverrunError:
+            raise HTTPError(413, "request headers are too large")
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HTTPError(400, "chunked request bodies are not supported; send a Content-Length")
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HTTPError(400, "malformed Content-Length")
+        if length > MAX_BODY:
+            raise HTTPError(413, f"request bodies are limited to {MAX_BODY} bytes")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, body
+
+    @staticmethod
+    def __write_response(writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool) -> None:
+        body = json.dumps(payload).encode()
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+
+    async def __dispatch(self, method: str, target: str, body: bytes) -> tuple[int, Any]:
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if url.path == "/health":
+            if method != "GET":
+                raise HTTPError(405, "use GET")
+            return 200, {"status": "ok", "applications": await self.__run(len, self.__application)}
+        if url.path == "/batch":
+            if method != "POST":
+                raise HTTPError(405, "use POST")
+            operations = self.__json(body)
+            if not isinstance(operations, list):
+                raise HTTPError(400, "a batch is a list of operations")
+            return 200, {"results": await self.__run(self.__batch, operations)}
+        if url.path != "/applications":
+            raise HTTPError(404, f"no such resource '{url.path}'")
+        if method == "GET":
+            if "name" in query:
+                return await self.__run(self.__search, query["name"], query.get("offset", 0), query.get("limit", DEFAULT_PAGE))
+            return await self.__run(self.__list, query.get("offset", 0), query.get("limit", DEFAULT_PAGE))
+        if method == "POST":
+            records = self.__json(body)
+            if isinstance(records, list):
+                return 200, {"results": await self.__run(self.__batch, [{"op": "add", "record": record} for record in records])}
+            return await self.__run(self.__add, records)
+        if method in ("PUT", "DELETE"):
+            if "name" not in query:
+                raise HTTPError(400, "the full name to change goes in the 'name' parameter")
+            if method == "PUT":
+                return await self.__run(self.__update, query["name"], self.__json(body))
+            return await self.__run(self.__delete, query["name"])
+        raise HTTPError(405, f"{method} is not supported on /applications")
+
+    @staticmethod
+    def __json(body: bytes) -> Any:
+        try:
+            return json.loads(body)
+        except ValueError as e:
+            raise HTTPError(400, f"the body is not valid JSON: {e}")
+
+    # the operations below run on the worker threads and return (status, payload)
+
+    def __batch(self, operations: list[Any]) -> list[dict[str, Any]]:
+        results = []
+        with self.__application.batch():
+            for operation in operations:
+                try:
+                    status, payload = self.__operation(operation)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except Exception as e:
+                    # a failing operation gets its own result and the rest of the batch still runs
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+                results.append({"status": status, **payload})
+        return results
+
+    def __operation(self, operation: Any) -> tuple[int, Any]:
+        if not isinstance(operation, dict) or operation.get("op") not in self.__operations:
+            raise HTTPError(400, f"an operation is an object with an 'op' of {', '.join(self.__operations)}")
+        arguments = {key: value for key, value in operation.items() if key != "op"}
+        # checked against the signature up front, so that a TypeError from inside the operation isn't mistaken for bad arguments
+        try:
+            self.__signatures[operation["op"]].bind(**arguments)
+        except TypeError as e:
+            raise HTTPError(400, f"bad arguments for '{operation['op']}': {e}")
+        return self.__operations[operation["op"]](**arguments)
+
+    @staticmethod
+    def __build(record: Any):
+        # validate_record turns every kind of malformed record, wrong types and empty fields included, into a ValueError
+        try:
+            return validate_record(record)
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+
+    @staticmethod
+    def __name(name: Any) -> str:
+        if not isinstance(name, str):
+            raise HTTPError(400, "a name is a string")
+        return name
+
+    def __add(self, record: Any) -> tuple[int, Any]:
+        if self.__application.add_applicant(self.__build(record), verbose=False):
+            return 201, {"added": True}
+        return 409, {"added": False, "error": "this applicant has already applied"}
+
+    def __search(self, name: str, offset: Any = 0, limit: Any = DEFAULT_PAGE) -> tuple[int, Any]:
+        offset, limit = _page_bounds(offset, limit)
+        matches = self.__application.search_application(self.__name(name))
+        return 200, self.__page(matches[offset:offset + limit], offset, limit, len(matches))
+
+    def __list(self, offset: Any = 0, limit: Any = DEFAULT_PAGE) -> tuple[int, Any]:
+        offset, limit = _page_bounds(offset, limit)
+        total = len(self.__application)
+        return 200, self.__page(list(itertools.islice(self.__application, offset, offset + limit)), offset, limit, total)
+
+    @staticmethod
+    def __page(applicants: list, offset: int, limit: int, total: int) -> dict[str, Any]:
+        end = offset + len(applicants)
+        return {"total": total, "offset": offset, "limit": limit, "next_offset": end if end < total else None,
+                "applications": [applicant_record(applicant) for applicant in applicants]}
+
+    def __update(self, name: str, record: Any) -> tuple[int, Any]:
+        new_applicant = self.__build(record)
+        updated = self.__application.update_where(Name(self.__name(name)), lambda _: new_applicant)
+        if not updated:
+            return 404, {"updated": 0, "error": f"no applicant is named '{name}'"}
+        return 200, {"updated": updated}
+
+    def __delete(self, name: str) -> tuple[int, Any]:
+        deleted = self.__application.delete_where(Name(self.__name(name)))
+        if not deleted:
+            return 404, {"deleted": 0, "error": f"no applicant is named '{name}'"}
+        return 200, {"deleted": deleted}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the application manager over HTTP/JSON")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=8, help="threads that call into the application")
+    storage = parser.add_mutually_exclusive_group()
+    storage.add_argument("--db", help="SQLite database to serve (default: an in-memory pool)")
+    storage.add_argument("--journal", help="journal directory to serve")
+    args = parser.parse_args()
+    if args.db:
+        application = Application(SQLiteStore(args.db))
+    elif args.journal:
+        application = Application(JournaledStore(args.journal))
+    else:
+        application = Application()
+
+    async def serve() -> None:
+        service = ApplicationService(application, args.host, args.port, args.workers)
+        await service.start()
+        print(f"Serving {len(application)} applications on http://{args.host}:{service.port}")
+        try:
+            await service.serve_forever()
+        finally:
+            await service.close()
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        application.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,462 @@
+import argparse
+import contextlib
+import heapq
+import itertools
+import math
+import multiprocessing
+import os
+import pickle
+import sys
+import threading
+import zlib
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Iterable, Iterator, Optional, TextIO, Union
+
+from app import Applicant, ApplicantStore, Application, EducationLevel, main as run_manager, render_application
+from importer import gc_paused
+from indexes import edit_distance, token_budget, tokenize
+from query import Where
+
+# applicants per round trip when iterating the pool, and rendered applications per page of a report
+SCAN_PAGE = 1_000
+RENDER_PAGE = 200
+# replies at least this large are unpickled with the collector paused
+BULK_REPLY_BYTES = 1 << 16
+
+
+def shard_of(identity: tuple[str, int], shards: int) -> int:
+    """the shard that owns an applicant identity
+
+    crc32 rather than hash(), whose value for strings changes from one process to the next
+    """
+    full_name, mobile = identity
+    return zlib.crc32(f"{full_name}\0{mobile}".encode()) % shards
+
+
+def _fuzzy_rank(query: str, query_tokens: list[str], full_name: str, max_distance: int) -> tuple[int, int, str]:
+    # the key NameIndex.fuzzy ranks its matches by, so that the shards' best matches merge in the same order
+    name = full_name.casefold()
+    name_tokens = tokenize(name)
+    score = 0
+    for token in query_tokens:
+        budget = min(max_distance, token_budget(token))
+        distances = [edit_distance(token, name_token, budget) for name_token in name_tokens]
+        score += min((distance for distance in distances if distance <= budget), default=max_distance + 1)
+    return score, edit_distance(query, name), name
+
+
+class ShardWorker:
+    """the Application of one shard and the operations the parent process sends it"""
+    # Application methods forwarded as they are
+    FORWARDED = frozenset(("search_application", "search_keywords", "search_prefix", "search_fuzzy", "born_between",
+                           "education_at_least", "studied_during", "employed_during", "find", "explain", "delete_where"))
+    OPERATIONS = frozenset(("length", "contains", "add", "update_application", "delete_application", "update_where",
+                            "open_scan", "next_page", "render_page", "close_scan", "begin_batch", "end_batch"))
+
+    def __init__(self, application: Application, shard: int, shards: int) -> None:
+        self.__application = application
+        self.__shard = shard
+        self.__shards = shards
+        self.__scans: dict[int, Iterator[Applicant]] = {}
+        self.__scan_ids = itertools.count()
+        self.__batches = contextlib.ExitStack()
+
+    def handle(self, name: str, args: tuple) -> Any:
+        if name in self.FORWARDED:
+            return getattr(self.__application, name)(*args)
+        if name in self.OPERATIONS:
+            return getattr(self, name)(*args)
+        raise ValueError(f"unknown shard operation '{name}'")
+
+    def length(self) -> int:
+        return len(self.__application)
+
+    def contains(self, identity: tuple[str, int]) -> bool:
+        return self.__application.store.contains_identity(identity)
+
+    def add(self, applicant: Applicant) -> bool:
+        return self.__application.add_applicant(applicant, verbose=False)
+
+    def __evict_foreign(self, applicants: list[Applicant]) -> list[Applicant]:
+        # replacements whose identity hashes to another shard are taken out here and returned for the parent to re-add there
+        moved = {applicant.identity: applicant for applicant in applicants if shard_of(applicant.identity, self.__shards) != self.__shard}
+        if moved:
+            self.__application.delete_where(Where(lambda applicant: applicant.identity in moved, "moved to another shard"))
+        return list(moved.values())
+
+    def update_application(self, full_name: str, new_applicant: Applicant) -> tuple[int, list[Applicant]]:
+        matches = len(self.__application.search_application(full_name))
+        if not matches:
+            return 0, []
+        self.__application.update_application(full_name, new_applicant)
+        return matches, self.__evict_foreign([new_applicant])
+
+    def delete_application(self, full_name: str) -> int:
+        matches = len(self.__application.search_application(full_name))
+        if matches:
+            self.__application.delete_application(full_name)
+        return matches
+
+    def update_where(self, condition: Any, update: Callable[[Applicant], Applicant]) -> tuple[int, list[Applicant]]:
+        replacements: list[Applicant] = []
+
+        def recorded(applicant: Applicant) -> Applicant:
+            replacement = update(applicant)
+            replacements.append(replacement)
+            return replacement
+        return self.__application.update_where(condition, recorded), self.__evict_foreign(replacements)
+
+    def open_scan(self, skip: int = 0) -> int:
+        scan = next(self.__scan_ids)
+        self.__scans[scan] = itertools.islice(iter(self.__application), skip, None)
+        return scan
+
+    def next_page(self, scan: int, count: int) -> list[Applicant]:
+        page = list(itertools.islice(self.__scans.get(scan, ()), count))
+        if len(page) < count:
+            self.__scans.pop(scan, None)
+        return page
+
+    def render_page(self, scan: int, number: int, count: int) -> list[str]:
+        return [render_application(number + i, applicant) for i, applicant in enumerate(self.next_page(scan, count))]
+
+    def close_scan(self, scan: int) -> None:
+        self.__scans.pop(scan, None)
+
+    def begin_batch(self) -> None:
+        self.__batches.enter_context(self.__application.batch())
+
+    def end_batch(self) -> None:
+        self.__batches.close()
+
+
+def _serve(connection: Connection, store_factory: Optional[Callable[[int], ApplicantStore]], shard: int, shards: int) -> None:
+    application = Application(store_factory(shard) if store_factory is not None else None)
+    worker = ShardWorker(application, shard, shards)
+    # the parent prints the banners; the shards' own would interleave
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            while True:
+                try:
+                    request = connection.recv()
+                except EOFError:
+                    break
+                if request is None:
+                    break
+                name, args = request
+                try:
+                    reply = (True, worker.handle(name, args))
+                except Exception as e:
+                    reply = (False, e)
+                try:
+                    connection.send(reply)
+                except (pickle.PicklingError, AttributeError, TypeError) as e:
+                    connection.send((False, RuntimeError(f"shard {shard} could not send the result of {name}: {e}")))
+        finally:
+            worker.end_batch()
+            application.close()
+
+
+class ShardedApplication:
+    """an applicant pool partitioned across worker processes, with the methods of Application
+
+    every applicant lives in the shard that shard_of() assigns its (full name, mobile) identity to,
+    each shard an Application of its own in a separate process, so the pool can outgrow one heap and
+    scans use more than one core. adds and membership tests go to the owning shard; searches, bulk
+    updates and reports run on every shard at once and their results are merged, in shard order
+    except for search_prefix and search_fuzzy, which are ranked across shards as Application ranks them
+
+    conditions and update functions passed to find, delete_where and update_where are sent to the
+    shards, so they have to be picklable: predicates from query.py and module-level functions work,
+    lambdas don't. change events (Application.subscribe) stay inside the shard processes and aren't
+    offered here. a replacement whose identity belongs to another shard is moved there, so unlike
+    Application.update_application it doesn't keep the old applicant's place in the listing, and
+    several applicants replaced by the same record end up as one
+    """
+    def __init__(self, shards: Optional[int] = None, store_factory: Optional[Callable[[int], ApplicantStore]] = None) -> None:
+        """`store_factory(shard)` opens each shard's store inside its process (a MemoryStore by default)"""
+        count = shards or os.cpu_count() or 1
+        self.__connections: list[Connection] = []
+        self.__processes: list[multiprocessing.Process] = []
+        # a connection carries one request and its reply at a time
+        self.__locks = [threading.Lock() for _ in range(count)]
+        # held by whatever has requests out to several shards at once, so two of them never wait on each other's shards
+        self.__fan_lock = threading.RLock()
+        self.__closed = False
+        for shard in range(count):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_serve, args=(child, store_factory, shard, count), name=f"shard-{shard}", daemon=True)
+            process.start()
+            child.close()
+            self.__connections.append(parent)
+            self.__processes.append(process)
+
+    @property
+    def shards(self) -> int:
+        return len(self.__connections)
+
+    def __send(self, shard: int, name: str, args: tuple) -> None:
+        # takes the shard's lock, which the matching __receive releases
+        self.__locks[shard].acquire()
+        try:
+            self.__connections[shard].send((name, args))
+        except (pickle.PicklingError, AttributeError, TypeError) as e:
+            self.__locks[shard].release()
+            raise TypeError(f"the arguments of {name} can't be sent to the shard processes ({e}); "
+                            "use predicates and module-level functions rather than lambdas") from e
+        except BaseException:
+            self.__locks[shard].release()
+            raise
+
+    def __receive(self, shard: int) -> Any:
+        try:
+            data = self.__connections[shard].recv_bytes()
+            # a large reply holds thousands of applicants, whose unpickling would otherwise set off collections
+            with gc_paused() if len(data) >= BULK_REPLY_BYTES else contextlib.nullcontext():
+                ok, value = pickle.loads(data)
+        finally:
+            self.__locks[shard].release()
+        if not ok:
+            raise value
+        return value
+
+    def __call(self, shard: int, name: str, *args: Any) -> Any:
+        self.__send(shard, name, args)
+        return self.__receive(shard)
+
+    def __scatter(self, requests: dict[int, tuple[str, tuple]]) -> dict[int, Any]:
+        """sends every request before waiting for any reply, so the shards work in parallel"""
+        sent: list[int] = []
+        failure: Optional[BaseException] = None
+        with self.__fan_lock:
+            try:
+                for shard, (name, args) in requests.items():
+                    self.__send(shard, name, args)
+                    sent.append(shard)
+            except BaseException as e:
+                failure = e
+            results: dict[int, Any] = {}
+            # every reply is collected even after a failure, or the connections would fall out of step
+            for shard in sent:
+                try:
+                    results[shard] = self.__receive(shard)
+                except BaseException as e:
+                    failure = failure or e
+        if failure is not None:
+            raise failure
+        return results
+
+    def __fan_out(self, name: str, *args: Any) -> list[Any]:
+        results = self.__scatter({shard: (name, args) for shard in range(self.shards)})
+        return [results[shard] for shard in range(self.shards)]
+
+    @staticmethod
+    def __concatenated(results: Iterable[list[Applicant]]) -> list[Applicant]:
+        return list(itertools.chain.from_iterable(results))
+
+    @property
+    def applicants(self) -> list[Applicant]:
+        return list(self)
+
+    def __len__(self) -> int:
+        return sum(self.__fan_out("length"))
+
+    def __iter__(self) -> Iterator[Applicant]:
+        for shard in range(self.shards):
+            scan = self.__call(shard, "open_scan", 0)
+            try:
+                while True:
+                    page = self.__call(shard, "next_page", scan, SCAN_PAGE)
+                    yield from page
+                    if len(page) < SCAN_PAGE:
+                        break
+            finally:
+                self.__call(shard, "close_scan", scan)
+
+    def __contains__(self, applicant: object) -> bool:
+        if not isinstance(applicant, Applicant):
+            return False
+        return self.__call(shard_of(applicant.identity, self.shards), "contains", applicant.identity)
+
+    @contextlib.contextmanager
+    def batch(self) -> Iterator[None]:
+        self.__fan_out("begin_batch")
+        try:
+            yield
+        finally:
+            self.__fan_out("end_batch")
+
+    def close(self) -> None:
+        if self.__closed:
+            return
+        self.__closed = True
+        for shard, connection in enumerate(self.__connections):
+            with self.__locks[shard], contextlib.suppress(OSError):
+                connection.send(None)
+        for process, connection in zip(self.__processes, self.__connections):
+            process.join()
+            connection.close()
+
+    def add_applicant(self, applicant: Applicant, verbose: bool = True) -> bool:
+        added = self.__call(shard_of(applicant.identity, self.shards), "add", applicant)
+        if verbose:
+            print("*****######******######*******######")
+            print("Application added successfully!" if added else "You have already applied for this job!")
+            print("*****######******######*******######")
+        return added
+
+    def search_application(self, full_name: str) -> list[Applicant]:
+        return self.__concatenated(self.__fan_out("search_application", full_name))
+
+    def search_keywords(self, terms: Union[str, Iterable[str]], fields: Optional[Iterable[str]] = None, match_all: bool = True) -> list[Applicant]:
+        if not isinstance(terms, str):
+            terms = list(terms)
+        return self.__concatenated(self.__fan_out("search_keywords", terms, None if fields is None else list(fields), match_all))
+
+    def search_prefix(self, prefix: str, k: int = 10) -> list[Applicant]:
+        merged = self.__concatenated(self.__fan_out("search_prefix", prefix, k))
+
+        def completion(applicant: Applicant) -> tuple[int, str]:
+            name = applicant.personal_info.full_name.casefold()
+            return len(name), name
+        return heapq.nsmallest(k, merged, key=completion)
+
+    def search_fuzzy(self, full_name: str, max_distance: int = 2, k: int = 10) -> list[Applicant]:
+        merged = self.__concatenated(self.__fan_out("search_fuzzy", full_name, max_distance, k))
+        query = full_name.casefold()
+        tokens = tokenize(query)
+        return heapq.nsmallest(k, merged, key=lambda applicant: _fuzzy_rank(query, tokens, applicant.personal_info.full_name, max_distance))
+
+    def born_between(self, start: Any, end: Any) -> list[Applicant]:
+        return self.__concatenated(self.__fan_out("born_between", start, end))
+
+    def education_at_least(self, lowest: EducationLevel, highest: Optional[EducationLevel] = None) -> list[Applicant]:
+        return self.__concatenated(self.__fan_out("education_at_least", lowest, highest))
+
+    def studied_during(self, start: Any, end: Any) -> list[Applicant]:
+        return self.__concatenated(self.__fan_out("studied_during", start, end))
+
+    def employed_during(self, start: Any, end: Any) -> list[Applicant]:
+        return self.__concatenated(self.__fan_out("employed_during", start, end))
+
+    def find(self, condition: Any, limit: Optional[int] = None) -> list[Applicant]:
+        return self.__concatenated(self.__fan_out("find", condition, limit))[:limit]
+
+    def explain(self, condition: Any) -> str:
+        return "\n".join(f"shard {shard}:\n{plan}" for shard, plan in enumerate(self.__fan_out("explain", condition)))
+
+    def delete_where(self, condition: Any) -> int:
+        return sum(self.__fan_out("delete_where", condition))
+
+    def __rehome(self, moved: Iterable[list[Applicant]]) -> None:
+        for applicant in itertools.chain.from_iterable(moved):
+            self.__call(shard_of(applicant.identity, self.shards), "add", applicant)
+
+    def update_where(self, condition: Any, update: Callable[[Applicant], Applicant]) -> int:
+        results = self.__fan_out("update_where", condition, update)
+        self.__rehome(moved for _, moved in results)
+        return sum(count for count, _ in results)
+
+    def update_application(self, full_name: str, new_applicant: Applicant) -> None:
+        results = self.__fan_out("update_application", full_name, new_applicant)
+        self.__rehome(moved for _, moved in results)
+        updated = sum(count for count, _ in results)
+        for _ in range(updated):
+            print("*****######******######*******######")
+            print("Application updated successfully!")
+            print("*****######******######*******######")
+        if not updated:
+            print("*****######******######*******######")
+            print(f"Applicant with name '{full_name}' doesn't exist!")
+            print("*****######******######*******######")
+
+    def delete_application(self, full_name: str) -> None:
+        deleted = sum(self.__fan_out("delete_application", full_name))
+        for _ in range(deleted):
+            print("*****######******######*******######")
+            print("Application deleted successfully!")
+            print("*****######******######*******######")
+        if not deleted:
+            print("*****######******######*******######")
+            print(f"Applicant with name '{full_name}' doesn't exist!")
+            print("*****######******######*******######")
+
+    def render_applications(self, applicants: Iterable[Applicant], offset: int = 0, limit: Optional[int] = None) -> Iterator[str]:
+        stop = None if limit is None else offset + limit
+        for i, applicant in enumerate(itertools.islice(applicants, offset, stop), offset + 1):
+            yield render_application(i, applicant)
+
+    def display_applications(self, applicants: Iterable[Applicant], offset: int = 0, limit: Optional[int] = None, sink: Optional[TextIO] = None) -> int:
+        """like Application.display_applications; the whole pool (applicants=self) is rendered by the shards in parallel"""
+        sink = sink if sink is not None else sys.stdout
+        if applicants is self:
+            # the pipelined display keeps several shards busy and goes back to each of them, so it
+            # holds the fan-out lock throughout rather than deadlock against a fan-out holding the
+            # shard it wants next
+            with self.__fan_lock:
+                shown = self.__display_pool(offset, limit, sink)
+        else:
+            shown = 0
+            for chunk in self.render_applications(applicants, offset, limit):
+                sink.write(chunk)
+                shown += 1
+        if not shown:
+            sink.write("*****######******######*******######\n"
+                       "No applications found!\n"
+                       "*****######******######*******######\n")
+        return shown
+
+    def __display_pool(self, offset: int, limit: Optional[int], sink: TextIO) -> int:
+        # the pool is listed shard after shard; work out which part of each shard falls in the requested window
+        stop = math.inf if limit is None else offset + limit
+        windows: list[tuple[int, int, int, int]] = []
+        position = 0
+        for shard, length in enumerate(self.__fan_out("length")):
+            start, end = max(offset, position), min(stop, position + length)
+            if start < end:
+                windows.append((shard, start - position, end - start, start + 1))
+            position += length
+        scans = self.__scatter({shard: ("open_scan", (skip,)) for shard, skip, _, _ in windows})
+        pending: set[int] = set()
+        shown = 0
+        try:
+            # every shard renders its first page right away; each later page is requested before the
+            # previous one is written out, so the shards keep rendering while the sink is busy
+            for shard, _, count, number in windows:
+                self.__send(shard, "render_page", (scans[shard], number, min(count, RENDER_PAGE)))
+                pending.add(shard)
+            for shard, _, count, number in windows:
+                remaining = count
+                while shard in pending:
+                    requested = min(remaining, RENDER_PAGE)
+                    pending.discard(shard)
+                    chunks = self.__receive(shard)
+                    remaining -= len(chunks)
+                    number += len(chunks)
+                    if remaining > 0 and len(chunks) == requested:
+                        self.__send(shard, "render_page", (scans[shard], number, min(remaining, RENDER_PAGE)))
+                        pending.add(shard)
+                    for chunk in chunks:
+                        sink.write(chunk)
+                    shown += len(chunks)
+        finally:
+            for shard in pending:
+                with contextlib.suppress(Exception):
+                    self.__receive(shard)
+            self.__scatter({shard: ("close_scan", (scan,)) for shard, scan in scans.items()})
+        return shown
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the application manager on a pool sharded across worker processes")
+    parser.add_argument("--shards", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    application = ShardedApplication(args.shards)
+    try:
+        run_manager(application)
+    finally:
+        application.close()
+
+
+if __name__ == "__main__":
+    main()
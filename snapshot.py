@@ -0,0 +1,318 @@
+import argparse
+import bisect
+import heapq
+import mmap
+import os
+import pickle
+import struct
+from typing import BinaryIO, Iterable, Iterator, Optional, Sequence
+
+from app import Applicant, ApplicantStore, Application, main as run_manager
+
+
+# a snapshot is one file, opened with mmap and decoded one applicant at a time:
+#
+#   header        magic, format version, applicant count, next id, offsets of the two tables below
+#   records       every applicant's _state() tuple, pickled
+#   record table  one fixed-width (id, offset, length) row per applicant, sorted by id
+#   name table    one fixed-width offset per applicant into the name entries, sorted by (casefolded name, id)
+#   name entries  (id, mobile number, key length, name length), the casefolded key and the full name as UTF-8
+#
+# the tables are what make opening instant: get() bisects the record table and decodes a single
+# record, and name lookups and duplicate checks bisect the name table without decoding anything
+SNAPSHOT_MAGIC = b"JAMSNAPB"
+SNAPSHOT_VERSION = 1
+HEADER = struct.Struct("<8sH6xQQQQ")
+RECORD_ROW = struct.Struct("<QQQ")
+NAME_ROW = struct.Struct("<Q")
+NAME_ENTRY = struct.Struct("<QQHH")
+
+
+def encode_applicant(applicant: Applicant) -> bytes:
+    return pickle.dumps(applicant._state(), protocol=5)
+
+
+def decode_applicant(data: bytes) -> Applicant:
+    return Applicant._from_state(pickle.loads(data))
+
+
+def _write(path: str, records: Iterable[tuple[int, bytes, str, int]], next_id: Optional[int] = None) -> int:
+    """writes (id, encoded record, full name, mobile number) rows in id order to `path` atomically; returns the count"""
+    temporary = path + ".tmp"
+    rows: list[tuple[int, int, int]] = []
+    names: list[tuple[str, int, int, str]] = []
+    with open(temporary, "wb") as stream:
+        stream.write(bytes(HEADER.size))
+        offset = HEADER.size
+        for applicant_id, data, full_name, mobile in records:
+            stream.write(data)
+            rows.append((applicant_id, offset, len(data)))
+            names.append((full_name.casefold(), applicant_id, mobile, full_name))
+            offset += len(data)
+        record_table = offset
+        for row in rows:
+            stream.write(RECORD_ROW.pack(*row))
+        name_table = record_table + RECORD_ROW.size * len(rows)
+        names.sort()
+        entry = name_table + NAME_ROW.size * len(names)
+        encoded = []
+        for key, applicant_id, mobile, full_name in names:
+            key_bytes, name_bytes = key.encode(), full_name.encode()
+            stream.write(NAME_ROW.pack(entry))
+            encoded.append(NAME_ENTRY.pack(applicant_id, mobile, len(key_bytes), len(name_bytes)) + key_bytes + name_bytes)
+            entry += len(encoded[-1])
+        stream.writelines(encoded)
+        if next_id is None:
+            next_id = rows[-1][0] + 1 if rows else 0
+        stream.seek(0)
+        stream.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(rows), next_id, record_table, name_table))
+        stream.flush()
+        os.fsync(stream.fileno())
+    os.replace(temporary, path)
+    return len(rows)
+
+
+def write_snapshot(path: str, applicants: Iterable[tuple[int, Applicant]]) -> int:
+    """writes (id, applicant) pairs, e.g. any ApplicantStore, to a snapshot file and returns how many were written"""
+    return _write(path, ((applicant_id, encode_applicant(applicant), applicant.personal_info.full_name, applicant.personal_info.phone_number_mobile)
+                         for applicant_id, applicant in sorted(applicants, key=lambda pair: pair[0])))
+
+
+class _Column(Sequence):
+    """one column of a fixed-width table in the mapped file, indexable so that bisect can search it"""
+    def __init__(self, buffer: mmap.mmap, offset: int, count: int, row: struct.Struct, field: int) -> None:
+        self.__buffer = buffer
+        self.__offset = offset
+        self.__count = count
+        self.__row = row
+        self.__field = field
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.__count:
+            raise IndexError(index)
+        return self.__row.unpack_from(self.__buffer, self.__offset + index * self.__row.size)[self.__field]
+
+
+class _NameKeys(Sequence):
+    def __init__(self, buffer: mmap.mmap, entries: _Column) -> None:
+        self.__buffer = buffer
+        self.__entries = entries
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __getitem__(self, index) -> str:
+        offset = self.__entries[index]
+        key_length = NAME_ENTRY.unpack_from(self.__buffer, offset)[2]
+        start = offset + NAME_ENTRY.size
+        return self.__buffer[start:start + key_length].decode()
+
+
+class SnapshotStore(ApplicantStore):
+    """serves applicants straight from a memory-mapped snapshot file, decoding each one only when it is read
+
+    opening the store maps the file and reads its header, whatever the number of applicants. writes
+    go to an in-memory overlay on top of the file until save() writes a new snapshot; a missing file
+    starts an empty store
+    """
+    def __init__(self, path: str) -> None:
+        self.__path = path
+        self.__file: Optional[BinaryIO] = None
+        self.__buffer: Optional[mmap.mmap] = None
+        self.__reset()
+        # overlay: applicants inserted or replaced since the file was written, and the file's ids
+        # that were replaced or removed
+        self.__changed: dict[int, Applicant] = {}
+        self.__shadowed: set[int] = set()
+        self.__changed_names: dict[str, set[int]] = {}
+        self.__open()
+
+    def __reset(self) -> None:
+        self.__count = self.__next_id = 0
+        self.__ids: Sequence[int] = ()
+        self.__offsets: Sequence[int] = ()
+        self.__lengths: Sequence[int] = ()
+        self.__name_entries: Sequence[int] = ()
+        self.__name_keys: Sequence[str] = ()
+
+    def __open(self) -> None:
+        if not os.path.exists(self.__path) or os.path.getsize(self.__path) == 0:
+            return
+        self.__file = open(self.__path, "rb")
+        self.__buffer = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, next_id, record_table, name_table = HEADER.unpack_from(self.__buffer, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"{self.__path} is not an applicant snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"{self.__path} has snapshot format version {version}, expected {SNAPSHOT_VERSION}")
+        self.__count = count
+        self.__next_id = next_id
+        self.__ids = _Column(self.__buffer, record_table, count, RECORD_ROW, 0)
+        self.__offsets = _Column(self.__buffer, record_table, count, RECORD_ROW, 1)
+        self.__lengths = _Column(self.__buffer, record_table, count, RECORD_ROW, 2)
+        self.__name_entries = _Column(self.__buffer, name_table, count, NAME_ROW, 0)
+        self.__name_keys = _NameKeys(self.__buffer, self.__name_entries)
+
+    def __release(self) -> None:
+        if self.__buffer is not None:
+            self.__buffer.close()
+            self.__file.close()
+        self.__file = self.__buffer = None
+        self.__reset()
+
+    def __position(self, applicant_id: int) -> Optional[int]:
+        """row of the id in the record table, or None if the file doesn't hold it"""
+        position = bisect.bisect_left(self.__ids, applicant_id)
+        if position < self.__count and self.__ids[position] == applicant_id:
+            return position
+        return None
+
+    def __raw(self, position: int) -> bytes:
+        offset = self.__offsets[position]
+        return self.__buffer[offset:offset + self.__lengths[position]]
+
+    def __in_file(self, applicant_id: int) -> bool:
+        return applicant_id not in self.__shadowed and self.__position(applicant_id) is not None
+
+    def __file_names(self, key: str) -> Iterator[tuple[int, int, str]]:
+        """(id, mobile number, full name) of the file's applicants whose casefolded name is `key`"""
+        position = bisect.bisect_left(self.__name_keys, key)
+        while position < self.__count:
+            offset = self.__name_entries[position]
+            applicant_id, mobile, key_length, name_length = NAME_ENTRY.unpack_from(self.__buffer, offset)
+            start = offset + NAME_ENTRY.size
+            if self.__buffer[start:start + key_length].decode() != key:
+                return
+            if applicant_id not in self.__shadowed:
+                yield applicant_id, mobile, self.__buffer[start + key_length:start + key_length + name_length].decode()
+            position += 1
+
+    def __len__(self) -> int:
+        return self.__count - len(self.__shadowed) + len(self.__changed)
+
+    def __iter__(self) -> Iterator[tuple[int, Applicant]]:
+        # the file's rows merged with the overlay by id; like MemoryStore, later writes don't disturb a running scan
+        for applicant_id, position in self.__merged():
+            if position < 0:
+                applicant = self.__changed.get(applicant_id)
+                if applicant is not None:
+                    yield applicant_id, applicant
+            elif applicant_id not in self.__shadowed:
+                yield applicant_id, decode_applicant(self.__raw(position))
+
+    def __merged(self) -> Iterator[tuple[int, int]]:
+        """(id, row) for the file's applicants and (id, -1) for the overlay's, in id order"""
+        return heapq.merge(((self.__ids[position], position) for position in range(self.__count)),
+                           ((applicant_id, -1) for applicant_id in sorted(self.__changed)))
+
+    def get(self, applicant_id: int) -> Applicant:
+        applicant = self.__changed.get(applicant_id)
+        if applicant is not None:
+            return applicant
+        position = self.__position(applicant_id) if applicant_id not in self.__shadowed else None
+        if position is None:
+            raise KeyError(applicant_id)
+        return decode_applicant(self.__raw(position))
+
+    def contains_identity(self, identity: tuple[str, int]) -> bool:
+        full_name, mobile = identity
+        if any(self.__changed[applicant_id].identity == identity for applicant_id in self.__changed_names.get(full_name.casefold(), ())):
+            return True
+        return any(entry[1] == mobile and entry[2] == full_name for entry in self.__file_names(full_name.casefold()))
+
+    def find_by_name(self, full_name: str) -> list[tuple[int, Applicant]]:
+        key = full_name.casefold()
+        ids = sorted([applicant_id for applicant_id, _, _ in self.__file_names(key)] + list(self.__changed_names.get(key, ())))
+        return [(applicant_id, self.get(applicant_id)) for applicant_id in ids]
+
+    def __track(self, applicant_id: int, applicant: Applicant) -> None:
+        self.__changed[applicant_id] = applicant
+        self.__changed_names.setdefault(applicant.personal_info.full_name.casefold(), set()).add(applicant_id)
+
+    def __untrack(self, applicant_id: int) -> None:
+        key = self.__changed.pop(applicant_id).personal_info.full_name.casefold()
+        ids = self.__changed_names[key]
+        ids.discard(applicant_id)
+        if not ids:
+            del self.__changed_names[key]
+
+    def insert(self, applicant: Applicant) -> int:
+        applicant_id = self.__next_id
+        self.__next_id += 1
+        self.__track(applicant_id, applicant)
+        return applicant_id
+
+    def replace(self, applicant_id: int, applicant: Applicant) -> None:
+        if applicant_id in self.__changed:
+            self.__untrack(applicant_id)
+        elif self.__in_file(applicant_id):
+            self.__shadowed.add(applicant_id)
+        else:
+            raise KeyError(applicant_id)
+        self.__track(applicant_id, applicant)
+
+    def remove(self, applicant_id: int) -> None:
+        if applicant_id in self.__changed:
+            self.__untrack(applicant_id)
+        elif self.__in_file(applicant_id):
+            self.__shadowed.add(applicant_id)
+        else:
+            raise KeyError(applicant_id)
+
+    def put(self, applicant_id: int, applicant: Applicant) -> None:
+        # an id the file holds stays shadowed, and the overlay takes its place
+        self.__track(applicant_id, applicant)
+        self.__next_id = max(self.__next_id, applicant_id + 1)
+
+    def save(self) -> None:
+        """writes the file's applicants and the overlay to a new snapshot, copying unchanged records without decoding them
+
+        the store is briefly unmapped, so nothing else may use it meanwhile
+        """
+        def records() -> Iterator[tuple[int, bytes, str, int]]:
+            file_names = {}
+            for position in range(self.__count):
+                offset = self.__name_entries[position]
+                applicant_id, mobile, key_length, name_length = NAME_ENTRY.unpack_from(self.__buffer, offset)
+                start = offset + NAME_ENTRY.size + key_length
+                file_names[applicant_id] = (self.__buffer[start:start + name_length].decode(), mobile)
+            for applicant_id, position in self.__merged():
+                if position < 0:
+                    applicant = self.__changed[applicant_id]
+                    yield (applicant_id, encode_applicant(applicant), applicant.personal_info.full_name, applicant.personal_info.phone_number_mobile)
+                elif applicant_id not in self.__shadowed:
+                    yield (applicant_id, self.__raw(position), *file_names[applicant_id])
+        next_id = self.__next_id
+        saved = self.__path + ".new"
+        _write(saved, records(), next_id)
+        # the old mapping has to go before the new file takes its name, which some platforms refuse otherwise
+        self.__release()
+        os.replace(saved, self.__path)
+        self.__changed.clear()
+        self.__shadowed.clear()
+        self.__changed_names.clear()
+        self.__open()
+        self.__next_id = max(self.__next_id, next_id)
+
+    def close(self) -> None:
+        self.__release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the application manager on a snapshot file, saving it on exit")
+    parser.add_argument("snapshot", nargs="?", default="applications.snapshot")
+    args = parser.parse_args()
+    store = SnapshotStore(args.snapshot)
+    application = Application(store)
+    try:
+        run_manager(application)
+        store.save()
+    finally:
+        application.close()
+
+
+if __name__ == "__main__":
+    main()
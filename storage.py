@@ -0,0 +1,313 @@
+import argparse
+import contextlib
+import datetime
+import sqlite3
+import threading
+from typing import Any, Iterable, Iterator, Optional
+
+from app import Applicant, ApplicantStore, Application, main as run_manager
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS applicants (
+    id INTEGER PRIMARY KEY,
+    full_name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    date_of_birth TEXT NOT NULL,
+    sex TEXT NOT NULL,
+    home_address TEXT NOT NULL,
+    phone_number_home INTEGER NOT NULL,
+    phone_number_mobile INTEGER NOT NULL,
+    email_address TEXT NOT NULL,
+    emergency_primary_name TEXT,
+    emergency_primary_relationship TEXT,
+    emergency_primary_phone INTEGER,
+    emergency_secondary_name TEXT,
+    emergency_secondary_relationship TEXT,
+    emergency_secondary_phone INTEGER,
+    major_skills TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS applicants_name_key ON applicants (name_key);
+CREATE INDEX IF NOT EXISTS applicants_identity ON applicants (full_name, phone_number_mobile);
+
+CREATE TABLE IF NOT EXISTS languages (
+    applicant_id INTEGER NOT NULL REFERENCES applicants (id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    language TEXT NOT NULL,
+    read_ability TEXT NOT NULL,
+    write_ability TEXT NOT NULL,
+    speak_ability TEXT NOT NULL,
+    PRIMARY KEY (applicant_id, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS languages_language ON languages (language);
+
+CREATE TABLE IF NOT EXISTS education (
+    applicant_id INTEGER NOT NULL REFERENCES applicants (id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    education_level TEXT NOT NULL,
+    university_name TEXT NOT NULL,
+    university_location TEXT NOT NULL,
+    university_country TEXT NOT NULL,
+    attended_from TEXT NOT NULL,
+    attended_to TEXT NOT NULL,
+    certificates TEXT NOT NULL,
+    main_field_of_study TEXT NOT NULL,
+    PRIMARY KEY (applicant_id, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS education_level ON education (education_level);
+
+CREATE TABLE IF NOT EXISTS work_experience (
+    applicant_id INTEGER NOT NULL REFERENCES applicants (id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    company_name TEXT NOT NULL,
+    location TEXT NOT NULL,
+    emp_from TEXT NOT NULL,
+    emp_to TEXT NOT NULL,
+    position TEXT NOT NULL,
+    reason_for_leaving TEXT NOT NULL,
+    PRIMARY KEY (applicant_id, seq)
+) WITHOUT ROWID;
+"""
+
+APPLICANT_COLUMNS = ("full_name, name_key, date_of_birth, sex, home_address, phone_number_home, phone_number_mobile, email_address, "
+                     "emergency_primary_name, emergency_primary_relationship, emergency_primary_phone, "
+                     "emergency_secondary_name, emergency_secondary_relationship, emergency_secondary_phone, major_skills")
+
+# pages of applicants are read this many at a time while iterating, so a full scan never loads the whole table
+PAGE_SIZE = 500
+
+
+def _ordinal(iso_date: str) -> int:
+    return datetime.date.fromisoformat(iso_date).toordinal()
+
+
+def _iso(ordinal: int) -> str:
+    return datetime.date.fromordinal(ordinal).isoformat()
+
+
+def _contact_columns(contact: Optional[tuple[str, str, int]]) -> tuple:
+    return contact if contact is not None else (None, None, None)
+
+
+def _contact(name: Optional[str], relationship: Optional[str], phone: Optional[int]) -> Optional[tuple[str, str, int]]:
+    return (name, relationship, phone) if name is not None else None
+
+
+class SQLiteStore(ApplicantStore):
+    """stores applicants in an SQLite database, normalized into one table per record type
+
+    the database runs in WAL mode; writes outside Application.batch() commit on their own, writes
+    inside it share one transaction that is committed every `batch_size` writes and when the block ends.
+    inside atomic() nothing is committed until the block ends, so a failure rolls all of it back
+    """
+    def __init__(self, path: str, batch_size: int = 1000) -> None:
+        self.__connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.__lock = threading.RLock()
+        self.__batch_size = batch_size
+        self.__batch_depth = 0
+        self.__pending = 0
+        self.__atomic_depth = 0
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("PRAGMA synchronous=NORMAL")
+        self.__connection.execute("PRAGMA foreign_keys=ON")
+        self.__connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self.__lock:
+            if self.__connection.in_transaction:
+                self.__connection.execute("COMMIT")
+            self.__connection.close()
+
+    @contextlib.contextmanager
+    def batch(self) -> Iterator[None]:
+        with self.__lock:
+            if self.__batch_depth == 0 and not self.__connection.in_transaction:
+                self.__connection.execute("BEGIN")
+            self.__batch_depth += 1
+            try:
+                yield
+            except BaseException:
+                self.__batch_depth -= 1
+                if self.__batch_depth == 0 and self.__connection.in_transaction:
+                    self.__connection.execute("ROLLBACK")
+                    self.__pending = 0
+                raise
+            self.__batch_depth -= 1
+            if self.__batch_depth == 0:
+                self.__commit()
+
+    @contextlib.contextmanager
+    def atomic(self) -> Iterator[None]:
+        with self.__lock, self.batch():
+            self.__atomic_depth += 1
+            try:
+                yield
+            finally:
+                self.__atomic_depth -= 1
+
+    def __commit(self) -> None:
+        if self.__connection.in_transaction:
+            self.__connection.execute("COMMIT")
+        self.__pending = 0
+
+    def __written(self) -> None:
+        # called after every write made inside a batch; an atomic block holds the commit back to its end
+        self.__pending += 1
+        if self.__pending >= self.__batch_size and not self.__atomic_depth:
+            self.__commit()
+            self.__connection.execute("BEGIN")
+
+    @contextlib.contextmanager
+    def __write(self) -> Iterator[sqlite3.Connection]:
+        with self.__lock:
+            if self.__batch_depth:
+                yield self.__connection
+                self.__written()
+            else:
+                self.__connection.execute("BEGIN")
+                try:
+                    yield self.__connection
+                except BaseException:
+                    self.__connection.execute("ROLLBACK")
+                    raise
+                self.__connection.execute("COMMIT")
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return self.__connection.execute("SELECT COUNT(*) FROM applicants").fetchone()[0]
+
+    def __load(self, rows: list[Any]) -> list[tuple[int, Applicant]]:
+        """builds applicants for rows of the applicants table, fetching their nested records in one query per table"""
+        if not rows:
+            return []
+        if len(rows) > PAGE_SIZE:
+            # keeps the IN (...) lists below SQLite's host parameter limit
+            return [pair for start in range(0, len(rows), PAGE_SIZE) for pair in self.__load(rows[start:start + PAGE_SIZE])]
+        ids = [row[0] for row in rows]
+        marks = ",".join("?" * len(ids))
+        languages: dict[int, list[tuple]] = {}
+        for applicant_id, *state in self.__connection.execute(
+                f"SELECT applicant_id, language, read_ability, write_ability, speak_ability FROM languages "
+                f"WHERE applicant_id IN ({marks}) ORDER BY applicant_id, seq", ids):
+            languages.setdefault(applicant_id, []).append(tuple(state))
+        education: dict[int, list[tuple]] = {}
+        for (applicant_id, level, name, location, country, attended_from, attended_to, certificates, field) in self.__connection.execute(
+                f"SELECT applicant_id, education_level, university_name, university_location, university_country, attended_from, "
+                f"attended_to, certificates, main_field_of_study FROM education WHERE applicant_id IN ({marks}) ORDER BY applicant_id, seq", ids):
+            education.setdefault(applicant_id, []).append(
+                (level, name, location, country, _ordinal(attended_from), _ordinal(attended_to), certificates.split(","), field))
+        work_experience: dict[int, list[tuple]] = {}
+        for (applicant_id, company, location, emp_from, emp_to, position, reason) in self.__connection.execute(
+                f"SELECT applicant_id, company_name, location, emp_from, emp_to, position, reason_for_leaving FROM work_experience "
+                f"WHERE applicant_id IN ({marks}) ORDER BY applicant_id, seq", ids):
+            work_experience.setdefault(applicant_id, []).append((company, location, _ordinal(emp_from), _ordinal(emp_to), position, reason))
+        loaded: list[tuple[int, Applicant]] = []
+        for (applicant_id, full_name, _, date_of_birth, sex, address, phone_home, phone_mobile, email,
+             primary_name, primary_relationship, primary_phone, secondary_name, secondary_relationship, secondary_phone, skills) in rows:
+            personal_info = (full_name, _ordinal(date_of_birth), sex, address, phone_home, phone_mobile, email,
+                             _contact(primary_name, primary_relationship, primary_phone),
+                             _contact(secondary_name, secondary_relationship, secondary_phone))
+            state = (personal_info, languages.get(applicant_id, ()), education.get(applicant_id, ()),
+                     work_experience.get(applicant_id, ()), skills)
+            loaded.append((applicant_id, Applicant._from_state(state)))
+        return loaded
+
+    def __iter__(self) -> Iterator[tuple[int, Applicant]]:
+        last_id = -1
+        while True:
+            with self.__lock:
+                page = self.__load(self.__connection.execute(
+                    f"SELECT id, {APPLICANT_COLUMNS} FROM applicants WHERE id > ? ORDER BY id LIMIT ?", (last_id, PAGE_SIZE)).fetchall())
+            yield from page
+            if len(page) < PAGE_SIZE:
+                return
+            last_id = page[-1][0]
+
+    def get(self, applicant_id: int) -> Applicant:
+        with self.__lock:
+            loaded = self.__load(self.__connection.execute(
+                f"SELECT id, {APPLICANT_COLUMNS} FROM applicants WHERE id = ?", (applicant_id,)).fetchall())
+        if not loaded:
+            raise KeyError(applicant_id)
+        return loaded[0][1]
+
+    def get_many(self, applicant_ids: Iterable[int]) -> list[Applicant]:
+        applicant_ids = list(applicant_ids)
+        loaded: dict[int, Applicant] = {}
+        with self.__lock:
+            for start in range(0, len(applicant_ids), PAGE_SIZE):
+                page = applicant_ids[start:start + PAGE_SIZE]
+                loaded.update(self.__load(self.__connection.execute(
+                    f"SELECT id, {APPLICANT_COLUMNS} FROM applicants WHERE id IN ({','.join('?' * len(page))})", page).fetchall()))
+        return [loaded[applicant_id] for applicant_id in applicant_ids]
+
+    def contains_identity(self, identity: tuple[str, int]) -> bool:
+        with self.__lock:
+            return self.__connection.execute(
+                "SELECT 1 FROM applicants WHERE full_name = ? AND phone_number_mobile = ? LIMIT 1", identity).fetchone() is not None
+
+    def find_by_name(self, full_name: str) -> list[tuple[int, Applicant]]:
+        with self.__lock:
+            return self.__load(self.__connection.execute(
+                f"SELECT id, {APPLICANT_COLUMNS} FROM applicants WHERE name_key = ? ORDER BY id", (full_name.casefold(),)).fetchall())
+
+    def __write_children(self, connection: sqlite3.Connection, applicant_id: int, applicant: Applicant) -> None:
+        _, languages, education, work_experience, _ = applicant._state()
+        connection.executemany(
+            "INSERT INTO languages VALUES (?, ?, ?, ?, ?, ?)",
+            [(applicant_id, seq, *lang) for seq, lang in enumerate(languages)])
+        connection.executemany(
+            "INSERT INTO education VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(applicant_id, seq, level, name, location, country, _iso(attended_from), _iso(attended_to), ",".join(certificates), field)
+             for seq, (level, name, location, country, attended_from, attended_to, certificates, field) in enumerate(education)])
+        connection.executemany(
+            "INSERT INTO work_experience VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(applicant_id, seq, company, location, _iso(emp_from), _iso(emp_to), position, reason)
+             for seq, (company, location, emp_from, emp_to, position, reason) in enumerate(work_experience)])
+
+    def __applicant_row(self, applicant: Applicant) -> tuple:
+        info = applicant.personal_info
+        return (info.full_name, info.full_name.casefold(), info.date_of_birth.isoformat(), info.sex, info.home_address,
+                info.phone_number_home, info.phone_number_mobile, info.email_address,
+                *_contact_columns(info.emergency_contact_primary), *_contact_columns(info.emergency_contact_secondary),
+                applicant.major_skills)
+
+    def insert(self, applicant: Applicant) -> int:
+        with self.__write() as connection:
+            applicant_id = connection.execute(
+                f"INSERT INTO applicants ({APPLICANT_COLUMNS}) VALUES ({', '.join('?' * 15)})", self.__applicant_row(applicant)).lastrowid
+            self.__write_children(connection, applicant_id, applicant)
+        return applicant_id
+
+    def replace(self, applicant_id: int, applicant: Applicant) -> None:
+        assignments = ", ".join(f"{column} = ?" for column in APPLICANT_COLUMNS.split(", "))
+        with self.__write() as connection:
+            connection.execute(f"UPDATE applicants SET {assignments} WHERE id = ?", (*self.__applicant_row(applicant), applicant_id))
+            for table in ("languages", "education", "work_experience"):
+                connection.execute(f"DELETE FROM {table} WHERE applicant_id = ?", (applicant_id,))
+            self.__write_children(connection, applicant_id, applicant)
+
+    def remove(self, applicant_id: int) -> None:
+        with self.__write() as connection:
+            connection.execute("DELETE FROM applicants WHERE id = ?", (applicant_id,))
+
+    def put(self, applicant_id: int, applicant: Applicant) -> None:
+        with self.__write() as connection:
+            connection.execute(f"INSERT INTO applicants (id, {APPLICANT_COLUMNS}) VALUES ({', '.join('?' * 16)})",
+                               (applicant_id, *self.__applicant_row(applicant)))
+            self.__write_children(connection, applicant_id, applicant)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the application manager on an SQLite database")
+    parser.add_argument("database", nargs="?", default="applications.db")
+    args = parser.parse_args()
+    application = Application(SQLiteStore(args.database))
+    try:
+        run_manager(application)
+    finally:
+        application.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import argparse
+import csv
+import datetime
+import json
+import random
+import sys
+from typing import Any, Iterator
+
+from app import Applicant, EducationLevel
+from importer import CSV_JSON_COLUMNS
+from records import build_applicant
+
+
+FIRST_NAMES = ("James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+               "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Abebe", "Hanna",
+               "Natnael", "Selam", "Mohammed", "Fatima", "Wei", "Mei", "Hiroshi", "Yuki", "Carlos", "Lucia",
+               "Ivan", "Olga", "Pierre", "Amelie", "Raj", "Priya", "Kwame", "Amara", "Lars", "Ingrid")
+LAST_NAMES = ("Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+              "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin",
+              "Haile", "Tesfaye", "Bekele", "Alemu", "Chen", "Wang", "Tanaka", "Sato", "Silva", "Santos",
+              "Ivanov", "Petrova", "Dubois", "Laurent", "Patel", "Sharma", "Mensah", "Okafor", "Nilsson", "Larsen")
+STREETS = ("Main Street", "Oak Avenue", "Maple Drive", "Cedar Lane", "Pine Road", "Elm Street", "Lake View", "Hill Crest")
+CITIES = (("Springfield", "USA"), ("Austin", "USA"), ("Toronto", "Canada"), ("London", "UK"), ("Berlin", "Germany"),
+          ("Addis Ababa", "Ethiopia"), ("Nairobi", "Kenya"), ("Bangalore", "India"), ("Tokyo", "Japan"), ("Madrid", "Spain"))
+LANGUAGES = ("English", "Spanish", "French", "German", "Amharic", "Mandarin", "Japanese", "Hindi", "Arabic", "Swahili")
+ABILITIES = ("excellent", "good", "bad")
+UNIVERSITIES = ("State University", "Institute of Technology", "City College", "National University", "Polytechnic")
+FIELDS_OF_STUDY = ("Computer Science", "Software Engineering", "Mathematics", "Statistics", "Economics", "Business Administration",
+                   "Electrical Engineering", "Physics", "Information Systems", "Data Science")
+CERTIFICATES = ("AWS", "Scrum", "PMP", "CCNA", "CISSP", "Azure", "Kubernetes", "ITIL", "CFA", "TOEFL")
+SKILLS = ("python", "sql", "java", "c++", "c#", "javascript", "node.js", "react", "docker", "kubernetes", "machine learning",
+          "data analysis", "excel", "project management", "communication", "leadership", "go", "rust", "linux", "aws")
+COMPANIES = ("Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises", "Vandelay", "Soylent", "Cyberdyne")
+POSITIONS = ("Developer", "Senior Developer", "Analyst", "Data Scientist", "Project Manager", "QA Engineer", "DevOps Engineer", "Intern")
+REASONS = ("Relocation", "Career growth", "Contract ended", "Better offer", "Studies", "Layoff")
+RELATIONSHIPS = ("Spouse", "Parent", "Sibling", "Friend")
+# degrees by how often applicants hold them as their highest level
+DEGREES = ((EducationLevel.HIGH_SCHOOL, 20), (EducationLevel.ASSOCIATE, 10), (EducationLevel.BACHELOR, 45),
+           (EducationLevel.MASTER, 20), (EducationLevel.PHD, 5))
+# the years it takes to complete each level
+DEGREE_YEARS = {EducationLevel.HIGH_SCHOOL: 4, EducationLevel.ASSOCIATE: 2, EducationLevel.BACHELOR: 4,
+                EducationLevel.MASTER: 2, EducationLevel.PHD: 4}
+
+# with unique_names every applicant gets a distinct "First Middle Last-Last" name, of which there are this many
+UNIQUE_NAMES = len(FIRST_NAMES) ** 2 * len(LAST_NAMES) ** 2
+
+
+def _phone(rng: random.Random, number: int) -> str:
+    # the three spellings PersonalInfo accepts: plain, +1 and 001 prefixed
+    prefix = rng.choice(("", "+1", "001"))
+    return f"{prefix}{number:010d}"
+
+
+def _date(day: datetime.date) -> str:
+    return day.isoformat()
+
+
+class SyntheticApplicants:
+    """reproducible, valid applicant records
+
+    record(i) depends only on the seed and i, so any slice of a data set can be regenerated on its
+    own. names repeat across applicants as they do in practice, but the mobile number is derived
+    from i, which keeps every (full name, mobile) identity unique. with unique_names the full names
+    are distinct too, for the first UNIQUE_NAMES indexes, so a name lookup finds exactly one applicant
+    """
+    def __init__(self, seed: int = 0, unique_names: bool = False, today: datetime.date = datetime.date(2024, 1, 1)) -> None:
+        self.__seed = seed
+        self.__unique_names = unique_names
+        self.__today = today
+
+    def full_name(self, i: int) -> str:
+        """the full name record(i) gets; in unique_names mode it is computed without generating the record"""
+        if not self.__unique_names:
+            return self.record(i)["full_name"]
+        # a multiplier coprime to UNIQUE_NAMES shuffles the indexes without ever mapping two onto one name
+        n = (i * 1_000_003 + self.__seed) % UNIQUE_NAMES
+        n, first = divmod(n, len(FIRST_NAMES))
+        n, middle = divmod(n, len(FIRST_NAMES))
+        n, last = divmod(n, len(LAST_NAMES))
+        return f"{FIRST_NAMES[first]} {FIRST_NAMES[middle]} {LAST_NAMES[last]}-{LAST_NAMES[n % len(LAST_NAMES)]}"
+
+    def record(self, i: int) -> dict[str, Any]:
+        rng = random.Random(self.__seed * 1_000_003 + i)
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        full_name = self.full_name(i) if self.__unique_names else f"{first} {last}"
+        born = self.__today - datetime.timedelta(days=rng.randint(18 * 365, 65 * 365))
+        city, country = rng.choice(CITIES)
+        record: dict[str, Any] = {
+            "full_name": full_name,
+            "date_of_birth": _date(born),
+            "sex": rng.choice(("Male", "Female")),
+            "home_address": f"{rng.randint(1, 9999)} {rng.choice(STREETS)}, {city}",
+            "phone_number_home": _phone(rng, 2_000_000_000 + rng.randrange(1_000_000_000)),
+            "phone_number_mobile": _phone(rng, 3_000_000_000 + i),
+            "email_address": f"{first}.{last}{i}@example.com".lower(),
+            "emergency_contact_primary": {"name": f"{rng.choice(FIRST_NAMES)} {last}", "relationship": rng.choice(RELATIONSHIPS),
+                                          "phone_number": _phone(rng, 4_000_000_000 + rng.randrange(1_000_000_000))},
+            "languages": [
+                {"language": language, "read_ability": rng.choice(ABILITIES), "write_ability": rng.choice(ABILITIES),
+                 "speak_ability": rng.choice(ABILITIES)}
+                for language in rng.sample(LANGUAGES, rng.randint(1, 3))
+            ],
+            "major_skills": ", ".join(rng.sample(SKILLS, rng.randint(2, 6))),
+        }
+        if rng.random() < 0.5:
+            record["emergency_contact_secondary"] = {"name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                                                     "relationship": rng.choice(RELATIONSHIPS),
+                                                     "phone_number": _phone(rng, 5_000_000_000 + rng.randrange(1_000_000_000))}
+        record["education"], graduated = self.__education(rng, born)
+        record["work_experience"] = self.__work_experience(rng, graduated)
+        return record
+
+    def __education(self, rng: random.Random, born: datetime.date) -> tuple[list[dict[str, Any]], datetime.date]:
+        levels, weights = zip(*DEGREES)
+        highest = rng.choices(levels, weights)[0]
+        start = datetime.date(born.year + 14, 9, 1)
+        education = []
+        for level in list(EducationLevel)[:highest.rank + 1]:
+            # everyone finishes high school; associate degrees are a detour only some take
+            if level is EducationLevel.ASSOCIATE and highest is not EducationLevel.ASSOCIATE:
+                continue
+            end = datetime.date(start.year + DEGREE_YEARS[level], 6, 1)
+            if end > self.__today:
+                break
+            city, country = rng.choice(CITIES)
+            education.append({
+                "education_level": level.name,
+                "university_name": f"{city} {rng.choice(UNIVERSITIES)}",
+                "university_location": city,
+                "university_country": country,
+                "attended_from": _date(start),
+                "attended_to": _date(end),
+                "certificates": ",".join(rng.sample(CERTIFICATES, rng.randint(0, 2))),
+                "main_field_of_study": "General Studies" if level is EducationLevel.HIGH_SCHOOL else rng.choice(FIELDS_OF_STUDY),
+            })
+            start = datetime.date(end.year, 9, 1)
+        return education, start
+
+    def __work_experience(self, rng: random.Random, start: datetime.date) -> list[dict[str, Any]]:
+        jobs = []
+        for _ in range(rng.randint(0, 3)):
+            begin = start + datetime.timedelta(days=rng.randint(0, 365))
+            end = begin + datetime.timedelta(days=rng.randint(180, 6 * 365))
+            if end > self.__today:
+                break
+            city, _ = rng.choice(CITIES)
+            jobs.append({"company_name": rng.choice(COMPANIES), "location": city, "emp_from": _date(begin), "emp_to": _date(end),
+                         "position": rng.choice(POSITIONS), "reason_for_leaving": rng.choice(REASONS)})
+            start = end
+        return jobs
+
+    def applicant(self, i: int) -> Applicant:
+        return build_applicant(self.record(i))
+
+    def records(self, count: int, start: int = 0) -> Iterator[dict[str, Any]]:
+        for i in range(start, start + count):
+            yield self.record(i)
+
+    def applicants(self, count: int, start: int = 0) -> Iterator[Applicant]:
+        for i in range(start, start + count):
+            yield self.applicant(i)
+
+
+def write_csv(records: Iterator[dict[str, Any]], stream) -> None:
+    """writes records in the CSV layout importer.read_csv expects, nested sections as JSON columns"""
+    writer = None
+    for record in records:
+        row = {key: json.dumps(value) if key in CSV_JSON_COLUMNS else value for key, value in record.items()}
+        if writer is None:
+            fields = [key for key in record if key not in CSV_JSON_COLUMNS] + list(CSV_JSON_COLUMNS)
+            writer = csv.DictWriter(stream, fieldnames=fields)
+            writer.writeheader()
+        writer.writerow(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate reproducible synthetic applications as JSONL or CSV")
+    parser.add_argument("count", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start", type=int, default=0, help="index of the first record, to generate a slice of a larger set")
+    parser.add_argument("--unique-names", action="store_true", help="give every applicant a distinct full name")
+    parser.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    args = parser.parse_args()
+    records = SyntheticApplicants(args.seed, args.unique_names).records(args.count, args.start)
+    if args.format == "csv":
+        write_csv(records, sys.stdout)
+    else:
+        for record in records:
+            sys.stdout.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
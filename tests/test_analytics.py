@@ -0,0 +1,36 @@
+import pytest
+
+from aggregates import Aggregates, ExperienceStats
+from app import Application
+from records import build_applicant
+from synthetic import SyntheticApplicants
+
+# analytics.py needs NumPy, which the rest of the application runs without
+pytest.importorskip("numpy")
+from analytics import ColumnarSnapshot  # noqa: E402
+
+
+def pool_with_a_backwards_job():
+    synthetic = SyntheticApplicants(seed=21)
+    application = Application()
+    for applicant in synthetic.applicants(20):
+        application.add_applicant(applicant, verbose=False)
+    record = synthetic.record(20)
+    record["work_experience"] = [{"company_name": "Initech", "location": "Austin", "emp_from": "2020-06-01", "emp_to": "2019-06-01",
+                                  "position": "Engineer", "reason_for_leaving": "Typo"},
+                                 {"company_name": "Initrode", "location": "Austin", "emp_from": "2020-06-01", "emp_to": "2021-06-01",
+                                  "position": "Engineer", "reason_for_leaving": "Moved"}]
+    application.add_applicant(build_applicant(record), verbose=False)
+    return application
+
+
+def test_experience_agrees_between_the_snapshot_and_the_aggregates():
+    application = pool_with_a_backwards_job()
+    aggregates = Aggregates(application)
+    snapshot = ColumnarSnapshot(application, columns=("experience_days", "tenure_days"))
+    expected = [ExperienceStats.experience_days(applicant) for applicant in application]
+    assert snapshot["experience_days"].tolist() == expected
+    assert expected[-1] == 365
+    assert snapshot["tenure_days"].min() >= 0
+    assert snapshot["experience_days"].sum() / ExperienceStats.DAYS_PER_YEAR == aggregates.experience.total_years
+
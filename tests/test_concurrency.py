@@ -0,0 +1,120 @@
+import sys
+import threading
+
+import pytest
+
+from app import Application
+from locks import RWLock
+from query import BornBetween, EmployedDuring, Name, Skill
+from records import build_applicant
+from synthetic import SyntheticApplicants
+
+
+def identities(applicants):
+    return sorted(applicant.identity for applicant in applicants)
+
+
+@pytest.fixture(autouse=True)
+def frequent_switches():
+    # switches threads far more often than by default, so that the operations interleave finely
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def test_concurrent_add_search_update_keep_the_indexes_consistent():
+    synthetic = SyntheticApplicants(seed=7, unique_names=True)
+    application = Application()
+    for applicant in synthetic.applicants(200):
+        application.add_applicant(applicant, verbose=False)
+    # builds the indexes, so that the writers below maintain them
+    application.search_keywords("python")
+    errors = []
+
+    def guarded(work):
+        def run():
+            try:
+                work()
+            except Exception as e:
+                errors.append(e)
+        return threading.Thread(target=run)
+
+    def adder(start):
+        def work():
+            for applicant in synthetic.applicants(200, start):
+                assert application.add_applicant(applicant, verbose=False)
+        return work
+
+    def updater():
+        for i in range(0, 200, 2):
+            record = dict(synthetic.record(i), major_skills="rust, erlang")
+            assert application.update_where(Name(record["full_name"]), lambda _: build_applicant(record)) == 1
+
+    def reader():
+        for i in range(300):
+            name = synthetic.full_name(i % 200)
+            assert all(applicant.personal_info.full_name == name for applicant in application.search_application(name))
+            for applicant in application.search_keywords("rust"):
+                assert "rust" in applicant.major_skills
+            for applicant in application.find(Skill("erlang") & BornBetween(None, "1990-12-31")):
+                assert "erlang" in applicant.major_skills
+                assert applicant.personal_info.date_of_birth.year <= 1990
+
+    threads = [guarded(adder(200)), guarded(adder(400)), guarded(updater), guarded(reader), guarded(reader)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+    applicants = list(application)
+    assert len(application) == len(applicants) == 600
+    assert len({applicant.identity for applicant in applicants}) == 600
+    assert sum("erlang" in applicant.major_skills for applicant in applicants) == 100
+    for predicate in (Skill("rust"), Skill("python"), BornBetween("1970-01-01", "1985-12-31"), EmployedDuring("2015-01-01", "2016-12-31")):
+        assert identities(application.find(predicate)) == identities(applicant for applicant in applicants if predicate.matches(applicant))
+
+
+def test_concurrent_adds_of_the_same_applicant_add_it_once():
+    applicant = SyntheticApplicants(seed=8).applicant(0)
+    application = Application()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(application.add_applicant(applicant, verbose=False))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results) == [False] * 7 + [True]
+    assert len(application) == 1
+
+
+def started(target):
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_releasing_the_write_lock_before_a_nested_read_downgrades_it():
+    lock = RWLock()
+    lock.acquire_write()
+    lock.acquire_read()
+    lock.release_write()
+    # the thread still reads, so a writer has to wait for it
+    writer = started(lambda: (lock.acquire_write(), lock.release_write()))
+    writer.join(timeout=0.2)
+    assert writer.is_alive()
+    lock.release_read()
+    writer.join(timeout=10)
+    assert not writer.is_alive()
+    # and the reader count is back at zero rather than below it, so a real reader still keeps writers out
+    reading, done = threading.Event(), threading.Event()
+    reader = started(lambda: (lock.acquire_read(), reading.set(), done.wait(), lock.release_read()))
+    reading.wait()
+    writer = started(lambda: (lock.acquire_write(), lock.release_write()))
+    writer.join(timeout=0.2)
+    assert writer.is_alive()
+    done.set()
+    for thread in (reader, writer):
+        thread.join(timeout=10)
+        assert not thread.is_alive()
@@ -0,0 +1,59 @@
+import pytest
+
+from dedup import DuplicateFinder, name_similarity, normalize_email, normalize_name
+from records import applicant_record, build_applicant
+from synthetic import SyntheticApplicants
+
+
+def people(count, **changes):
+    """distinct synthetic applicants, with changes[i] (a dict of record fields) applied to the ith"""
+    generator = SyntheticApplicants(seed=17, unique_names=True)
+    applicants = []
+    for i in range(count):
+        record = applicant_record(generator.applicant(i))
+        record.update(changes.get(f"p{i}", {}))
+        applicants.append((i, build_applicant(record)))
+    return applicants
+
+
+@pytest.mark.parametrize("email, expected", [
+    ("Ada.Lovelace+jobs@GMail.com ", "adalovelace@gmail.com"),
+    ("ada.lovelace@googlemail.com", "adalovelace@gmail.com"),
+    ("ada.lovelace+x@example.com", "ada.lovelace@example.com"),
+])
+def test_normalize_email(email, expected):
+    assert normalize_email(email) == expected
+
+
+def test_name_similarity():
+    assert normalize_name("Lovelace, ADA") == normalize_name("Ada Lóvelace") == "ada lovelace"
+    assert name_similarity("ada lovelace", "ada lovelace") == 1.0
+    # 12 characters allow two edits; a swap of neighbouring letters is one
+    assert name_similarity("ada lovelace", "ada lovelaec") == pytest.approx(1 - 1 / 12)
+    assert name_similarity("ada lovelace", "amy lovelace") == pytest.approx(1 - 2 / 12)
+    assert name_similarity("ada lovelace", "bob lovelace") == 0.0
+    assert name_similarity("", "") == 0.0
+
+
+def test_twins_sharing_a_phone_and_birthday_are_not_clustered():
+    shared = {"phone_number_home": "+12025550100", "date_of_birth": "1990-05-05"}
+    applicants = people(2, p0={**shared, "full_name": "Ann Smith"}, p1={**shared, "full_name": "Kim Smith"})
+    assert DuplicateFinder().find(applicants).clusters == []
+
+
+def test_pairs_are_merged_into_one_cluster():
+    # 0 and 1 share an email, 1 and 2 a phone and a misspelt name, 3 is someone else
+    applicants = people(4, p0={"email_address": "ada.lovelace@gmail.com", "full_name": "Ada Lovelace"},
+                        p1={"email_address": "adalovelace+cv@gmail.com", "full_name": "Ada King", "phone_number_mobile": "+12025550111"},
+                        p2={"full_name": "Ada Kign", "phone_number_home": "+12025550111"})
+    report = DuplicateFinder().find(applicants)
+    assert [cluster.ids for cluster in report.clusters] == [[0, 1, 2]]
+    assert {(pair.first, pair.second) for pair in report.clusters[0].pairs} == {(0, 1), (1, 2)}
+
+
+def test_oversized_blocks_are_skipped():
+    applicants = people(5, **{f"p{i}": {"email_address": "shared@example.com"} for i in range(5)})
+    report = DuplicateFinder(max_block=4).find(applicants)
+    assert report.skipped_blocks == 1
+    assert report.clusters == []
+    assert len(DuplicateFinder(max_block=5).find(applicants).clusters[0]) == 5
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from app import Application
+from importer import import_applicants, validate_record
+from synthetic import SyntheticApplicants, write_csv
+
+
+def write_jsonl(path, records):
+    with open(path, "w", encoding="utf-8") as stream:
+        for record in records:
+            stream.write(json.dumps(record) + "\n")
+
+
+def read_rejects(path):
+    with open(path, encoding="utf-8") as stream:
+        return [json.loads(line) for line in stream]
+
+
+def with_empty_phone(record, field):
+    if field == "emergency_contact_primary":
+        record[field] = {**record[field], "phone_number": ""}
+    else:
+        record[field] = ""
+    return record
+
+
+@pytest.mark.parametrize("field", ["phone_number_home", "phone_number_mobile", "emergency_contact_primary"])
+def test_empty_phone_is_rejected(field):
+    record = with_empty_phone(SyntheticApplicants().record(0), field)
+    with pytest.raises(ValueError):
+        validate_record(record)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_empty_phone_goes_to_the_reject_file(tmp_path, workers):
+    synthetic = SyntheticApplicants(seed=3)
+    records = list(synthetic.records(6))
+    with_empty_phone(records[1], "phone_number_home")
+    with_empty_phone(records[4], "emergency_contact_primary")
+    path, rejects = tmp_path / "applicants.jsonl", tmp_path / "rejects.jsonl"
+    write_jsonl(path, records)
+    application = Application()
+    report = import_applicants(application, str(path), str(rejects), workers=workers, chunk_size=2)
+    assert (report.added, report.duplicates, report.rejected) == (4, 0, 2)
+    assert len(application) == 4
+    assert [reject["line"] for reject in read_rejects(rejects)] == [2, 5]
+
+
+def test_malformed_records_are_rejected(tmp_path):
+    records = list(SyntheticApplicants(seed=4).records(4))
+    records[0]["languages"] = "English"
+    del records[1]["full_name"]
+    records[2]["date_of_birth"] = "yesterday"
+    path, rejects = tmp_path / "applicants.jsonl", tmp_path / "rejects.jsonl"
+    write_jsonl(path, records)
+    with open(path, "a", encoding="utf-8") as stream:
+        stream.write("{not json\n[1, 2]\n")
+    application = Application()
+    report = import_applicants(application, str(path), str(rejects))
+    assert (report.added, report.rejected) == (1, 5)
+    assert [reject["line"] for reject in read_rejects(rejects)] == [1, 2, 3, 5, 6]
+
+
+def test_duplicates_are_counted(tmp_path):
+    records = list(SyntheticApplicants(seed=5).records(3))
+    path = tmp_path / "applicants.csv"
+    with open(path, "w", newline="", encoding="utf-8") as stream:
+        write_csv(iter(records + records[:2]), stream)
+    report = import_applicants(Application(), str(path))
+    assert (report.added, report.duplicates, report.rejected) == (3, 2, 0)
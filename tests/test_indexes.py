@@ -0,0 +1,101 @@
+import datetime
+import random
+
+import pytest
+
+from app import Application
+from indexes import IntervalIndex, tokenize
+from records import applicant_record, build_applicant
+from synthetic import SyntheticApplicants
+
+
+def overlapping(entries, low, high):
+    return sorted(entry for entry in entries if (high is None or entry[0] <= high) and (low is None or entry[1] >= low))
+
+
+@pytest.mark.parametrize("batch", [1, 10, 500])
+def test_interval_index_matches_a_scan(batch):
+    rng = random.Random(batch)
+    index, entries = IntervalIndex(), set()
+    for step in range(3000 // batch):
+        for _ in range(batch):
+            if entries and rng.random() < 0.3:
+                entry = rng.choice(sorted(entries))
+                entries.discard(entry)
+                index.remove(entry)
+            else:
+                start = rng.randrange(1000)
+                # mostly short spans with the odd very long one, which used to widen every query
+                entry = (start, start + (rng.randrange(5000) if rng.random() < 0.01 else rng.randrange(30)), len(entries) + step * batch)
+                entries.add(entry)
+                index.add(entry)
+        for _ in range(5):
+            low, high = rng.choice([None, rng.randrange(1100)]), rng.choice([None, rng.randrange(1100)])
+            expected = overlapping(entries, low, high)
+            assert sorted(index.overlapping(low, high)) == expected
+            assert index.count(low, high) >= len(expected)
+
+
+def test_interval_index_on_dates():
+    index = IntervalIndex()
+    day = datetime.date(2020, 1, 1)
+    index.add((day, day + datetime.timedelta(days=3650), 0))
+    index.add((day + datetime.timedelta(days=100), day + datetime.timedelta(days=110), 1))
+    assert [entry[-1] for entry in index.overlapping(day + datetime.timedelta(days=200), None)] == [0]
+    assert [entry[-1] for entry in index.overlapping(day + datetime.timedelta(days=105), day + datetime.timedelta(days=105))] == [0, 1]
+    assert index.overlapping(None, day - datetime.timedelta(days=1)) == []
+
+
+def named(*people):
+    """an application holding an applicant per (full name, skills) pair"""
+    application = Application()
+    template = applicant_record(SyntheticApplicants(seed=9).applicant(0))
+    for i, (full_name, skills) in enumerate(people):
+        application.add_applicant(build_applicant({**template, "full_name": full_name, "phone_number_mobile": f"+1202555{i:04d}",
+                                                   "major_skills": skills}), verbose=False)
+    return application
+
+
+def names(applicants):
+    return [applicant.personal_info.full_name for applicant in applicants]
+
+
+def test_tokenize_keeps_symbols_and_dotted_names():
+    assert tokenize("Python, Machine-Learning; C++ and node.js / C#.") == ["python", "machine", "learning", "c++", "and", "node.js", "c#"]
+
+
+def test_keyword_search():
+    application = named(("Ann", "Python, C++"), ("Bob", "C, node.js, machine learning"), ("Cid", "python; Machine-Learning"))
+    assert names(application.search_keywords("c++")) == ["Ann"]
+    assert names(application.search_keywords("C")) == ["Bob"]
+    assert names(application.search_keywords("NODE.JS")) == ["Bob"]
+    # a term of several words needs all of them, and every term has to match unless match_all is off
+    assert names(application.search_keywords("python, machine learning")) == ["Cid"]
+    assert names(application.search_keywords(["c++", "node.js"], match_all=False)) == ["Ann", "Bob"]
+    assert names(application.search_keywords("python", fields=["skills"])) == ["Ann", "Cid"]
+    assert application.search_keywords("python", fields=["language"]) == []
+    with pytest.raises(ValueError):
+        application.search_keywords("python", fields=["hobbies"])
+
+
+def test_prefix_search():
+    application = named(("Ada Lovelace", ""), ("Adam Smith", ""), ("Ad Astra", ""), ("Bea Adams", ""), ("Adalbert Long-Name", ""))
+    assert names(application.search_prefix("AD")) == ["Ad Astra", "Adam Smith", "Ada Lovelace", "Adalbert Long-Name"]
+    assert names(application.search_prefix("ad", k=2)) == ["Ad Astra", "Adam Smith"]
+    assert names(application.search_prefix("ada lovelace")) == ["Ada Lovelace"]
+    assert application.search_prefix("ada lovelaces") == []
+    assert application.search_prefix("adz") == []
+    assert len(application.search_prefix("", k=3)) == 3
+
+
+def test_fuzzy_search_up_to_the_edit_limit():
+    application = named(("Ada Lovelace", ""), ("Ada Byron Lovelace", ""), ("Al Lo", ""))
+    # "lovelace" has eight letters and tolerates two edits, "ada" one
+    assert names(application.search_fuzzy("Ada Lovelxxe")) == ["Ada Lovelace", "Ada Byron Lovelace"]
+    assert application.search_fuzzy("Ada Lovelxxe", max_distance=1) == []
+    assert application.search_fuzzy("Ada Lovxlxxe") == []
+    assert names(application.search_fuzzy("Adx Lovelaec")) == ["Ada Lovelace", "Ada Byron Lovelace"]
+    assert application.search_fuzzy("Adx Lovelaxe", max_distance=1) == []
+    # initials have to be spelt right
+    assert names(application.search_fuzzy("al lo")) == ["Al Lo"]
+    assert application.search_fuzzy("ax lo") == []
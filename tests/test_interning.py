@@ -0,0 +1,19 @@
+from app import WorkExperience
+from interning import POOLS, _unpooled
+
+
+def test_unpooled_restores_pools_and_codes():
+    pool = POOLS["sex"]
+    pool.intern("Female")
+    code = pool.code("Female")
+    with _unpooled():
+        assert pool.code("Female") is None
+        assert not pool.enabled
+    assert pool.enabled
+    assert pool.code("Female") == code
+    assert pool.value(code) == "Female"
+
+
+def test_free_text_is_not_pooled():
+    assert "position" not in POOLS
+    assert "reason_for_leaving" not in POOLS
@@ -0,0 +1,32 @@
+import pytest
+
+from app import Application
+from importer import validate_record
+from metrics import instrumented
+from synthetic import SyntheticApplicants
+
+
+def test_empty_phone_counts_as_a_validation_failure():
+    records = list(SyntheticApplicants(seed=17).records(3))
+    records[0]["phone_number_home"] = ""
+    records[1]["emergency_contact_primary"] = {**records[1]["emergency_contact_primary"], "phone_number": ""}
+    with instrumented() as instrumentation:
+        for record in records[:2]:
+            with pytest.raises(ValueError):
+                validate_record(record)
+        validate_record(records[2])
+    assert instrumentation.metrics.as_dict()["validation_failures"] == {
+        "PersonalInfo.phone_number_home": 1, "PersonalInfo.set_emergency_contact.phone_number": 1}
+
+
+def test_operations_are_timed_and_counted():
+    application = Application()
+    applicant = SyntheticApplicants(seed=18).applicant(0)
+    with instrumented() as instrumentation:
+        application.add_applicant(applicant, verbose=False)
+        application.add_applicant(applicant, verbose=False)
+        application.search_application(applicant.personal_info.full_name)
+    operations = instrumentation.metrics.as_dict()["operations"]
+    assert operations["add_applicant"]["calls"] == 2
+    assert operations["search_application"]["calls"] == 1
+    assert sum(operations["add_applicant"]["buckets"].values()) == 2
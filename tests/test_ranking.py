@@ -0,0 +1,73 @@
+import pytest
+
+from app import Application
+from query import Where
+from ranking import JobDescription, Ranker
+from records import applicant_record, build_applicant
+from synthetic import SyntheticApplicants
+
+
+def pool(count=30):
+    application = Application()
+    for applicant in SyntheticApplicants(seed=23, unique_names=True).applicants(count):
+        application.add_applicant(applicant, verbose=False)
+    return application
+
+
+def renamed(applicant, full_name, mobile, **fields):
+    record = applicant_record(applicant)
+    record.update(full_name=full_name, phone_number_mobile=mobile, **fields)
+    return build_applicant(record)
+
+
+def test_top_is_the_best_k_in_order():
+    application = pool()
+    ranker = Ranker(application)
+    job = JobDescription("python, sql and docker", languages=["english"])
+    expected = sorted(((ranker.score(applicant, job), -applicant_id) for applicant_id, applicant in application.store), reverse=True)
+    top = ranker.top(job, k=5)
+    assert [(candidate.score, candidate.applicant_id) for candidate in top] == [
+        (pytest.approx(score), -negated_id) for score, negated_id in expected[:5]]
+    assert all(candidate.score == pytest.approx(sum(candidate.breakdown.values())) for candidate in top)
+    assert len(ranker.top(job, k=100)) == len(application)
+    assert ranker.top(job, k=0) == [] and ranker.top(job, k=-1) == []
+
+
+def test_ties_go_to_the_earlier_application():
+    application = Application()
+    original = SyntheticApplicants(seed=23, unique_names=True).applicant(0)
+    # three applicants with the same features, added in this order
+    for name, mobile in (("Cara One", "+12025550101"), ("Abe Two", "+12025550102"), ("Bo Three", "+12025550103")):
+        application.add_applicant(renamed(original, name, mobile), verbose=False)
+    top = Ranker(application).top(JobDescription("python"), k=3)
+    assert [candidate.applicant_id for candidate in top] == [0, 1, 2]
+    assert len({candidate.score for candidate in top}) == 1
+
+
+@pytest.mark.parametrize("weights", [{"charm": 1.0}, {"skills": -1.0}])
+def test_bad_weights_are_rejected(weights):
+    with pytest.raises(ValueError):
+        Ranker(Application(), weights)
+
+
+def test_feature_cache_follows_adds_updates_and_deletes():
+    application = pool(5)
+    ranker = Ranker(application)
+    cache = ranker.cache
+    assert len(cache) == 5
+    applicant = renamed(application.applicants[0], "Zoe Brewer", "+12025550199", major_skills="zymurgy, python")
+    application.add_applicant(applicant, verbose=False)
+    assert len(cache) == 6
+    assert cache.known_skills(["zymurgy", "alchemy"]) == {"zymurgy"}
+    assert [c.applicant.personal_info.full_name for c in ranker.top(JobDescription("zymurgy"), k=1)] == ["Zoe Brewer"]
+    application.update_where(Where(lambda a: a.personal_info.full_name == "Zoe Brewer"),
+                             lambda a: renamed(a, "Zoe Brewer", "+12025550199", major_skills="alchemy"))
+    # the only applicant listing zymurgy dropped it, so it's no longer counted as a skill
+    assert cache.known_skills(["zymurgy", "alchemy"]) == {"alchemy"}
+    assert cache.get(5).skills == {"alchemy"}
+    application.delete_application("Zoe Brewer")
+    assert len(cache) == 5 and cache.get(5) is None
+    assert cache.known_skills(["alchemy"]) == frozenset()
+    ranker.close()
+    application.delete_where(Where(lambda a: True))
+    assert len(cache) == 5
@@ -0,0 +1,38 @@
+import pytest
+
+from app import Application
+from exporter import export_applicants
+from importer import import_applicants
+from records import applicant_record, build_applicant
+from synthetic import SyntheticApplicants
+
+
+def leading_zero_phones():
+    # numbers whose ten digits start with 0, entered with each prefix the form accepts
+    applicant = SyntheticApplicants(seed=41).applicant(0)
+    record = applicant_record(applicant)
+    record.update(phone_number_home="+10123456789", phone_number_mobile="0010987654321")
+    record["emergency_contact_primary"] = {**record["emergency_contact_primary"], "phone_number": "+10000000001"}
+    return build_applicant(record)
+
+
+def test_record_round_trip_keeps_leading_zeros():
+    applicant = leading_zero_phones()
+    assert applicant.personal_info.phone_number_home == 123456789
+    copy = build_applicant(applicant_record(applicant))
+    assert copy._state() == applicant._state()
+    assert applicant_record(applicant)["phone_number_home"] == "+10123456789"
+
+
+@pytest.mark.parametrize("target", ["applicants.jsonl", "applicants.csv"])
+def test_export_then_import_gives_back_the_pool(tmp_path, target):
+    application = Application()
+    application.add_applicant(leading_zero_phones(), verbose=False)
+    for applicant in SyntheticApplicants(seed=42).applicants(20):
+        application.add_applicant(applicant, verbose=False)
+    path = str(tmp_path / target)
+    assert export_applicants(application, path).exported == 21
+    imported = Application()
+    report = import_applicants(imported, path, str(tmp_path / "rejects.jsonl"))
+    assert (report.added, report.rejected) == (21, 0)
+    assert [applicant._state() for applicant in imported] == [applicant._state() for applicant in application]
@@ -0,0 +1,100 @@
+import os
+import sys
+import threading
+
+import pytest
+
+from app import Application
+from journal import JournaledStore, segment_name
+from query import Name
+from records import build_applicant
+from synthetic import SyntheticApplicants
+
+
+def contents(store):
+    return [(applicant_id, applicant._state()) for applicant_id, applicant in store]
+
+
+def change(application, synthetic):
+    """adds, updates and deletes a few applicants the same way on every store"""
+    for applicant in synthetic.applicants(30):
+        application.add_applicant(applicant, verbose=False)
+    for i in range(0, 30, 3):
+        record = dict(synthetic.record(i), major_skills="cobol")
+        application.update_where(Name(record["full_name"]), lambda _: build_applicant(record))
+    for i in range(1, 30, 5):
+        application.delete_where(Name(synthetic.full_name(i)))
+
+
+@pytest.fixture
+def synthetic():
+    return SyntheticApplicants(seed=11, unique_names=True)
+
+
+@pytest.fixture
+def expected(synthetic):
+    application = Application()
+    change(application, synthetic)
+    return contents(application.store)
+
+
+@pytest.mark.parametrize("compact_after", [100_000, 7])
+def test_journal_recovers_its_contents(tmp_path, synthetic, expected, compact_after):
+    store = JournaledStore(str(tmp_path), compact_after=compact_after)
+    change(Application(store), synthetic)
+    store.wait_for_compaction()
+    store.close()
+    if compact_after < 100_000:
+        assert os.path.exists(tmp_path / "snapshot")
+    reopened = JournaledStore(str(tmp_path))
+    assert contents(reopened) == expected
+    reopened.close()
+
+
+def test_journal_drops_a_torn_tail(tmp_path, synthetic, expected):
+    store = JournaledStore(str(tmp_path))
+    change(Application(store), synthetic)
+    store.close()
+    # a crash in the middle of a write leaves part of a frame at the end of the newest segment
+    segment = tmp_path / segment_name(1)
+    size = os.path.getsize(segment)
+    with open(segment, "ab") as stream:
+        stream.write(b"\x40\x00\x00\x00torn")
+    reopened = JournaledStore(str(tmp_path))
+    assert contents(reopened) == expected
+    assert os.path.getsize(segment) == size
+    # writes after the recovery go to a new segment and survive the next one
+    Application(reopened).add_applicant(synthetic.applicant(100), verbose=False)
+    reopened.close()
+    again = JournaledStore(str(tmp_path))
+    assert len(again) == len(expected) + 1
+    again.close()
+
+
+def test_concurrent_compactions_start_one_at_a_time(tmp_path, monkeypatch):
+    failures = []
+    monkeypatch.setattr(threading, "excepthook", failures.append)
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    applicants = list(SyntheticApplicants(seed=12).applicants(400))
+    # the flusher stays out of the way, so every compaction has pending entries to flush first
+    store = JournaledStore(str(tmp_path), commit_interval=10)
+
+    def work(start):
+        for applicant in applicants[start::4]:
+            store.insert(applicant)
+            store.compact()
+
+    try:
+        threads = [threading.Thread(target=work, args=(start,)) for start in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        store.close()
+    finally:
+        sys.setswitchinterval(interval)
+    assert failures == []
+    reopened = JournaledStore(str(tmp_path))
+    assert len(reopened) == 400
+    reopened.close()
@@ -0,0 +1,151 @@
+import asyncio
+from urllib.parse import quote
+
+import pytest
+
+from app import Application, MemoryStore
+from loadtest import Client
+from records import applicant_record
+from service import ApplicationService
+from synthetic import SyntheticApplicants
+
+
+@pytest.fixture
+def synthetic():
+    return SyntheticApplicants(seed=13, unique_names=True)
+
+
+def serve(application, scenario):
+    """runs scenario(client) against a service on a free port"""
+    async def run():
+        service = ApplicationService(application, port=0, workers=2)
+        await service.start()
+        client = Client("127.0.0.1", service.port)
+        try:
+            return await scenario(client)
+        finally:
+            await client.close()
+            await service.close()
+    return asyncio.run(run())
+
+
+def test_add_search_update_delete(synthetic):
+    application = Application()
+    record = synthetic.record(0)
+    name = quote(record["full_name"])
+
+    async def scenario(client):
+        assert await client.request("GET", "/health") == (200, {"status": "ok", "applications": 0})
+        assert await client.request("POST", "/applications", record) == (201, {"added": True})
+        status, payload = await client.request("POST", "/applications", record)
+        assert (status, payload["added"]) == (409, False)
+        status, payload = await client.request("GET", f"/applications?name={name}")
+        assert status == 200 and payload["total"] == 1
+        assert payload["applications"] == [applicant_record(application.search_application(record["full_name"])[0])]
+        assert await client.request("PUT", f"/applications?name={name}", dict(record, major_skills="fortran")) == (200, {"updated": 1})
+        assert application.search_application(record["full_name"])[0].major_skills == "fortran"
+        assert await client.request("DELETE", f"/applications?name={name}") == (200, {"deleted": 1})
+        status, payload = await client.request("DELETE", f"/applications?name={name}")
+        assert (status, payload["deleted"]) == (404, 0)
+        assert len(application) == 0
+    serve(application, scenario)
+
+
+def test_list_pages_through_the_pool(synthetic):
+    application = Application()
+    for applicant in synthetic.applicants(25):
+        application.add_applicant(applicant, verbose=False)
+
+    async def scenario(client):
+        names, offset = [], 0
+        while offset is not None:
+            status, payload = await client.request("GET", f"/applications?offset={offset}&limit=10")
+            assert status == 200 and payload["total"] == 25
+            names += [record["full_name"] for record in payload["applications"]]
+            offset = payload["next_offset"]
+        assert names == [synthetic.full_name(i) for i in range(25)]
+        status, _ = await client.request("GET", "/applications?limit=0")
+        assert status == 400
+    serve(application, scenario)
+
+
+def test_batch_returns_a_result_per_operation(synthetic):
+    application = Application()
+    records = list(synthetic.records(3))
+
+    async def scenario(client):
+        status, payload = await client.request("POST", "/batch", [
+            {"op": "add", "record": records[0]},
+            {"op": "add", "record": records[1]},
+            {"op": "add", "record": records[0]},
+            {"op": "search", "name": records[1]["full_name"]},
+            {"op": "frobnicate"},
+            {"op": "delete", "name": records[2]["full_name"]},
+        ])
+        assert status == 200
+        assert [result["status"] for result in payload["results"]] == [201, 201, 409, 200, 400, 404]
+        status, payload = await client.request("POST", "/applications", records)
+        assert [result["status"] for result in payload["results"]] == [409, 409, 201]
+    serve(application, scenario)
+    assert len(application) == 3
+
+
+def test_bad_requests(synthetic):
+    async def scenario(client):
+        assert (await client.request("GET", "/nowhere"))[0] == 404
+        assert (await client.request("POST", "/health"))[0] == 405
+        assert (await client.request("PUT", "/applications", synthetic.record(0)))[0] == 400
+        assert (await client.request("POST", "/applications", "not a record"))[0] == 400
+        assert (await client.request("POST", "/batch", {"op": "list"}))[0] == 400
+    serve(Application(), scenario)
+
+
+def test_malformed_records_are_bad_requests(synthetic):
+    application = Application()
+    empty_phone = dict(synthetic.record(0), phone_number_home="")
+    languages_as_text = dict(synthetic.record(1), languages="English")
+    missing_name = {key: value for key, value in synthetic.record(2).items() if key != "full_name"}
+
+    async def scenario(client):
+        for record in (empty_phone, languages_as_text, missing_name):
+            status, payload = await client.request("POST", "/applications", record)
+            assert status == 400, payload
+        status, payload = await client.request("PUT", f"/applications?name={quote(synthetic.full_name(0))}", languages_as_text)
+        assert status == 400, payload
+        status, payload = await client.request("POST", "/batch", [
+            {"op": "add", "record": empty_phone},
+            {"op": "add", "record": languages_as_text},
+            {"op": "add", "record": synthetic.record(3)},
+            {"op": "add"},
+            {"op": "search", "name": 42},
+            {"op": "list", "offset": "x"},
+        ])
+        assert status == 200
+        assert [result["status"] for result in payload["results"]] == [400, 400, 201, 400, 400, 400]
+    serve(application, scenario)
+    assert len(application) == 1
+
+
+class BrokenStore(MemoryStore):
+    """fails to store one applicant, the way a full disk would"""
+    def __init__(self, broken_name):
+        super().__init__()
+        self.broken_name = broken_name
+
+    def insert(self, applicant):
+        if applicant.personal_info.full_name == self.broken_name:
+            raise OSError("disk full")
+        return super().insert(applicant)
+
+
+def test_a_failing_operation_does_not_abort_the_batch(synthetic):
+    records = list(synthetic.records(3))
+    application = Application(BrokenStore(records[1]["full_name"]))
+
+    async def scenario(client):
+        status, payload = await client.request("POST", "/batch", [{"op": "add", "record": record} for record in records])
+        assert status == 200
+        assert [result["status"] for result in payload["results"]] == [201, 500, 201]
+        assert "disk full" in payload["results"][1]["error"]
+    serve(application, scenario)
+    assert len(application) == 2
@@ -0,0 +1,53 @@
+import io
+import threading
+
+import pytest
+
+from app import Application
+from sharding import ShardedApplication
+from synthetic import SyntheticApplicants
+
+
+@pytest.fixture(scope="module")
+def sharded():
+    # more applicants per shard than a render page, so that displaying them takes several round trips
+    application = ShardedApplication(2)
+    for applicant in SyntheticApplicants(seed=31).applicants(700):
+        application.add_applicant(applicant, verbose=False)
+    yield application
+    application.close()
+
+
+def test_lists_and_displays_like_an_application(sharded):
+    local = Application()
+    for applicant in sharded:
+        local.add_applicant(applicant, verbose=False)
+    assert len(sharded) == len(local) == 700
+    expected, shown = io.StringIO(), io.StringIO()
+    local.display_applications(local, offset=40, limit=500, sink=expected)
+    assert sharded.display_applications(sharded, offset=40, limit=500, sink=shown) == 500
+    assert shown.getvalue() == expected.getvalue()
+
+
+def test_display_and_fan_out_from_other_threads_do_not_deadlock(sharded):
+    errors = []
+
+    def repeatedly(work):
+        def run():
+            try:
+                for _ in range(15):
+                    work()
+            except Exception as e:
+                errors.append(e)
+        return threading.Thread(target=run, daemon=True)
+
+    threads = [repeatedly(lambda: sharded.display_applications(sharded, sink=io.StringIO())),
+               repeatedly(lambda: sharded.display_applications(sharded, offset=450, sink=io.StringIO())),
+               repeatedly(lambda: len(sharded)),
+               repeatedly(lambda: sharded.search_application("nobody"))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=60)
+    assert not any(thread.is_alive() for thread in threads)
+    assert errors == []
@@ -0,0 +1,106 @@
+import pytest
+
+import snapshot
+from app import Application
+from query import Name
+from records import build_applicant
+from snapshot import SnapshotStore, write_snapshot
+from synthetic import SyntheticApplicants
+
+
+def contents(store):
+    return [(applicant_id, applicant._state()) for applicant_id, applicant in store]
+
+
+@pytest.fixture
+def synthetic():
+    return SyntheticApplicants(seed=13, unique_names=True)
+
+
+@pytest.fixture
+def path(tmp_path, synthetic):
+    """a snapshot of 30 applicants"""
+    application = Application()
+    for applicant in synthetic.applicants(30):
+        application.add_applicant(applicant, verbose=False)
+    path = str(tmp_path / "applicants.snapshot")
+    write_snapshot(path, application.store)
+    return path
+
+
+@pytest.fixture
+def decoded(monkeypatch):
+    """the records decoded from a snapshot file so far"""
+    calls = []
+    decode = snapshot.decode_applicant
+
+    def counting(data):
+        calls.append(data)
+        return decode(data)
+
+    monkeypatch.setattr(snapshot, "decode_applicant", counting)
+    return calls
+
+
+def test_snapshot_store_serves_the_file_and_saves_its_overlay(path, synthetic):
+    expected = Application()
+    for applicant in synthetic.applicants(30):
+        expected.add_applicant(applicant, verbose=False)
+    store = SnapshotStore(path)
+    assert contents(store) == contents(expected.store)
+    overlay = Application(store)
+    for application in (overlay, expected):
+        for i in range(0, 30, 3):
+            record = dict(synthetic.record(i), major_skills="cobol")
+            application.update_where(Name(record["full_name"]), lambda _: build_applicant(record))
+        for i in range(1, 30, 5):
+            application.delete_where(Name(synthetic.full_name(i)))
+        application.add_applicant(synthetic.applicant(30), verbose=False)
+    assert contents(store) == contents(expected.store)
+    store.save()
+    store.close()
+    reopened = SnapshotStore(path)
+    assert contents(reopened) == contents(expected.store)
+    assert len(reopened) == len(expected) == 30 - 6 + 1
+    assert [applicant_id for applicant_id, _ in reopened.find_by_name(synthetic.full_name(3))] == [3]
+    # ids keep growing from where the saved store left off
+    assert reopened.insert(synthetic.applicant(31)) == 31
+    reopened.close()
+
+
+def test_records_are_decoded_only_when_read(path, synthetic, decoded):
+    store = SnapshotStore(path)
+    assert len(store) == 30
+    assert store.contains_identity(synthetic.applicant(4).identity)
+    assert decoded == []
+    assert store.get(7) == synthetic.applicant(7)
+    assert len(decoded) == 1
+    store.remove(3)
+    store.replace(5, synthetic.applicant(5))
+    store.save()
+    # unchanged records are copied into the new file as they are
+    assert len(decoded) == 1
+    store.close()
+
+
+def test_len_follows_removals(path, synthetic):
+    store = SnapshotStore(path)
+    store.remove(0)
+    store.remove(29)
+    assert len(store) == 28
+    added = store.insert(synthetic.applicant(30))
+    assert len(store) == 29
+    store.remove(added)
+    assert len(store) == 28
+    with pytest.raises(KeyError):
+        store.remove(0)
+    # a removal undone by put() counts again
+    store.put(0, synthetic.applicant(0))
+    assert len(store) == 29
+    assert len(list(store)) == 29
+    store.save()
+    assert len(store) == 29
+    store.close()
+    reopened = SnapshotStore(path)
+    assert len(reopened) == len(list(reopened)) == 29
+    reopened.close()